@@ -1,15 +1,21 @@
 # Importing the libraries
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
-import plotly.express as px
-import pandas as pd
+from dashboard import config
+from dashboard.cache import figure_cache
+from dashboard.compression import compressor
+from dashboard.images import data_uri_cache
+from dashboard.metrics import metrics
+from dashboard.payloads import payload_store
+from dashboard.reload import reloader
 
 # importing a stylesheet
 external_css = ["https://cdn.jsdelivr.net/npm/bootstrap@5.3.1/dist/css/bootstrap.min.css", ]
 
 # creating app instance with multiple pages and stylesheet
-app = dash.Dash(__name__, pages_folder='pages', use_pages=True, external_stylesheets=external_css)
+# with lazy pages the layouts are only built when visited, so dash cannot check the callbacks against them at startup
+app = dash.Dash(__name__, pages_folder='pages', use_pages=True, external_stylesheets=external_css,
+				suppress_callback_exceptions=config.LAZY_PAGES)
 
 # defining the layout of  the web app
 app.layout = html.Div([
@@ -23,6 +29,28 @@ app.layout = html.Div([
 	dash.page_container
 ], style={'margin-left': '0', 'margin-right': '0', 'width': '1000px', 'padding': '0', 'margin': '0 auto'})
 
+# swapping in new versions of the dataset without a restart, added before the other hooks because flask skips the
+# later before_request hooks of the requests answered from the payload store
+if config.RELOAD_INTERVAL > 0 or config.RELOAD_TOKEN:
+	reloader.init_app(app.server, config.RELOAD_PATH, config.RELOAD_TOKEN)
+
+# timing every callback and the layout route, added first so the requests answered from the payload store are timed too
+if config.METRICS:
+	metrics.register_cache('figures', figure_cache)
+	metrics.register_cache('payloads', payload_store)
+	metrics.register_cache('images', data_uri_cache)
+	metrics.init_app(app.server, config.METRICS_PATH)
+
+# compressing the responses and adding ETags, added after the metrics and before the payload store: flask runs the
+# after_request hooks in reverse order, so the stored responses are already compressed and the metrics see the bytes sent
+if config.COMPRESSION:
+	compressor.min_bytes = config.COMPRESSION_MIN_BYTES
+	compressor.init_app(app.server)
+
+# serving stored, pre-compressed responses for the year slider callbacks
+if config.PAYLOAD_STORE:
+	payload_store.init_app(app.server)
+
 # running the code when the python script is ran
 if __name__ == '__main__':
 	app.run(debug=True)
\ No newline at end of file
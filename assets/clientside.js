@@ -0,0 +1,233 @@
+// clientside callbacks used when the dashboard runs with DASHBOARD_SLIDER_MODE=clientside
+// the data for every year is sent once in a dcc.Store, and the figures built on the server for the
+// first year are updated here by swapping in the values of the selected year
+// with DASHBOARD_SLIDER_MODE=animation the play button and the year slider of Page 1 are played back here,
+// moving the animated graphs to the frame of the year
+
+// function to find the positions of the largest values, ignoring missing values
+function largestPositions(values, count) {
+    const positions = [];
+    values.forEach(function (value, i) {
+        if (value !== null) {
+            positions.push(i);
+        }
+    });
+    positions.sort(function (a, b) { return values[b] - values[a]; });
+    return positions.slice(0, count);
+}
+
+// function to round a number to two decimal places, like round(value, 2) in python
+function roundTwo(value) {
+    return Math.round(value * 100) / 100;
+}
+
+// function to calculate the median of the values, ignoring missing values
+function median(values) {
+    const sorted = values.filter(function (value) { return value !== null; })
+        .sort(function (a, b) { return a - b; });
+    const middle = Math.floor(sorted.length / 2);
+    if (sorted.length % 2 === 1) {
+        return sorted[middle];
+    }
+    return (sorted[middle - 1] + sorted[middle]) / 2;
+}
+
+function logValues(values) {
+    return values.map(function (value) { return value === null ? null : Math.log(value); });
+}
+
+// function to copy a figure, replacing the traces and merging the given keys into the layout
+function withData(figure, data, layout) {
+    return Object.assign({}, figure, {
+        data: data,
+        layout: Object.assign({}, figure.layout, layout)
+    });
+}
+
+// with the lite render profile the hover data is just the values, otherwise rows of (value, code, value) like px
+function choroplethTrace(template, year, valueKey, trimHover) {
+    return Object.assign({}, template, {
+        locations: year.code,
+        hovertext: year.country,
+        z: logValues(year[valueKey]),
+        customdata: trimHover ? year[valueKey] :
+            year[valueKey].map(function (value, i) { return [value, year.code[i], value]; })
+    });
+}
+
+// function to pick the colour of a country in the bar and pie charts, like chart_colours in pages/page1.py
+// the countries without a colour of their own are given one by their rank in the top five
+function countryColour(store, country, rank) {
+    if (country in store.colours) {
+        return store.colours[country];
+    }
+    return store.rank_colours[rank];
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dashboard: {
+        updatePage1: function (selectedYear, store, mapFig, populationFig, barFig, pieFig) {
+            const year = store.years[String(selectedYear)];
+
+            // MAP CHARTS
+            const mapTrace = choroplethTrace(mapFig.data[0], year, 'gdp', store.trim_hover);
+            const newMapFig = withData(mapFig, [mapTrace], {});
+
+            const bubbles = populationFig.data[1];
+            const largestPopulation = Math.max.apply(null, year.population);
+            const bubbleTrace = Object.assign({}, bubbles, {
+                locations: year.code,
+                hovertext: year.country,
+                customdata: year.code.map(function (code, i) {
+                    return store.trim_hover ? [year.gdp[i], year.population[i]] : [code, year.gdp[i], year.population[i]];
+                }),
+                marker: Object.assign({}, bubbles.marker, {
+                    size: year.population,
+                    sizeref: largestPopulation / (20 * 20)
+                })
+            });
+            const newPopulationFig = withData(populationFig, [
+                choroplethTrace(populationFig.data[0], year, 'gdp', store.trim_hover), bubbleTrace
+            ], {});
+
+            // BAR CHART
+            const topFive = largestPositions(year.gdp, 5);
+            const barTemplate = barFig.data[0];
+            const barTraces = topFive.map(function (i, rank) {
+                const country = year.country[i];
+                return Object.assign({}, barTemplate, {
+                    name: country,
+                    legendgroup: country,
+                    x: [country],
+                    y: [year.gdp[i]],
+                    customdata: [[year.population[i]]],
+                    marker: Object.assign({}, barTemplate.marker, {color: countryColour(store, country, rank)})
+                });
+            });
+            const newBarFig = withData(barFig, barTraces, {
+                title: Object.assign({}, barFig.layout.title, {
+                    text: '<b>Largest 5 African Economies in ' + selectedYear + '</b>'
+                }),
+                xaxis: Object.assign({}, barFig.layout.xaxis, {
+                    categoryarray: topFive.map(function (i) { return year.country[i]; })
+                })
+            });
+
+            // PIE CHART
+            // grouping the economies outside the top five into 'Other', ordered by label like a pandas groupby
+            const groups = {};
+            year.country.forEach(function (country, i) {
+                const label = topFive.indexOf(i) === -1 ? 'Other' : country;
+                const group = groups[label] || (groups[label] = {gdp: 0, population: 0});
+                group.gdp += year.gdp[i] === null ? 0 : year.gdp[i];
+                group.population += year.population[i];
+            });
+            const labels = Object.keys(groups).sort();
+            const topCountries = topFive.map(function (i) { return year.country[i]; });
+            const values = labels.map(function (label) { return groups[label].gdp; });
+            const pieTrace = Object.assign({}, pieFig.data[0], {
+                labels: labels,
+                values: values,
+                text: values.map(function (value) { return roundTwo(value / Math.pow(10, 10)); }),
+                customdata: labels.map(function (label) { return groups[label].population; }),
+                marker: Object.assign({}, pieFig.data[0].marker, {
+                    colors: labels.map(function (label) { return countryColour(store, label, topCountries.indexOf(label)); })
+                })
+            });
+
+            const pieLayout = {
+                title: Object.assign({}, pieFig.layout.title, {
+                    text: '<b>African GDP Distribution in ' + selectedYear + '</b>'
+                }),
+                annotations: []
+            };
+            if (selectedYear === 2000) {
+                const southAfrica = year.country.indexOf('South Africa');
+                const totalPopulation = year.population.reduce(function (a, b) { return a + b; }, 0);
+                const totalGdp = year.gdp.reduce(function (a, b) { return a + (b === null ? 0 : b); }, 0);
+                pieLayout.annotations = [Object.assign({}, store.pie_annotation, {
+                    text: '<b>Despite having ' + roundTwo(year.population[southAfrica] / totalPopulation * 100) +
+                        "%<br>of Africa's recorded<br>population, it has<br>" +
+                        roundTwo(year.gdp[southAfrica] / totalGdp * 100) + "% of Africa's<br>total GDP</b>"
+                })];
+            }
+            const newPieFig = withData(pieFig, [pieTrace], pieLayout);
+
+            return [newMapFig, newPopulationFig, newBarFig, newPieFig];
+        },
+
+        updatePage3: function (selectedYear, store, mapFig, histFig, barFig) {
+            const year = store.years[String(selectedYear)];
+
+            // MAP
+            const mapData = mapFig.data.slice();
+            mapData[0] = choroplethTrace(mapData[0], year, 'gdp_per_capita', store.trim_hover);
+            // swapping in the inset images of the islands, coloured for the selected year
+            const insets = store.insets[String(selectedYear)];
+            const newMapFig = withData(mapFig, mapData, {
+                title: Object.assign({}, mapFig.layout.title, {
+                    text: '<b>Map of the Logarithm of GDP per Capita in ' + selectedYear + '</b>'
+                }),
+                images: mapFig.layout.images.map(function (image, i) {
+                    return Object.assign({}, image, {source: insets[i]});
+                })
+            });
+
+            // HISTOGRAM
+            const newHistFig = withData(histFig, [
+                Object.assign({}, histFig.data[0], {x: year.gdp_per_capita})
+            ], {
+                title: Object.assign({}, histFig.layout.title, {
+                    text: '<b>Histogram of (GDP per Capita) in ' + selectedYear + '</b>'
+                })
+            });
+
+            // BAR CHART
+            const topTen = largestPositions(year.gdp_per_capita, 10).reverse();
+            const averageValue = median(year.gdp_per_capita);
+            const newBarFig = withData(barFig, [
+                Object.assign({}, barFig.data[0], {
+                    y: topTen.map(function (i) { return year.country[i]; }),
+                    x: topTen.map(function (i) { return year.gdp_per_capita[i]; })
+                })
+            ], {
+                shapes: [Object.assign({}, barFig.layout.shapes[0], {
+                    x0: averageValue,
+                    x1: averageValue,
+                    y1: topTen.length
+                })]
+            });
+
+            return [newMapFig, newHistFig, newBarFig];
+        },
+
+        animatePage1: function (nClicks, nIntervals, disabled, selectedYear, minYear, maxYear) {
+            const noUpdate = window.dash_clientside.no_update;
+            const triggered = window.dash_clientside.callback_context.triggered.map(function (t) { return t.prop_id; });
+            if (triggered.indexOf('page1-play.n_clicks') !== -1) {
+                if (!disabled) {
+                    return [true, 'Play', noUpdate];
+                }
+                // playing again from the first year once the last year has been reached
+                return [false, 'Pause', selectedYear >= maxYear ? minYear : noUpdate];
+            }
+            if (disabled) {
+                return [noUpdate, noUpdate, noUpdate];
+            }
+            if (selectedYear >= maxYear) {
+                return [true, 'Play', noUpdate];
+            }
+            return [noUpdate, noUpdate, selectedYear + 1];
+        },
+
+        showPage1Frame: function (selectedYear, animation) {
+            animation.graphs.forEach(function (id) {
+                const graph = document.querySelector('#' + id + ' .js-plotly-plot');
+                if (graph) {
+                    window.Plotly.animate(graph, [String(selectedYear)], animation.frame_args);
+                }
+            });
+            return selectedYear;
+        }
+    }
+});
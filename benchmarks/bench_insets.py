@@ -0,0 +1,115 @@
+# benchmark comparing the per pixel recolouring of the Page 3 insets with the numpy version in dashboard/images.py
+# run from the root of the repository with: python benchmarks/bench_insets.py
+import os
+import sys
+import time
+
+from PIL import Image, ImageOps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dashboard.config import ROOT_DIR
+from dashboard.images import recolour_mauritius, recolour_seychelles
+
+# a light and a dark shade from the red colour scale
+TARGET_COLOURS = [(252, 146, 114), (165, 15, 21)]
+
+
+def legacy_recolour_seychelles(img, target_colour):
+    '''
+    The original per pixel recolouring of the Seychelles map, kept as the reference for the numpy version
+    '''
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    new_img_s = Image.new('RGBA', img.size)
+    target_colour = tuple(target_colour) + (255,)
+    width, height = img.size
+    for x in range(width):
+        for y in range(height):
+            r, g, b, a = img.getpixel((x, y))
+            if r <= 20 or g <= 20 or b <= 20:
+                new_img_s.putpixel((x, y), target_colour)
+    return new_img_s
+
+
+def legacy_recolour_mauritius(img, target_colour):
+    '''
+    The original per pixel recolouring and outlining of the Mauritius map, kept as the reference for the numpy version
+    '''
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    padding_width = 10
+    padded_img = ImageOps.expand(img, border=padding_width, fill=(0, 0, 0, 0))
+    new_img_m = Image.new('RGBA', padded_img.size)
+
+    transparent_colour = (0, 0, 0, 0)
+    target_colour = tuple(target_colour) + (255,)
+    outline_colour = (0, 0, 0, 255)
+    outline_thickness = 7
+
+    def is_target_pixel(pixel):
+        r, g, b, a = pixel
+        return r >= 20 and g >= 20 and b >= 20
+
+    edge_pixels = []
+    for x in range(padded_img.size[0]):
+        for y in range(padded_img.size[1]):
+            current_pixel = padded_img.getpixel((x, y))
+            if is_target_pixel(current_pixel):
+                neighbors = [(x-1, y), (x+1, y), (x, y-1), (x, y+1)]
+                is_edge = any((0 <= nx < padded_img.size[0] and 0 <= ny < padded_img.size[1] and not is_target_pixel(padded_img.getpixel((nx, ny))))
+                              for nx, ny in neighbors)
+                if is_edge:
+                    edge_pixels.append((x, y))
+
+    for x, y in edge_pixels:
+        for dx in range(-outline_thickness, outline_thickness + 1):
+            for dy in range(-outline_thickness, outline_thickness + 1):
+                if 0 <= x + dx < padded_img.size[0] and 0 <= y + dy < padded_img.size[1]:
+                    new_img_m.putpixel((x + dx, y + dy), outline_colour)
+
+    for x in range(padded_img.size[0]):
+        for y in range(padded_img.size[1]):
+            if is_target_pixel(padded_img.getpixel((x, y))) and new_img_m.getpixel((x, y)) != outline_colour:
+                new_img_m.putpixel((x, y), target_colour)
+            else:
+                if new_img_m.getpixel((x, y)) != outline_colour:
+                    new_img_m.putpixel((x, y), transparent_colour)
+    return new_img_m
+
+
+def best_time(func, *args, repeat=3):
+    '''
+    Function to time a function, keeping the fastest of a few runs
+    Input arguments: function, its arguments, number of runs
+    Returns the fastest time in seconds and the result of the last run
+    '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    cases = [
+        ('seychelles', 'seychelles-map.webp', legacy_recolour_seychelles, recolour_seychelles),
+        ('mauritius', 'mauritius_img.png', legacy_recolour_mauritius, recolour_mauritius),
+    ]
+    identical = True
+    for name, filename, legacy, vectorised in cases:
+        img = Image.open(os.path.join(ROOT_DIR, filename))
+        img.load()
+        for colour in TARGET_COLOURS:
+            legacy_time, expected = best_time(legacy, img, colour, repeat=1)
+            new_time, result = best_time(vectorised, img, colour)
+            same = expected.tobytes() == result.tobytes() and expected.size == result.size
+            identical = identical and same
+            print(f'{name:<11} {str(colour):<16} per pixel: {legacy_time * 1000:9.1f} ms   numpy: {new_time * 1000:8.1f} ms   '
+                  f'speed up: {legacy_time / new_time:7.1f}x   identical: {same}')
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,374 @@
+# check that the figures the callbacks now assemble as dictionairies match the figures plotly express built,
+# for every year, and time both ways of building them
+# run from the root of the repository with: python benchmarks/check_figures.py
+import base64
+import copy
+import functools
+import json
+import os
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+from PIL import Image, ImageOps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # registers the pages
+from dashboard import config
+from dashboard.data import STRING_COLUMNS, df, year_index, year_slice
+from pages import page1, page3
+
+# the empty geo center px.choropleth added has no effect on the map and is no longer sent
+IGNORED_KEYS = {'center'}
+
+
+def legacy_slice(selected_year):
+    '''
+    The rows of a year with the text columns as plain strings, the legacy code relabels countries in place, which a
+    dictionary encoded (categorical) column from the column store does not allow
+    '''
+    return year_slice(selected_year).astype({column: str for column in STRING_COLUMNS})
+
+
+def legacy_page1(selected_year):
+    '''
+    The px/go figures of page 1 the callback used to build, kept as the reference for the dictionairies
+    '''
+    filtered_df = legacy_slice(selected_year)
+    country_colours = page1.country_colours
+
+    map_fig = px.choropleth(
+        filtered_df, locations='Code', color=np.log(filtered_df['GDP (USD)']), hover_name='Country',
+        hover_data={'Code': False, 'GDP (USD)': ':,'}, custom_data=[filtered_df['GDP (USD)']],
+        color_continuous_scale='reds', projection='orthographic', title='', template='plotly',
+        range_color=[min(np.log(df['GDP (USD)'])), max(np.log(df['GDP (USD)']))])
+    scattergeo_fig = px.scatter_geo(
+        filtered_df, locations='Code', size='Population', hover_name='Country',
+        hover_data={'Code': False, 'GDP (USD)': ':,', 'Population': ':,'},
+        projection='orthographic', title='', template='plotly', opacity=0.5)
+    map_fig.update_traces(marker=dict(line={"color": "black", "width": 1.5}))
+    map_fig.update_layout(geo=dict(showframe=False, showcoastlines=True, showcountries=True, countrycolor="#d1d1d1",
+                                   showocean=True, oceancolor="#c9d2e0", showlakes=True, lakecolor="#99c0db",
+                                   showrivers=True, rivercolor="#99c0db", resolution=110),
+                          coloraxis_colorbar=dict(title="GDP (log)"), paper_bgcolor="white",
+                          font=dict(color="black"), margin=dict(l=20, r=20, t=40, b=10))
+    map_fig.update_geos(projection_rotation=dict(lon=17, lat=2))
+    map_fig.update_geos(projection_scale=1.43)
+    map_fig2 = copy.deepcopy(map_fig)
+    map_fig.update_layout(title_text="<b>Chloropleth Map of GDP (log)</b>", title_x=0.5)
+    map_fig.add_annotation(
+        text="<b>As the year increases,<br>watch the shade of red<br>increase as Africa's<br>economies grow larger</b>",
+        xref="paper", yref="paper", x=0.18, y=0.25, showarrow=False, font=dict(size=12), align="center",
+        xanchor="center", yanchor="bottom", bgcolor="white", bordercolor="black", borderwidth=1)
+    map_fig_with_population = map_fig2.add_trace(scattergeo_fig.data[0])
+    map_fig_with_population.update_layout(title_text="<b>Map of GDP (log) with Population Bubbles</b>", title_x=0.5)
+    map_fig_with_population.add_annotation(
+        text="<b>Nigeria is Africa's<br>most populous<br>economy</b>", x=0.36, y=0.54, showarrow=True, arrowhead=1,
+        arrowcolor="black", arrowwidth=2, ax=-55, ay=100, font=dict(size=12), bgcolor="white",
+        bordercolor="black", borderwidth=1)
+
+    top_five_df = filtered_df.sort_values(by='GDP (USD)', ascending=False).head(5)
+    bar_fig = px.bar(top_five_df, x='Country', y='GDP (USD)', title=f'<b>Largest 5 African Economies in {selected_year}</b>',
+                     labels={'GDP (USD)': 'GDP (USD in Billions)'}, hover_data={'GDP (USD)': ':,', 'Population': ':,'},
+                     color='Country', color_discrete_map=country_colours)
+    bar_fig.update_layout(xaxis_tickangle=25)
+    bar_fig.update_traces(marker_line_color='black', marker_line_width=2)
+    bar_fig.update_layout(paper_bgcolor="white", font=dict(color="black"), title=dict(x=0.5),
+                          margin=dict(l=30, r=30, t=60, b=60),
+                          yaxis=dict(tickvals=[100000000000, 200000000000, 300000000000, 400000000000, 500000000000, 600000000000],
+                                     ticktext=[100, 200, 300, 400, 500, 600], range=[0, 600000000000]),
+                          legend_title_text='Country')
+    bar_fig.add_annotation(
+        text="<b>As the year increases,<br>watch the bars of<br>Africa's largest five<br>economies grow taller</b>",
+        xref="paper", yref="paper", x=0.7, y=0.8, showarrow=False, font=dict(size=12), align="center",
+        xanchor="center", yanchor="bottom", bgcolor="white", bordercolor="black", borderwidth=1)
+
+    pie_df = filtered_df.sort_values(by='GDP (USD)', ascending=False)
+    top5_indices = pie_df['GDP (USD)'].nlargest(5).index
+    pie_df.loc[~pie_df.index.isin(top5_indices), 'Country'] = 'Other'
+    grouped_df = pie_df.groupby('Country').agg({'GDP (USD)': 'sum', 'Population': 'sum'}).reset_index()
+    label_lst = grouped_df['Country'].tolist()
+    valueslst = grouped_df['GDP (USD)'].tolist()
+    pie_fig = go.Figure(go.Pie(
+        name="", values=valueslst, labels=label_lst, text=[round(value/10**10, 2) for value in valueslst],
+        marker=dict(colors=[country_colours[label] for label in label_lst]),
+        hovertemplate="%{label}: %{text} Billion USD<br>Population: %{customdata:,}", textinfo='percent',
+        customdata=grouped_df['Population'].tolist()))
+    pie_fig.update_layout(paper_bgcolor="white", font=dict(color="black"), title=dict(x=0.5),
+                          margin=dict(l=30, r=30, t=60, b=60))
+    pie_fig.update_layout(title_text=f'<b>African GDP Distribution in {selected_year}</b>', title=dict(x=0.5),
+                          font=dict(color="black"))
+    pie_fig.update_traces(marker=dict(line=dict(color='black', width=2)),
+                          insidetextfont=dict(color='black', family="Arial", size=12))
+    if selected_year == 2000:
+        SA_pop = filtered_df[filtered_df['Country'] == 'South Africa']['Population'].iloc[0]
+        total_population = filtered_df['Population'].sum()
+        SA_gdp = filtered_df[filtered_df['Country'] == 'South Africa']['GDP (USD)'].iloc[0]
+        total_gdp = filtered_df['GDP (USD)'].sum()
+        pie_fig.add_annotation(
+            text=f"<b>Despite having {round((SA_pop/total_population)*100,2)}%<br>of Africa's recorded<br>population, it has<br>{round((SA_gdp/total_gdp)*100,2)}% of Africa's<br>total GDP</b>",
+            xref="paper", yref="paper", x=1.15, y=0.05, showarrow=False, font=dict(size=12), align="center",
+            xanchor="center", yanchor="bottom", bgcolor="white", bordercolor="black", borderwidth=1)
+
+    return map_fig, map_fig_with_population, bar_fig, pie_fig
+
+
+# the colour scale, normalisation and interpolation the callback of page 3 used to colour the insets
+red_scale_rgb = [
+    (0.0, (255,245,240)),
+    (0.125, (254,224,210)),
+    (0.25, (252,187,161)),
+    (0.375, (252,146,114)),
+    (0.5, (251,106,74)),
+    (0.625, (239,59,44)),
+    (0.75, (203,24,29)),
+    (0.875, (165,15,21)),
+    (1.0, (103,0,13)),
+]
+
+
+def generating_normalised_val(new_value, max_val, min_val):
+    return(new_value - min_val) / (max_val - min_val)
+
+
+def interpolate_color(value, color_scale):
+    value = max(0, min(1, value))
+    for i in range(1, len(color_scale)):
+        if value <= color_scale[i][0]:
+            lower = color_scale[i - 1]
+            upper = color_scale[i]
+            break
+    else:
+        return color_scale[-1][1]
+    ratio = (value - lower[0]) / (upper[0] - lower[0])
+    interp_color = [int(lower_val + (upper_val - lower_val) * ratio) for lower_val, upper_val in zip(lower[1], upper[1])]
+    return interp_color
+
+
+def legacy_colour(filtered_df, country):
+    value = filtered_df[filtered_df['Country'] == country]['GDP per Capita'].iloc[0]
+    normalised_val = generating_normalised_val(np.log(value), 9, 5)
+    return tuple(interpolate_color(normalised_val, red_scale_rgb))
+
+
+# the per pixel recolouring is slow, but only depends on the colour, so each colour is only done once
+@functools.lru_cache(maxsize=None)
+def legacy_seychelles(reds_target, greens_target, blue_target):
+    '''
+    The per pixel recolouring of the Seychelles inset the callback used to do
+    '''
+    img = Image.open(os.path.join(config.INSET_DIR, 'seychelles-map.webp'))
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    new_img_s = Image.new('RGBA', img.size)
+    target_colour = (reds_target, greens_target, blue_target, 255)
+    width, height = img.size
+    for x in range(width):
+        for y in range(height):
+            r, g, b, a = img.getpixel((x, y))
+            if r <= 20 or g <= 20 or b <= 20:
+                new_img_s.putpixel((x, y), target_colour)
+    return new_img_s
+
+
+@functools.lru_cache(maxsize=None)
+def legacy_mauritius(reds_target, greens_target, blue_target):
+    '''
+    The per pixel recolouring and outlining of the Mauritius inset the callback used to do
+    '''
+    img = Image.open(os.path.join(config.INSET_DIR, 'mauritius_img.png'))
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    padding_width = 10
+    padded_img = ImageOps.expand(img, border=padding_width, fill=(0, 0, 0, 0))
+    new_img_m = Image.new('RGBA', padded_img.size)
+    transparent_colour = (0, 0, 0, 0)
+    target_colour = (reds_target, greens_target, blue_target, 255)
+    outline_colour = (0, 0, 0, 255)
+    outline_thickness = 7
+
+    def is_target_pixel(pixel):
+        r, g, b, a = pixel
+        return r >= 20 and g >= 20 and b >= 20
+
+    edge_pixels = []
+    for x in range(padded_img.size[0]):
+        for y in range(padded_img.size[1]):
+            current_pixel = padded_img.getpixel((x, y))
+            if is_target_pixel(current_pixel):
+                neighbors = [(x-1, y), (x+1, y), (x, y-1), (x, y+1)]
+                is_edge = any((0 <= nx < padded_img.size[0] and 0 <= ny < padded_img.size[1] and not is_target_pixel(padded_img.getpixel((nx, ny))))
+                              for nx, ny in neighbors)
+                if is_edge:
+                    edge_pixels.append((x, y))
+    for x, y in edge_pixels:
+        for dx in range(-outline_thickness, outline_thickness + 1):
+            for dy in range(-outline_thickness, outline_thickness + 1):
+                if 0 <= x + dx < padded_img.size[0] and 0 <= y + dy < padded_img.size[1]:
+                    new_img_m.putpixel((x + dx, y + dy), outline_colour)
+    for x in range(padded_img.size[0]):
+        for y in range(padded_img.size[1]):
+            if is_target_pixel(padded_img.getpixel((x, y))) and new_img_m.getpixel((x, y)) != outline_colour:
+                new_img_m.putpixel((x, y), target_colour)
+            else:
+                if new_img_m.getpixel((x, y)) != outline_colour:
+                    new_img_m.putpixel((x, y), transparent_colour)
+    return new_img_m
+
+
+def legacy_page3(selected_year):
+    '''
+    The px/go figures of page 3 the callback used to build, kept as the reference for the dictionairies
+    The insets are coloured from the selected year (as they have been since the inset bank), the rest is unchanged
+    '''
+    filtered_df = legacy_slice(selected_year)
+
+    map_fig = px.choropleth(
+        filtered_df, locations='Code', color=np.log(filtered_df['GDP per Capita']), hover_name='Country',
+        hover_data={'Code': False, 'GDP per Capita': ':,'}, custom_data=[filtered_df['GDP per Capita']],
+        color_continuous_scale='reds', projection='orthographic', title='', template='plotly',
+        range_color=[min(np.log(df['GDP per Capita'])), max(np.log(df['GDP per Capita']))])
+    map_fig.update_layout(
+        title=dict(text=f'<b>Map of the Logarithm of GDP per Capita in {selected_year}</b>', x=0.5),
+        geo=dict(showframe=False, showcoastlines=True, showcountries=True, countrycolor="#d1d1d1", showocean=True,
+                 oceancolor="#c9d2e0", showlakes=True, lakecolor="#99c0db", showrivers=True, rivercolor="#99c0db",
+                 projection_type='orthographic'),
+        paper_bgcolor="white", font=dict(color="black"), margin=dict(l=20, r=20, t=40, b=10))
+    map_fig.update_traces(marker=dict(line={"color": "black", "width": 1.5}))
+    map_fig.update_geos(projection_rotation=dict(lon=17, lat=2))
+    map_fig.update_geos(projection_scale=1.43)
+    map_fig.add_trace(go.Scattergeo(lon=[55.4920], lat=[-4.6796], mode='markers',
+                                    marker=dict(size=10, color='rgba(255, 0, 0, 0)', line=dict(width=1, color='black')),
+                                    name='Seychelles', showlegend=False))
+    map_fig.add_trace(go.Scattergeo(lon=[57.5522], lat=[-20.3484], mode='markers',
+                                    marker=dict(size=10, color='rgba(255, 0, 0, 0)', line=dict(width=1, color='black')),
+                                    name='Mauritius', showlegend=False))
+    map_fig.update_layout(margin=dict(r=100))
+    map_fig.update_layout(annotations=[
+        dict(text="<b>Equitorial Guinea</b>", x=0.46, y=0.50, showarrow=True, arrowhead=1, arrowcolor="black",
+             arrowwidth=2, ax=-200, ay=0, font=dict(size=12), bgcolor="white", bordercolor="black", borderwidth=1),
+        dict(x=0.669, y=0.43, xref="paper", yref="paper", showarrow=True, arrowhead=0, arrowcolor="black",
+             arrowwidth=2, ax=161, ay=-170),
+        dict(x=0.669, y=0.412, xref="paper", yref="paper", showarrow=True, arrowhead=0, arrowcolor="black",
+             arrowwidth=2, ax=161, ay=-67),
+        dict(x=0.666, y=0.24, xref="paper", yref="paper", showarrow=True, arrowhead=0, arrowcolor="black",
+             arrowwidth=2, ax=118.9, ay=-22),
+        dict(x=0.666, y=0.225, xref="paper", yref="paper", showarrow=True, arrowhead=0, arrowcolor="black",
+             arrowwidth=2, ax=118.9, ay=36),
+        dict(text="<b>Seychelles</b>", xref="paper", yref="paper", x=0.9, y=0.96, showarrow=False,
+             font=dict(size=12), align="center", xanchor="center", yanchor="bottom", bgcolor="white"),
+        dict(text="<b>Mauritius</b>", xref="paper", yref="paper", x=0.84, y=0.32, showarrow=False,
+             font=dict(size=12), align="center", xanchor="center", yanchor="bottom", bgcolor="white"),
+    ])
+
+    x0_seychelles, y0_seychelles = 0.85, 0.6
+    sizex_seychelles = 0.15
+    sizey_seychelles = 0.35
+    map_fig.add_shape(type="rect", x0=x0_seychelles, y0=y0_seychelles, x1=x0_seychelles+sizex_seychelles,
+                      y1=y0_seychelles+sizey_seychelles, line=dict(color="black", width=1), fillcolor="white",
+                      xref="paper", yref="paper", layer="below")
+    map_fig.add_layout_image(dict(source=legacy_seychelles(*legacy_colour(filtered_df, 'Seyshelles')),
+                                  x=x0_seychelles+0.01, y=y0_seychelles+0.001, xref="paper", yref="paper",
+                                  sizex=0.34, sizey=0.34, xanchor="left", yanchor="bottom", layer="above"))
+
+    x0_mauritius, y0_mauritius = 0.8, 0.11
+    sizex_mauritius = 0.07
+    sizey_mauritius = 0.20
+    map_fig.add_shape(type="rect", x0=x0_mauritius, y0=y0_mauritius, x1=x0_mauritius+sizex_mauritius,
+                      y1=y0_mauritius+sizey_mauritius, line=dict(color="black", width=1), fillcolor="white",
+                      xref="paper", yref="paper", layer="below")
+    map_fig.add_layout_image(dict(source=legacy_mauritius(*legacy_colour(filtered_df, 'Mauritius')),
+                                  x=x0_mauritius, y=y0_mauritius, xref="paper", yref="paper",
+                                  sizex=0.2, sizey=0.2, xanchor="left", yanchor="bottom", layer="above"))
+
+    hist_fig = px.histogram(filtered_df, x='GDP per Capita', nbins=50,
+                            title=f'<b>Histogram of (GDP per Capita) in {selected_year}</b>',
+                            labels={'GDP per Capita': 'GDP per Capita', 'count': 'Frequency'})
+    hist_fig.update_traces(marker_color='#E14DFF', marker_line_color='black', marker_line_width=1.5)
+    hist_fig.update_layout(title_x=0.5, font=dict(color="black"))
+
+    average_val = filtered_df['GDP per Capita'].median()
+    top_10 = filtered_df.nlargest(10, 'GDP per Capita')
+    top_10 = top_10.sort_values(by=['GDP per Capita'], ascending=True)
+    bar_fig = go.Figure(go.Bar(y=top_10['Country'], x=top_10['GDP per Capita'], orientation='h'))
+    bar_fig.add_shape(type="line", x0=average_val, y0=-0.4, x1=average_val, y1=len(top_10),
+                      line=dict(color="black", width=3, dash="dashdot"), name='Average GDP per Capita')
+    bar_fig.update_layout(title='<b>Top 10 Economies (GDP per Capita)</b>', title_x=0.5, yaxis=dict(title='Country'),
+                          xaxis=dict(title='GDP per Capita'), font=dict(color="black"))
+    bar_fig.update_traces(marker_line_color='black', marker_line_width=1.5)
+    bar_fig.add_annotation(dict(font=dict(color='black', size=10), x=0.1, y=1.08, showarrow=False,
+                                text="<b>Medium GDP per Capita of African Economies</b>", textangle=0,
+                                xanchor='left', xref="paper", yref="paper"))
+
+    return map_fig, hist_fig, bar_fig
+
+
+def image_pixels(uri):
+    '''
+    Function to decode a data URI of a layout image to the size and RGBA pixels it shows, the bytes of the encoded
+    image depend on the encoder (plotly encodes the images the callback used to build as plain PNGs)
+    '''
+    img = Image.open(BytesIO(base64.b64decode(uri.split(',', 1)[1]))).convert('RGBA')
+    return [list(img.size), base64.b64encode(img.tobytes()).decode('ascii')]
+
+
+def figure_json(figure):
+    '''
+    Function to turn a figure into the JSON sent to the browser, without the ignored keys and with the layout images
+    as their pixels
+    '''
+    def strip(value):
+        if isinstance(value, dict):
+            return {key: strip(item) for key, item in value.items() if key not in IGNORED_KEYS}
+        if isinstance(value, list):
+            return [strip(item) for item in value]
+        return value
+    figure = strip(json.loads(pio.to_json(figure, validate=False)))
+    for image in figure.get('layout', {}).get('images', []):
+        if isinstance(image.get('source'), str) and image['source'].startswith('data:'):
+            image['source'] = image_pixels(image['source'])
+    return figure
+
+
+def mismatched_years(legacy, fast, years):
+    '''
+    Function to find the years where the reference figures and the figures of the callback differ
+    Input arguments: function building the reference figures, callback, list of years
+    Returns a list of the mismatched years
+    '''
+    return [year for year in years
+            if [figure_json(figure) for figure in legacy(year)] != [figure_json(figure) for figure in fast(year)]]
+
+
+def mean_time(func, years):
+    start = time.perf_counter()
+    for year in years:
+        func(year)
+    return (time.perf_counter() - start) / len(years)
+
+
+def main():
+    years = [int(year) for year in year_index]
+    cases = [
+        ('page1', legacy_page1, page1.update_charts.__wrapped__),  # bypassing the figure cache
+        ('page3', legacy_page3, page3.update_charts),
+    ]
+    identical = True
+    for name, legacy, fast in cases:
+        mismatched = mismatched_years(legacy, fast, years)
+        identical = identical and not mismatched
+        legacy_time = mean_time(legacy, years)
+        fast_time = mean_time(fast, years)
+        print(f'{name}  px: {legacy_time * 1000:7.1f} ms   dictionairies: {fast_time * 1000:6.1f} ms   '
+              f'speed up: {legacy_time / fast_time:5.1f}x   years matching: {len(years) - len(mismatched)}/{len(years)}'
+              + (f'   mismatched: {mismatched}' if mismatched else ''))
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# report of the time taken to import the app, with and without lazy pages, using python -X importtime
+# run from the root of the repository with: python benchmarks/import_report.py
+# the report is written to benchmarks/import_time.txt, which is kept in the repository to compare against
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_PATH = os.path.join(ROOT_DIR, 'benchmarks', 'import_time.txt')
+
+# number of modules listed for each mode, by cumulative import time
+TOP_MODULES = 25
+# number of imports of each mode, the report shows the import with the median time of the app
+REPEAT = 5
+
+MODES = [
+    ('eager pages', {'DASHBOARD_LAZY_PAGES': '0'}),
+    ('lazy pages (DASHBOARD_LAZY_PAGES=1)', {'DASHBOARD_LAZY_PAGES': '1'}),
+]
+
+
+def parse_importtime(output):
+    '''
+    Function to read the lines python -X importtime writes to stderr
+    Input arguments: stderr of the interpreter
+    Returns list of (cumulative microseconds, self microseconds, indented module name)
+    '''
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def import_app(environment):
+    '''
+    Function to import the app in a fresh interpreter with -X importtime
+    Input arguments: dictionairy of environment variables to set
+    Returns list of the rows of the import time report
+    '''
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT_DIR,
+                            env={**os.environ, **environment}, capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def app_row_of(rows):
+    '''
+    Function to find the row of the app module in an import time report
+    Input arguments: list of the rows of the report
+    Returns the row of the app
+    '''
+    return next(row for row in rows if row[2].strip() == 'app')
+
+
+def main():
+    lines = ['Import time of the app, from python -X importtime -c "import app"',
+             'The time of the app module includes running the pages, which dash imports when the app is created.',
+             'python -X importtime adds its own time to every module, so the times are longer than the import times of',
+             'benchmarks/run.py, which are the ones compared with benchmarks/baselines.json.',
+             'Regenerate with: python benchmarks/import_report.py', '']
+    for _, environment in MODES:
+        import_app(environment)  # the first import fills the caches under .cache
+    # the modes are imported in turn, so a busy machine slows both of them alike
+    runs = [[] for _ in MODES]
+    for _ in range(REPEAT):
+        for (_, environment), mode_runs in zip(MODES, runs):
+            mode_runs.append(import_app(environment))
+
+    for (title, _), mode_runs in zip(MODES, runs):
+        rows = sorted(mode_runs, key=lambda rows: app_row_of(rows)[0])[len(mode_runs) // 2]
+        app_row = app_row_of(rows)
+        lines.append(f'## {title}: {app_row[0] / 1000:.0f} ms to import app (median of {REPEAT} imports)')
+        lines.append(f'{"cumulative (ms)":>15} {"self (ms)":>10}  module')
+        for cumulative_us, self_us, name in sorted(rows, reverse=True)[:TOP_MODULES]:
+            lines.append(f'{cumulative_us / 1000:15.1f} {self_us / 1000:10.1f}  {name}')
+        lines.append('')
+
+    with open(REPORT_PATH, 'w') as f:
+        f.write('\n'.join(lines))
+    print('\n'.join(lines))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# report of the time and memory taken to open a panel of indicators the size of the World Bank development
+# indicators and to pick indicators from it, compared with the memory of holding the whole panel in one dataframe
+# run from the root of the repository with: python benchmarks/indicator_panel.py (Linux only, it reads /proc)
+# the panel is written to a temporary folder with random values, --indicators, --countries and --years change its size
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dashboard.aggregation import top_k_shares
+from dashboard.indicators import open_panel, write_panel
+
+
+def memory_mb():
+    '''
+    Function to read the resident and private memory of the current process
+    Returns (resident MB, private MB)
+    '''
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Rss'] / 1024, (fields['Private_Clean'] + fields['Private_Dirty']) / 1024
+
+
+def synthetic_panel(directory, indicators, countries, years):
+    '''
+    Function to write a panel of random indicators, with a tenth of the values missing
+    Input arguments: folder to write to, number of indicators, countries and years
+    Returns the names of the indicators
+    '''
+    rng = np.random.default_rng(0)
+    names = [f'Country {i}' for i in range(countries)]
+    keys = pd.DataFrame({
+        'Year': np.repeat(np.arange(1960, 1960 + years), countries),
+        'Country': np.tile(names, years),
+        'Code': np.tile([f'C{i:03d}' for i in range(countries)], years),
+    })
+
+    def values():
+        for i in range(indicators):
+            column = rng.lognormal(10, 2, len(keys))
+            column[rng.random(len(keys)) < 0.1] = np.nan
+            yield f'Indicator {i}', column
+
+    return write_panel(directory, keys, values(), {'sha256': '0' * 64}, ['Country', 'Code'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Opening a large panel of indicators and picking indicators from it')
+    parser.add_argument('--indicators', type=int, default=1500, help='indicators in the panel')
+    parser.add_argument('--countries', type=int, default=266, help='countries in the panel')
+    parser.add_argument('--years', type=int, default=64, help='years in the panel')
+    parser.add_argument('--picked', type=int, default=10, help='indicators picked one after the other')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        names = synthetic_panel(directory, args.indicators, args.countries, args.years)
+        rows = args.countries * args.years
+        print(f'{len(names):,} indicators, {rows:,} rows, written in {time.perf_counter() - start:.1f} s')
+        print(f'one dataframe of every indicator would take {rows * len(names) * 8 / 2 ** 20:,.0f} MB\n')
+
+        print(f'{"step":<34} {"time (ms)":>10} {"resident MB":>12} {"private MB":>11}')
+        base_resident, base_private = memory_mb()
+
+        def report(step, seconds):
+            resident, private = memory_mb()
+            print(f'{step:<34} {seconds * 1000:10.1f} {resident - base_resident:12.1f} {private - base_private:11.1f}')
+
+        start = time.perf_counter()
+        panel = open_panel(directory)
+        report('open the panel (keys only)', time.perf_counter() - start)
+
+        rng = np.random.default_rng(1)
+        for i, name in enumerate(rng.choice(names, args.picked, replace=False), 1):
+            start = time.perf_counter()
+            frame = panel.frame([name])
+            top_k_shares(frame, name, 5)
+            report(f'pick indicator {i} and rank it', time.perf_counter() - start)
+        print(f'\nindicators loaded: {len(panel.loaded)} of {len(panel.names):,}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# local load test of the production server, run from the root of the repository with: python benchmarks/load_test.py
+# gunicorn is started with 1, 2 and 4 workers in turn (--workers) and each is sent the year slider callbacks of
+# Page 1 and Page 3 for random years from several client processes, reporting the requests per second and latency
+# the payload store is switched off so every request runs its callback, and the clients share the machine with the
+# server, so the scaling is only meaningful on a machine with more cores than workers
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the slider callbacks, as the browser sends them after the first render, with the metric selected on the page
+CALLBACKS = [
+    (['world-map', 'world-map-with-population', 'gdp-bar-chart', 'gdp-pie-chart'], 'year-slider', ('page1-metric', 'GDP (USD)')),
+    (['gdp-per-capita-graph', 'histogram-chart', 'bar-chart'], 'year-slider-page-three', ('page3-metric', 'GDP per Capita')),
+]
+YEARS = range(2000, 2023)
+
+
+def callback_body(outputs, input_id, metric, year):
+    '''
+    Function to build the request body of a slider callback
+    Input arguments: list of the ids of the graphs updated, id of the slider, (id, value) of the metric selector, year
+    Returns the body as bytes
+    '''
+    return json.dumps({
+        'output': '..' + '...'.join(f'{output}.figure' for output in outputs) + '..',
+        'outputs': [{'id': output, 'property': 'figure'} for output in outputs],
+        'inputs': [{'id': input_id, 'property': 'value', 'value': year},
+                   {'id': metric[0], 'property': 'value', 'value': metric[1]}],
+        'changedPropIds': [f'{input_id}.value'],
+        'state': [],
+    }).encode()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, workers, threads):
+    '''
+    Function to start gunicorn and wait until it answers
+    Input arguments: port, number of workers, number of threads in each worker
+    Returns the server process
+    '''
+    environment = {**os.environ, 'DASHBOARD_BIND': f'127.0.0.1:{port}', 'DASHBOARD_WORKERS': str(workers),
+                   'DASHBOARD_THREADS': str(threads), 'DASHBOARD_PAYLOAD_STORE': '0', 'DASHBOARD_METRICS': '0'}
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:server'], cwd=ROOT_DIR,
+                              env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/_dash-layout', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.5)
+    server.kill()
+    raise RuntimeError('the server did not start')
+
+
+def client(arguments):
+    '''
+    Function run by each client process, sending callbacks one after the other until the time is up
+    Input arguments: tuple of the port and the number of seconds to run for
+    Returns list of the latencies in seconds
+    '''
+    port, duration = arguments
+    url = f'http://127.0.0.1:{port}/_dash-update-component'
+    latencies = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        outputs, input_id, metric = random.choice(CALLBACKS)
+        request = urllib.request.Request(url, data=callback_body(outputs, input_id, metric, random.choice(YEARS)),
+                                         headers={'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'})
+        start = time.perf_counter()
+        with urllib.request.urlopen(request) as response:
+            response.read()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test of the dashboard running under gunicorn')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='worker counts to test')
+    parser.add_argument('--threads', type=int, default=1, help='threads in each worker')
+    parser.add_argument('--clients', type=int, default=8, help='client processes sending requests')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load for each worker count')
+    args = parser.parse_args()
+
+    print(f'{os.cpu_count()} cores, {args.clients} clients, {args.threads} thread(s) per worker')
+    print(f'{"workers":>8} {"requests/s":>11} {"p50 (ms)":>9} {"p95 (ms)":>9} {"speed up":>9}')
+    first = None
+    for workers in args.workers:
+        port = free_port()
+        server = start_server(port, workers, args.threads)
+        try:
+            client((port, 1))  # warming up the workers
+            with multiprocessing.Pool(args.clients) as pool:
+                results = pool.map(client, [(port, args.duration)] * args.clients)
+        finally:
+            server.terminate()
+            server.wait()
+        latencies = sorted(latency for latencies in results for latency in latencies)
+        throughput = len(latencies) / args.duration
+        first = first or throughput
+        print(f'{workers:8} {throughput:11.1f} {statistics.median(latencies) * 1000:9.1f} '
+              f'{latencies[int(len(latencies) * 0.95)] * 1000:9.1f} {throughput / first:8.2f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# report of the size and complexity of the figures drawn with each render profile (DASHBOARD_RENDER_PROFILE)
+# run from the root of the repository with: python benchmarks/render_profiles.py
+# every profile is measured in a fresh interpreter, as the figure skeletons are built when the pages are imported
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES = ['full', 'lite']
+
+# measuring the figures of every year in one interpreter, printing the averages as JSON
+MEASURE_SCRIPT = '''
+import base64, gzip, json, sys
+import app
+from dash._utils import to_json
+from dashboard.data import year_index
+from pages import page1, page3
+
+def length(values):
+    # typed arrays are sent as base64 bytes, so their length is found from the size of their type
+    if isinstance(values, dict):
+        return len(base64.b64decode(values['bdata'])) // int(values['dtype'][1])
+    return len(values)
+
+def measure(figure):
+    # the layers drawn on a globe, switched on in the template or in the layout
+    geo = {**figure['layout']['template']['layout'].get('geo', {}), **figure['layout'].get('geo', {})} if 'geo' in figure['layout'] else {}
+    return {
+        'json bytes': len(to_json(figure)),
+        'gzip bytes': len(gzip.compress(to_json(figure).encode(), mtime=0)),
+        'traces': len(figure['data']),
+        'points': sum(length(trace.get('locations') or trace.get('x') or trace.get('values') or []) for trace in figure['data']),
+        'geo layers': sum(1 for key, value in geo.items() if key.startswith('show') and key != 'showframe' and value),
+        'border width': figure['data'][0].get('marker', {}).get('line', {}).get('width', 0) if 'geo' in figure['layout'] else 0,
+    }
+
+names = ['page1 map', 'page1 map with population', 'page1 bar', 'page1 pie', 'page3 map', 'page3 histogram', 'page3 bar']
+totals = {}
+for year in year_index:
+    figures = list(page1.update_charts.__wrapped__(year)) + list(page3.update_charts(year))
+    for name, figure in zip(names, figures):
+        for key, value in measure(figure).items():
+            totals.setdefault(name, {}).setdefault(key, 0)
+            totals[name][key] += value / len(year_index)
+print(json.dumps(totals))
+'''
+
+
+def measure_profile(profile):
+    '''
+    Function to measure the figures of pages 1 and 3 drawn with a render profile, in a fresh interpreter
+    Input arguments: name of the profile
+    Returns dictionairy of figure name to a dictionairy of its measurements, averaged over every year
+    '''
+    result = subprocess.run([sys.executable, '-c', MEASURE_SCRIPT], cwd=ROOT_DIR,
+                            env={**os.environ, 'DASHBOARD_RENDER_PROFILE': profile},
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    results = {profile: measure_profile(profile) for profile in PROFILES}
+    columns = ['json bytes', 'gzip bytes', 'traces', 'points', 'geo layers', 'border width']
+    print(f'{"figure":<28} {"profile":<8}' + ''.join(f'{column:>14}' for column in columns))
+    for name in results[PROFILES[0]]:
+        for profile in PROFILES:
+            print(f'{name:<28} {profile:<8}' + ''.join(f'{results[profile][name][column]:14,.1f}' if column == 'border width'
+                                                         else f'{results[profile][name][column]:14,.0f}' for column in columns))
+    for profile in PROFILES:
+        total = sum(measurements['json bytes'] for measurements in results[profile].values())
+        total_gzip = sum(measurements['gzip bytes'] for measurements in results[profile].values())
+        print(f'total {profile}: {total:,.0f} bytes of figure JSON per year, {total_gzip:,.0f} gzipped')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# benchmark suite for the dashboard, run from the root of the repository with: python benchmarks/run.py
+# the timings are compared with the baselines in benchmarks/baselines.json, and the run fails when a case is slower
+# than its baseline by more than the threshold, or faster by more than the stale threshold (the baseline no longer
+# guards the speed of the case, as a slow down back to it would pass). After a change making the dashboard faster or
+# slower on purpose, or on a new machine, record new baselines in the same commit with: python benchmarks/run.py --save
+# everything runs offline against the dataset in the repository
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT_DIR, 'benchmarks', 'baselines.json')
+PAGES = ['pages.page1', 'pages.page2', 'pages.page3']
+
+# importing a page in a fresh interpreter, with an app that has no pages of its own so register_page works
+IMPORT_SCRIPT = '''
+import importlib, sys, tempfile, time
+import dash
+dash.Dash(__name__, use_pages=True, pages_folder=tempfile.mkdtemp())
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(time.perf_counter() - start)
+'''
+
+APP_IMPORT_SCRIPT = '''
+import time
+start = time.perf_counter()
+import app
+print(time.perf_counter() - start)
+'''
+
+
+def median_time(func, repeat):
+    '''
+    Function to time a function
+    Input arguments: function to call without arguments, number of times to call it
+    Returns the median time of a call in seconds
+    '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def import_time(module, repeat):
+    '''
+    Function to time the import of a page in a fresh interpreter, including the modules it loads
+    Input arguments: name of the module, number of interpreters to start
+    Returns the median import time in seconds
+    '''
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT, module], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True)
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def app_import_times(environments, repeat):
+    '''
+    Function to time the import of the app, and with it every page, in a fresh interpreter for each set of environment
+    variables. The interpreters of the different sets are started in turn, so a busy machine slows all of them alike
+    and the times can be compared with each other
+    Input arguments: list of dictionairies of environment variables to set, number of interpreters to start for each
+    Returns list of the median import times in seconds, in the order of the environments
+    '''
+    times = [[] for _ in environments]
+    for _ in range(repeat):
+        for environment, environment_times in zip(environments, times):
+            result = subprocess.run([sys.executable, '-c', APP_IMPORT_SCRIPT], cwd=ROOT_DIR,
+                                    env={**os.environ, **environment}, capture_output=True, text=True, check=True)
+            environment_times.append(float(result.stdout.strip().splitlines()[-1]))
+    return [statistics.median(environment_times) for environment_times in times]
+
+
+def every_year(func, years):
+    '''
+    Function to make a function that calls a callback for every year
+    '''
+    def run():
+        for year in years:
+            func(year)
+    return run
+
+
+def run_benchmarks(repeat):
+    '''
+    Function to run every benchmark case
+    Input arguments: number of repeats of each case
+    Returns dictionairy of case name to the median time in seconds
+    '''
+    sys.path.insert(0, ROOT_DIR)
+    os.chdir(ROOT_DIR)
+
+    results = {}
+    for module in PAGES:
+        results[f'import {module}'] = import_time(module, max(3, repeat // 2))
+    results['import app'], results['import app (lazy pages)'] = app_import_times(
+        [{'DASHBOARD_LAZY_PAGES': '0'}, {'DASHBOARD_LAZY_PAGES': '1'}], max(3, repeat // 2))
+
+    # the app imports every page, the caches are bypassed so each call builds the figures
+    import app
+    from dash._utils import to_json
+    from dashboard.data import year_index
+    page1 = importlib.import_module('pages.page1')
+    page3 = importlib.import_module('pages.page3')
+    years = [int(year) for year in year_index]
+
+    results['page1.update_charts every year'] = median_time(every_year(page1.update_charts.__wrapped__, years), repeat)
+    results['page3.update_charts every year'] = median_time(every_year(page3.update_charts, years), repeat)
+
+    page2 = importlib.import_module('pages.page2')
+    results['page2 figures'] = median_time(page2.build_figures, repeat)
+
+    # serializing the layout of the app and of each page, as sent to the browser on the first visit
+    page_layouts = [sys.modules[module].layout for module in PAGES]
+    results['layout serialization'] = median_time(
+        lambda: [to_json(layout() if callable(layout) else layout) for layout in [app.app.layout] + page_layouts], repeat)
+
+    # the first requests of a visit, through the flask app
+    client = app.app.server.test_client()
+    results['GET /'] = median_time(lambda: client.get('/'), repeat)
+    results['GET /_dash-layout'] = median_time(lambda: client.get('/_dash-layout'), repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks of the dashboard callbacks, imports and layouts')
+    parser.add_argument('--repeat', type=int, default=5, help='number of times each case is run')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slow down compared with the baseline, as a fraction')
+    parser.add_argument('--stale-threshold', type=float, default=0.5,
+                        help='speed up compared with the baseline, as a fraction, above which the baseline is stale')
+    parser.add_argument('--save', action='store_true', help='record the timings as the new baselines')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.repeat)
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+
+    failed = []
+    stale = []
+    print(f'{"case":<36} {"time (ms)":>10} {"baseline (ms)":>14} {"change":>8}')
+    for name, seconds in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            print(f'{name:<36} {seconds * 1000:10.1f} {"-":>14} {"-":>8}')
+            continue
+        change = seconds / baseline - 1
+        if change > args.threshold:
+            failed.append(name)
+        elif change < -args.stale_threshold:
+            stale.append(name)
+        flag = '  SLOWER' if name in failed else '  STALE BASELINE' if name in stale else ''
+        print(f'{name:<36} {seconds * 1000:10.1f} {baseline * 1000:14.1f} {change:+8.0%}' + flag)
+
+    if args.save:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f'saved baselines to {os.path.relpath(BASELINE_PATH, ROOT_DIR)}')
+        return 0
+    if failed:
+        print(f'{len(failed)} case(s) slower than the baseline by more than {args.threshold:.0%}')
+    if stale:
+        print(f'{len(stale)} case(s) faster than the baseline by more than {args.stale_threshold:.0%}, '
+              'record new baselines with --save')
+    return 1 if failed or stale else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# report of the memory taken by the dataset in each worker process, with the columns mapped from the column store
+# compared with each worker holding its own copy, for the dataset as it is and grown to about a million rows
+# run from the root of the repository with: python benchmarks/shared_memory.py (Linux only, it reads /proc)
+# the memory is measured as the private memory of each worker (USS), which grows with every worker started, and
+# the proportional share of the shared memory (PSS), whose total stays the same however many workers share it
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dashboard.data import STRING_COLUMNS, df
+from dashboard.store import open_store, write_store
+
+WORKERS = [1, 2, 4]
+# how many times the rows of the dataset are repeated
+SIZES = [1, 800]
+
+
+def memory_kb():
+    '''
+    Function to read the private and proportional memory of the current process
+    Returns (private kB, proportional kB)
+    '''
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Private_Clean'] + fields['Private_Dirty'], fields['Pss']
+
+
+def touch(frame):
+    # reading every value in place, as the callbacks do over time
+    return sum(float(np.nansum(frame[column].array.codes if column in STRING_COLUMNS else frame[column].to_numpy()))
+               for column in frame.columns)
+
+
+def worker(path, mode, ready, results):
+    '''
+    Function run in each worker process, loading the dataset, reading all of it and reporting its memory
+    '''
+    before = memory_kb()
+    if mode == 'mapped':
+        frame, _ = open_store(path)
+    else:
+        # each worker holding its own copy of the same columns, as when every process read the dataset into memory
+        frame, _ = open_store(path)
+        frame = frame.copy(deep=True)
+    touch(frame)
+    after = memory_kb()
+    results.put((after[0] - before[0], after[1] - before[1]))
+    ready.wait()
+
+
+def measure(path, mode, workers):
+    '''
+    Function to start worker processes loading the dataset and total their memory
+    Returns (total private MB, total proportional MB)
+    '''
+    context = multiprocessing.get_context('fork')
+    ready = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(path, mode, ready, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    ready.set()
+    for process in processes:
+        process.join()
+    return sum(private for private, _ in measured) / 1024, sum(proportional for _, proportional in measured) / 1024
+
+
+def main():
+    print(f'{"rows":>10} {"mode":<8} {"workers":>8} {"private MB":>11} {"proportional MB":>16}')
+    with tempfile.TemporaryDirectory() as directory:
+        for repeats in SIZES:
+            path = os.path.join(directory, f'dataset-{repeats}.col')
+            grown = pd.concat([df] * repeats, ignore_index=True) if repeats > 1 else df
+            write_store(grown, path, {}, STRING_COLUMNS)
+            for mode in ('mapped', 'copied'):
+                for workers in WORKERS:
+                    private, proportional = measure(path, mode, workers)
+                    print(f'{len(grown):10,} {mode:<8} {workers:8} {private:11.1f} {proportional:16.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
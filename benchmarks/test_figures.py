@@ -0,0 +1,31 @@
+# tests that the figures the callbacks assemble as dictionairies match the reference figures built the way the
+# callbacks used to build them (plotly express and the per pixel recolouring of the insets), for every year
+# run from the root of the repository with: python -m pytest benchmarks
+import pytest
+
+import check_figures
+from check_figures import legacy_page1, legacy_page3, mismatched_years, page1, page3, year_index
+
+YEARS = [int(year) for year in year_index]
+
+
+@pytest.mark.parametrize('year', YEARS)
+def test_page1_matches_reference(year):
+    # bypassing the figure cache, so the figures are built for the test
+    assert mismatched_years(legacy_page1, page1.update_charts.__wrapped__, [year]) == []
+
+
+@pytest.mark.parametrize('year', YEARS)
+def test_page3_matches_reference(year):
+    assert mismatched_years(legacy_page3, page3.update_charts, [year]) == []
+
+
+def test_reference_insets_differ_by_colour():
+    # the comparison of the insets is done on their pixels, so a change of one shade must show up as a mismatch
+    legacy_colour = check_figures.legacy_colour
+    try:
+        check_figures.legacy_colour = lambda filtered_df, country: tuple(
+            value + 1 if value < 255 else value - 1 for value in legacy_colour(filtered_df, country))
+        assert mismatched_years(legacy_page3, page3.update_charts, [YEARS[0]]) == [YEARS[0]]
+    finally:
+        check_figures.legacy_colour = legacy_colour
@@ -0,0 +1,130 @@
+# report of the bytes sent to the browser for the first visit of each page, without compression, with gzip and with
+# brotli (when installed), and for a repeat visit where the browser sends back the ETags it was given
+# the last column is a single move of each slider after the first render, answered with patches of the figures
+# run from the root of the repository with: python benchmarks/wire_bytes.py
+# the sizes are of the response bodies only, as the requests go through the flask test client
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dash
+import app
+from dashboard.compression import compressor
+
+ENCODINGS = ['identity'] + list(reversed(compressor.encodings()))
+
+
+def parse_outputs(output):
+    '''
+    Function to turn the output string of a callback into the outputs the browser sends with the request
+    Input arguments: output string such as '..map.figure...bar.figure..' or 'map.figure'
+    Returns list of dictionairies for a callback with several outputs, or a single dictionairy
+    '''
+    def split(item):
+        component_id, prop = item.rsplit('.', 1)
+        return {'id': component_id, 'property': prop}
+    if output.startswith('..'):
+        return [split(item) for item in output[2:-2].split('...')]
+    return split(output)
+
+
+def component_props(tree, props=None):
+    '''
+    Function to find the props of every component with an id in a layout sent as JSON
+    Input arguments: layout as decoded JSON
+    Returns dictionairy of component id to its props
+    '''
+    props = {} if props is None else props
+    if isinstance(tree, list):
+        for item in tree:
+            component_props(item, props)
+    elif isinstance(tree, dict) and 'props' in tree:
+        if isinstance(tree['props'].get('id'), str):
+            props[tree['props']['id']] = tree['props']
+        component_props(list(tree['props'].values()), props)
+    elif isinstance(tree, dict):
+        component_props(list(tree.values()), props)
+    return props
+
+
+def callback_request(dependency, props, changed=()):
+    '''
+    Function to build the request the browser sends to run a callback, when its page is first rendered or after
+    the inputs in changed were changed by the user
+    '''
+    def values(items):
+        return [dict(item, value=props[item['id']].get(item['property'])) for item in items]
+    return {'output': dependency['output'], 'outputs': parse_outputs(dependency['output']),
+            'inputs': values(dependency['inputs']), 'state': values(dependency['state']), 'changedPropIds': list(changed)}
+
+
+def visit(client, path, encoding, etags):
+    '''
+    Function to make the requests of a first visit of a page
+    Input arguments: flask test client, path of the page, accepted encoding, dictionairy of the ETags the browser has
+    (filled in by the visit)
+    Returns dictionairy of the kind of request to the bytes received
+    '''
+    sizes = {}
+
+    def get(kind, url):
+        headers = {'Accept-Encoding': encoding}
+        if url in etags:
+            headers['If-None-Match'] = etags[url]
+        response = client.get(url, headers=headers)
+        if 'ETag' in response.headers:
+            etags[url] = response.headers['ETag']
+        sizes[kind] = sizes.get(kind, 0) + len(response.data)
+
+    def post(kind, body):
+        response = client.post('/_dash-update-component', json=body, headers={'Accept-Encoding': encoding})
+        sizes[kind] = sizes.get(kind, 0) + len(response.data)
+
+    # the responses are read again uncompressed to find the next requests, as a repeat visit gets empty 304s
+    get('index', path)
+    for url in re.findall(r'<script src="(/[^"]+)"', client.get(path).get_data(as_text=True)):
+        get('bundles', url)
+    get('layout', '/_dash-layout')
+    get('layout', '/_dash-dependencies')
+    dependencies = client.get('/_dash-dependencies').get_json()
+
+    # the page content comes from the routing callback of dash pages
+    routing = next(dependency for dependency in dependencies if '_pages_content' in dependency['output'])
+    location = {'_pages_location': {'pathname': path, 'search': ''}}
+    post('page content', callback_request(routing, location))
+    content = client.post('/_dash-update-component', json=callback_request(routing, location)).get_json()
+    props = component_props(content['response'])
+
+    # then every server callback of the page runs once for the first render
+    for dependency in dependencies:
+        if dependency is routing or dependency.get('clientside_function'):
+            continue
+        if all(item['id'] in props for item in dependency['inputs'] + dependency['state']):
+            post('callbacks', callback_request(dependency, props))
+            slider = next((item for item in dependency['inputs'] if item['property'] == 'value'), None)
+            if slider is not None:
+                post('slider move', callback_request(dependency, props, ['{}.{}'.format(slider['id'], slider['property'])]))
+    return sizes
+
+
+def main():
+    client = app.app.server.test_client()
+    kinds = ['index', 'bundles', 'layout', 'page content', 'callbacks', 'slider move']
+    print(f'{"page":<8} {"encoding":<14}' + ''.join(f'{kind:>14}' for kind in kinds) + f'{"visit total":>14}')
+    for page in dash.page_registry.values():
+        path = page['relative_path']
+        rows = [(encoding, visit(client, path, encoding, {})) for encoding in ENCODINGS]
+        # a repeat visit with the best encoding, sending back the ETags of the first one
+        etags = {}
+        visit(client, path, ENCODINGS[-1], etags)
+        rows.append((ENCODINGS[-1] + ' + ETags', visit(client, path, ENCODINGS[-1], etags)))
+        for encoding, sizes in rows:
+            print(f'{path:<8} {encoding:<14}' + ''.join(f'{sizes.get(kind, 0):14,}' for kind in kinds)
+                  + f'{sum(sizes.get(kind, 0) for kind in kinds[:-1]):14,}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+# shared modules used by the pages of the dashboard
@@ -0,0 +1,73 @@
+'''
+The largest k economies of each year and the rest grouped into 'Other', shared by the pie and bar charts.
+
+The pages used to sort each year, relabel the smaller economies through .loc, group every column (strings too)
+and loop over the rows with iterrows. Here the rows of every year are ranked in one pass over the whole frame,
+and the totals of the top k and of 'Other' are summed with a single groupby, once for each metric and k.
+'''
+import numpy as np
+import pandas as pd
+
+from dashboard import data
+from dashboard.cache import versioned_cache
+
+OTHER_LABEL = 'Other'
+
+
+def ranked_positions(df, column):
+    '''
+    Function to order the rows of each year by a column, largest first, in one pass over the panel
+    Missing values are placed last within their year
+    Input arguments: dataframe sorted by year, column to rank by
+    Returns an array of row positions, where each year's block of positions is sorted by the column
+    '''
+    values = df[column].to_numpy(dtype=float)
+    values = np.where(np.isnan(values), -np.inf, values)
+    return np.lexsort((-values, df['Year'].to_numpy()))
+
+
+def top_k_shares(df, column, k=5, extra_columns=(), other_label=OTHER_LABEL):
+    '''
+    Function to find the k largest values of a column in every year, grouping the other rows of the year together
+    Rows with a missing value are never in the top k, and add nothing to the totals, like nlargest and groupby sum
+    Input arguments: dataframe with Year and Country columns, column to rank by, number of rows to keep apart,
+    other columns to total alongside, label given to the grouped rows
+    Returns dictionairy of year to a dictionairy with
+        'top': the k largest rows of the year, largest first
+        'shares': the top k countries and the 'Other' total of the column and the extra columns, ordered by label
+    '''
+    years = df['Year'].to_numpy()
+    values = df[column].to_numpy(dtype=float)
+
+    # the position of each row within its year once the rows are ranked, ties keep their order in the frame
+    order = ranked_positions(df, column)
+    sorted_years = years[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_years[1:] != sorted_years[:-1]])
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(order)]))
+
+    in_top = (rank < k) & ~np.isnan(values)
+    labels = np.where(in_top, df['Country'].to_numpy(dtype=object), other_label)
+
+    # one groupby over every year, the labels are sorted within each year like a groupby on a single year
+    # the rows are summed largest first, the order the pages used to sum them in, so the totals are the same
+    totals = pd.DataFrame({'Year': years[order], 'Country': labels[order], column: df[column].to_numpy()[order],
+                           **{extra: df[extra].to_numpy()[order] for extra in extra_columns}})
+    totals = totals.groupby(['Year', 'Country'], sort=True).sum().reset_index()
+
+    top_rows = df.iloc[order[in_top[order]]]
+    return {int(year): {'top': top_rows[top_rows['Year'].to_numpy() == year],
+                        'shares': shares.drop(columns='Year').reset_index(drop=True)}
+            for year, shares in totals.groupby('Year', sort=True)}
+
+
+# a panel can hold thousands of indicators, so only the shares of the recently picked ones are kept
+# keyed by the dataset version too, the shares of an old version are evicted as new ones are computed
+@versioned_cache(maxsize=64)
+def top_shares(column, k=5, extra_columns=()):
+    '''
+    Function to get the top k shares of the shared dataset, computed once for each version, column, k and extra columns
+    Input arguments: indicator to rank by, number of rows to keep apart, tuple of other indicators to total alongside
+    Returns dictionairy of year to the 'top' and 'shares' dataframes, see top_k_shares
+    '''
+    return top_k_shares(data.indicator_frame((column,) + tuple(extra_columns)), column, k, extra_columns)
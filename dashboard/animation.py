@@ -0,0 +1,132 @@
+# building animated figures, with one frame per year, so the year can be played back in the browser
+# the frames are assembled as dictionairies from the year blocks, without validating a go object for each of them
+import numpy as np
+from dash import dcc, html
+
+from dashboard.aggregation import ranked_positions
+from dashboard.figures import bubble_customdata, choropleth_customdata, typed_array
+
+# length of each frame of the animation in milliseconds
+FRAME_DURATION = 700
+
+# the graphs played back together, and how plotly.js moves between their frames
+ANIMATED_GRAPHS = ['world-map', 'world-map-with-population', 'gdp-bar-chart', 'gdp-pie-chart']
+FRAME_ARGS = {'frame': {'duration': FRAME_DURATION, 'redraw': True}, 'transition': {'duration': 0}, 'mode': 'immediate'}
+
+
+def animation_controls(duration=FRAME_DURATION):
+    '''
+    Function to create the play/pause button shared by every chart of the page, it moves the year slider on a timer
+    and every chart follows the slider in the browser (see animatePage1 and showPage1Frame in assets/clientside.js)
+    Input arguments: frame duration in milliseconds
+    Returns a list of components
+    '''
+    return [
+        html.Button('Play', id='page1-play', n_clicks=0, style={'marginLeft': '20px', 'marginBottom': '5px'}),
+        dcc.Interval(id='page1-animation-interval', interval=duration, disabled=True),
+        # the graphs and the frame arguments, read in the browser, and the year of the frame being shown
+        dcc.Store(id='page1-animation', data={'graphs': ANIMATED_GRAPHS, 'frame_args': FRAME_ARGS}),
+        dcc.Store(id='page1-animation-frame'),
+    ]
+
+
+def year_blocks(year_index):
+    '''
+    Function to list the years and their row blocks in order
+    Input arguments: dictionairy of year to (start, stop) row positions
+    Returns a list of (year, start, stop)
+    '''
+    return [(year, start, stop) for year, (start, stop) in sorted(year_index.items())]
+
+
+def with_frames(figure, frames):
+    '''
+    Function to add frames to a figure without changing the figure, which may be shared with the figure cache
+    Input arguments: dictionairy of the figure, list of frame dictionairies
+    Returns a new dictionairy of the figure
+    '''
+    return {**figure, 'frames': frames}
+
+
+def add_gdp_map_frames(map_fig, df, year_index, with_population=False):
+    '''
+    Function to add a frame per year to a GDP choropleth (and optionally its population bubbles)
+    Input arguments: dictionairy of the figure built for the first year, dataframe sorted by year, year index,
+    whether the second trace is the population bubble layer
+    Returns the figure with the frames
+    '''
+    # computing every column once for the whole panel, each frame is then a slice of these arrays
+    codes = df['Code'].to_numpy(dtype=object)
+    countries = df['Country'].to_numpy(dtype=object)
+    gdp = df['GDP (USD)'].to_numpy(dtype=float)
+    population = df['Population'].to_numpy()
+    log_gdp = np.log(gdp)
+    # the hover data has the same form as in the figure of the first year, which depends on the render profile
+    map_customdata = choropleth_customdata(gdp, codes)
+    population_customdata = bubble_customdata(codes, gdp, population)
+
+    # object arrays (codes, names and the hover rows of the full profile) are sent as lists, numbers as typed arrays
+    def encode(values):
+        return values.tolist() if values.dtype == object else typed_array(values)
+
+    frames = []
+    for year, start, stop in year_blocks(year_index):
+        block = slice(start, stop)
+        data = [{'type': 'choropleth', 'locations': codes[block].tolist(), 'z': typed_array(log_gdp[block]),
+                 'hovertext': countries[block].tolist(), 'customdata': encode(map_customdata[block])}]
+        traces = [0]
+        if with_population:
+            data.append({'type': 'scattergeo', 'locations': codes[block].tolist(), 'hovertext': countries[block].tolist(),
+                         'customdata': encode(population_customdata[block]),
+                         'marker': {'size': typed_array(population[block]),
+                                    'sizeref': float(population[block].max()) / (20 ** 2)}})
+            traces.append(1)
+        frames.append({'name': str(year), 'data': data, 'traces': traces})
+    return with_frames(map_fig, frames)
+
+
+def add_top_five_bar_frames(bar_fig, df, year_index, country_colours):
+    '''
+    Function to add a frame per year to the bar chart of the five largest economies
+    Input arguments: dictionairy of the bar chart built for the first year (one trace per country), dataframe sorted
+    by year, year index, dictionairy of country colours
+    Returns the figure with the frames
+    '''
+    order = ranked_positions(df, 'GDP (USD)')
+    countries = df['Country'].to_numpy(dtype=object)
+    gdp = df['GDP (USD)'].to_numpy(dtype=float)
+    population = df['Population'].to_numpy()
+
+    frames = []
+    for year, start, stop in year_blocks(year_index):
+        top_five = order[start:min(start + 5, stop)]
+        data = []
+        for i in top_five:
+            trace = {'type': 'bar', 'name': countries[i], 'legendgroup': countries[i], 'x': [countries[i]],
+                     'y': [float(gdp[i])], 'customdata': [[int(population[i])]]}
+            # a country without a colour of its own keeps the colour of the bar
+            if countries[i] in country_colours:
+                trace['marker'] = {'color': country_colours[countries[i]]}
+            data.append(trace)
+        frames.append({
+            'name': str(year),
+            'data': data,
+            'traces': list(range(len(data))),
+            'layout': {'title': {'text': f'<b>Largest 5 African Economies in {year}</b>'},
+                       'xaxis': {'categoryarray': countries[top_five].tolist()}},
+        })
+    return with_frames(bar_fig, frames)
+
+
+def add_pie_frames(pie_fig, year_figures):
+    '''
+    Function to add a frame per year to the pie chart, taken from the pie chart built on the server for each year
+    Input arguments: dictionairy of the pie chart built for the first year, dictionairy of year to the pie chart of
+    that year
+    Returns the figure with the frames
+    '''
+    # the annotation of the pie chart is only shown in some years, so the other frames clear it
+    frames = [{'name': str(year), 'data': figure['data'], 'traces': [0],
+               'layout': {'title': figure['layout']['title'], 'annotations': figure['layout'].get('annotations', [])}}
+              for year, figure in sorted(year_figures.items())]
+    return with_frames(pie_fig, frames)
@@ -0,0 +1,134 @@
+# importing libraries
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+from dashboard import config
+from dashboard.data import current_data
+
+
+def figures_size(figures):
+    '''
+    Function to estimate the memory taken by a set of figures through the size of their JSON
+    Input arguments: a figure or a tuple/list of figures
+    Returns the size in bytes
+    '''
+    if not isinstance(figures, (tuple, list)):
+        figures = [figures]
+    return sum(len(pio.to_json(figure, validate=False)) for figure in figures)
+
+
+class FigureCache:
+    '''
+    A least recently used cache for figures (or any value of a known size, such as the stored payloads) with a limit
+    on the total number of bytes held
+    '''
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        '''
+        Function to look up a key, marking it as the most recently used
+        Input arguments: key
+        Returns the cached value, or None if it is not in the cache
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes):
+        '''
+        Function to add a value to the cache, evicting the least recently used entries to stay within the byte budget
+        Values larger than the whole budget are not cached
+        Input arguments: key, value, size of the value in bytes
+        '''
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def memoize(self, page):
+        '''
+        Decorator to cache the figures returned by a callback, keyed by page, dataset version and the callback inputs
+        The version is read on every call, so after a new version is swapped in the entries of the old one are no
+        longer used and are evicted as the cache fills
+        Arguments left to their defaults are filled in, so update_charts(2000) and update_charts(2000, 'GDP (USD)')
+        share an entry
+        Input arguments: name of the page, used to keep the keys of different callbacks apart
+        Returns the decorator
+        '''
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args):
+                bound = signature.bind(*args)
+                bound.apply_defaults()
+                key = (page, current_data().version) + bound.args
+                figures = self.get(key)
+                if figures is None:
+                    figures = func(*args)
+                    self.put(key, figures, figures_size(figures))
+                return figures
+            return wrapper
+        return decorator
+
+
+def versioned_cache(maxsize):
+    '''
+    Decorator like functools.lru_cache for work built from the dataset, with the dataset version added to the key
+    so the results of an old version are never used again and are evicted as new ones are added
+    Input arguments: maximum number of results kept, over every version
+    Returns the decorator
+    '''
+    def decorator(func):
+        @functools.lru_cache(maxsize=maxsize)
+        def cached(version, *args):
+            return func(*args)
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            return cached(current_data().version, *args)
+        return wrapper
+    return decorator
+
+
+def prewarm(func, years):
+    '''
+    Function to call a memoized callback for every year, filling the cache before the first request
+    Input arguments: memoized callback, iterable of years
+    '''
+    for year in years:
+        func(int(year))
+
+
+# a single cache shared by the pages, so the byte budget covers all of them
+figure_cache = FigureCache(config.FIGURE_CACHE_BYTES)
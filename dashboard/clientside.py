@@ -0,0 +1,46 @@
+# helpers for the clientside slider mode, where the data for every year is sent to the browser once
+import numpy as np
+
+# columns sent to the browser for each year
+YEAR_DATA_COLUMNS = {
+    'Country': 'country',
+    'Code': 'code',
+    'GDP (USD)': 'gdp',
+    'Population': 'population',
+    'GDP per Capita': 'gdp_per_capita',
+}
+
+
+def column_values(series):
+    '''
+    Function to convert a column to a JSON friendly list, with missing numbers sent as null
+    Input arguments: series
+    Returns a list
+    '''
+    if series.dtype.kind == 'f':
+        values = series.to_numpy()
+        return [None if np.isnan(value) else float(value) for value in values]
+    return series.tolist()
+
+
+def year_data(df, year_index):
+    '''
+    Function to build the compact per-year data used by the clientside callbacks
+    Input arguments: dataframe sorted by year, dictionairy of year to (start, stop) row positions
+    Returns a dictionairy of year (as a string) to a dictionairy of column lists
+    '''
+    data = {}
+    for year, (start, stop) in year_index.items():
+        block = df.iloc[start:stop]
+        data[str(year)] = {key: column_values(block[column]) for column, key in YEAR_DATA_COLUMNS.items()}
+    return data
+
+
+def set_figures(layout, figures):
+    '''
+    Function to set the initial figure of graphs in a layout
+    Input arguments: layout component, dictionairy of graph id to figure
+    '''
+    for component in layout._traverse():
+        if getattr(component, 'id', None) in figures:
+            component.figure = figures[component.id]
@@ -0,0 +1,104 @@
+# importing libraries
+import gzip
+import hashlib
+import threading
+
+from flask import request
+
+# brotli is optional, without it responses are only compressed with gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# routes answered with the layout and the callback graph of the app, which only change when the app does
+LAYOUT_PATHS = ('/_dash-layout', '/_dash-dependencies')
+# the javascript bundles of dash and its components
+COMPONENT_SUITES_PATH = '/_dash-component-suites/'
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'text/javascript', 'text/html', 'text/css', 'text/plain')
+
+
+class ResponseCompressor:
+    '''
+    Compresses the responses of the app with brotli or gzip, whichever the browser prefers, and adds strong ETags to
+    the layout and component bundle routes so a browser with a current copy gets an empty 304 response.
+    The bundles never change while the app runs, so they are only compressed once
+    '''
+
+    def __init__(self, min_bytes=1024, gzip_level=6, brotli_quality=5):
+        self.min_bytes = min_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._bundles = {}
+        self._lock = threading.Lock()
+
+    def encodings(self):
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def compress(self, body, encoding, best=False):
+        '''
+        Function to compress a response body
+        Input arguments: bytes, 'br' or 'gzip', whether to use the strongest (and slowest) setting
+        Returns the compressed bytes
+        '''
+        if encoding == 'br':
+            return brotli.compress(body, quality=11 if best else self.brotli_quality)
+        return gzip.compress(body, compresslevel=9 if best else self.gzip_level, mtime=0)
+
+    def _bundle(self, path, body, encoding):
+        # the bundle is looked up by path, so it is only hashed and compressed the first time it is served
+        with self._lock:
+            entry = self._bundles.get(path)
+            if entry is None or entry['size'] != len(body):
+                entry = self._bundles[path] = {'size': len(body), 'etag': hashlib.sha256(body).hexdigest()[:32]}
+            if encoding is not None and encoding not in entry:
+                entry[encoding] = self.compress(body, encoding, best=True)
+            return entry['etag'], entry.get(encoding)
+
+    def process(self, response):
+        '''
+        Function to compress a response and add its ETag, answering with a 304 when the browser already has it
+        Input arguments: flask response
+        Returns the response to send
+        '''
+        if (response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+
+        path = request.path
+        body = response.get_data()
+        encoding = None
+        if len(body) >= self.min_bytes:
+            encoding = request.accept_encodings.best_match(self.encodings())
+
+        etag = None
+        compressed = None
+        if request.method == 'GET' and COMPONENT_SUITES_PATH in path:
+            etag, compressed = self._bundle(path, body, encoding)
+        elif request.method == 'GET' and path.endswith(LAYOUT_PATHS):
+            etag = hashlib.sha256(body).hexdigest()[:32]
+
+        if encoding is not None:
+            response.vary.add('Accept-Encoding')
+        if etag is not None:
+            # each encoding is a different representation, so it gets its own tag
+            response.set_etag(etag + ('-' + encoding if encoding else ''))
+            if response.make_conditional(request).status_code == 304:
+                return response
+
+        if encoding is not None:
+            response.set_data(compressed if compressed is not None else self.compress(body, encoding))
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    def init_app(self, server):
+        '''
+        Function to add the hook compressing the responses to the flask server of the app
+        Input arguments: flask server
+        '''
+        server.after_request(self.process)
+
+
+# a single compressor for the app
+compressor = ResponseCompressor()
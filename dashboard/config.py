@@ -0,0 +1,84 @@
+# settings for the dashboard, read from environment variables so deployments can change them without code edits
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# folder for everything derived from the data (dataset cache, stored payloads)
+CACHE_DIR = os.environ.get('DASHBOARD_CACHE_DIR', os.path.join(ROOT_DIR, '.cache'))
+
+
+def env_flag(name, default=False):
+    '''
+    Function to read a true/false setting from an environment variable
+    Input arguments: name of the variable, value to use when it is not set
+    Returns a boolean
+    '''
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# folder of a panel of indicators to serve instead of the dataset in the repository (see dashboard/indicators.py)
+PANEL_DIR = os.environ.get('DASHBOARD_PANEL_DIR')
+
+# seconds between checks for a new version of the dataset (a new csv file, or a new panel marked current in
+# DASHBOARD_PANEL_DIR), which is swapped in without restarting the workers, 0 to only load the dataset at startup
+RELOAD_INTERVAL = float(os.environ.get('DASHBOARD_RELOAD_INTERVAL', 60))
+# route asking a worker to load the latest version at once, only added when a token is set, which the requests send
+# in the X-Reload-Token header
+RELOAD_PATH = os.environ.get('DASHBOARD_RELOAD_PATH', '/admin/reload-data')
+RELOAD_TOKEN = os.environ.get('DASHBOARD_RELOAD_TOKEN')
+
+# maximum size of the figure cache, measured as the size of the serialized figures
+FIGURE_CACHE_BYTES = int(os.environ.get('DASHBOARD_FIGURE_CACHE_BYTES', 64 * 1024 * 1024))
+
+# building the figures for every year at startup, so the first slider moves are already cached
+PREWARM = env_flag('DASHBOARD_PREWARM')
+
+# storing the serialized and compressed callback responses, and whether they are kept on disk
+PAYLOAD_STORE = env_flag('DASHBOARD_PAYLOAD_STORE', True)
+PERSIST_PAYLOADS = env_flag('DASHBOARD_PERSIST_PAYLOADS', True)
+PAYLOAD_DIR = os.environ.get('DASHBOARD_PAYLOAD_DIR', os.path.join(CACHE_DIR, 'payloads'))
+# maximum size of the stored responses kept in memory, measured as the bytes of every encoding kept
+PAYLOAD_CACHE_BYTES = int(os.environ.get('DASHBOARD_PAYLOAD_CACHE_BYTES', 64 * 1024 * 1024))
+
+# how the year sliders update the charts: 'server' runs a callback per slider move,
+# 'clientside' sends every year to the browser once and updates the figures in javascript,
+# 'animation' builds the Page 1 maps and bar chart with a frame per year and play/pause controls
+SLIDER_MODE = os.environ.get('DASHBOARD_SLIDER_MODE', 'server')
+
+# folder holding the source images of the Page 3 insets, and whether to download them when they are missing
+INSET_DIR = os.environ.get('DASHBOARD_INSET_DIR', ROOT_DIR)
+INSET_REMOTE_FALLBACK = env_flag('DASHBOARD_INSET_REMOTE_FALLBACK')
+INSET_REMOTE_URL = os.environ.get('DASHBOARD_INSET_REMOTE_URL',
+                                  'https://raw.githubusercontent.com/10Dennisw/economics-africa-dashboard/master/')
+
+# processes used to render the inset image for every year, and the folder the rendered images are kept in
+INSET_WORKERS = int(os.environ.get('DASHBOARD_INSET_WORKERS', os.cpu_count() or 1))
+INSET_BANK_DIR = os.environ.get('DASHBOARD_INSET_BANK_DIR', os.path.join(CACHE_DIR, 'insets'))
+
+# format of the images embedded in the figures, 'png' or 'webp' (both lossless)
+IMAGE_FORMAT = os.environ.get('DASHBOARD_IMAGE_FORMAT', 'png')
+
+# how the maps are drawn, 'full' or 'lite' (no coastlines, ocean, lakes or rivers, thinner borders, smaller hover data)
+RENDER_PROFILE = os.environ.get('DASHBOARD_RENDER_PROFILE', 'full')
+
+# building the page layouts, the Page 2 figures and the Page 3 inset images on the first visit of a page
+# instead of at startup, so a new worker is ready sooner
+LAZY_PAGES = env_flag('DASHBOARD_LAZY_PAGES')
+
+# timing the callbacks and the layout route, and serving the measurements in the Prometheus text format
+METRICS = env_flag('DASHBOARD_METRICS', True)
+METRICS_PATH = os.environ.get('DASHBOARD_METRICS_PATH', '/metrics')
+
+# compressing the callback, layout and page responses larger than the threshold (in bytes) with brotli or gzip,
+# and answering repeat requests for the layout and the component bundles with 304 responses
+COMPRESSION = env_flag('DASHBOARD_COMPRESSION', True)
+COMPRESSION_MIN_BYTES = int(os.environ.get('DASHBOARD_COMPRESSION_MIN_BYTES', 1024))
+
+# the production server (gunicorn -c gunicorn.conf.py wsgi:server): address to listen on, worker processes and
+# threads in each worker
+BIND = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8050')
+WORKERS = int(os.environ.get('DASHBOARD_WORKERS', os.cpu_count() or 1))
+THREADS = int(os.environ.get('DASHBOARD_THREADS', 4))
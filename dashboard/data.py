@@ -0,0 +1,370 @@
+# importing libraries
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dashboard.config import CACHE_DIR, PANEL_DIR, ROOT_DIR
+from dashboard.indicators import (KEY_COLUMNS, MANIFEST, STRING_COLUMNS, current_panel_dir, frame_panel, open_panel,
+                                  remove_panels, write_panel)
+
+# file locks are only available on unix, elsewhere workers noticing a new csv at once may each build its cache
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# the dataset ships with the repo, so it is loaded from the local tree rather than from GitHub
+DATA_PATH = os.path.join(ROOT_DIR, 'africa_economics_v2.csv')
+
+# the indicators the pages are built on, loaded at startup, the others are loaded when picked in a metric selector
+PAGE_INDICATORS = ['Population', 'GDP (USD)', 'GDP per Capita']
+
+# bumped whenever the layout of the cache changes, so older caches are rebuilt
+CACHE_FORMAT = 4
+
+
+def file_fingerprint(path):
+    '''
+    Function to retrieve the modification time and size of a file
+    Input arguments: path to the file
+    Returns a tuple of the mtime (in nanoseconds) and the size in bytes
+    '''
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_hash(path):
+    '''
+    Function to calculate the sha256 hash of a file, reading it in blocks
+    Input arguments: path to the file
+    Returns the hex digest of the file
+    '''
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def cache_dir(source_path):
+    '''
+    Function to get the folder holding the cached panels of a csv file
+    Input arguments: path to the csv file
+    Returns the path of the folder
+    '''
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(CACHE_DIR, name)
+
+
+def panel_dir(source_path, sha):
+    '''
+    Function to get the folder of the panel built from one version of a csv file
+    Input arguments: path to the csv file, sha256 hash of its content
+    Returns the path of the folder
+    '''
+    return os.path.join(cache_dir(source_path), 'v{}-{}'.format(CACHE_FORMAT, sha[:12]))
+
+
+def read_current(source_path):
+    '''
+    Function to read which version of a csv file was cached last, with the mtime and size it had
+    Input arguments: path to the csv file
+    Returns dictionairy with the format, mtime, size and sha256 of the csv, or None
+    '''
+    try:
+        with open(os.path.join(cache_dir(source_path), 'current.json')) as f:
+            current = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return current if current.get('format') == CACHE_FORMAT else None
+
+
+def write_current(source_path, mtime, size, sha):
+    path = os.path.join(cache_dir(source_path), 'current.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'format': CACHE_FORMAT, 'mtime': mtime, 'size': size, 'sha256': sha}, f)
+    os.replace(path + '.tmp', path)
+
+
+@contextlib.contextmanager
+def build_lock(source_path):
+    '''
+    Context manager holding a lock file in the cache folder of a csv file while its panel is built, so when several
+    workers find a new version at once only the first parses the csv, and the others wait and map its panel
+    Input arguments: path to the csv file
+    '''
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(cache_dir(source_path), exist_ok=True)
+    with open(os.path.join(cache_dir(source_path), 'build.lock'), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def remove_old_panels(keep, source_path=DATA_PATH):
+    '''
+    Function to delete the cached panels of a csv file other than the versions kept, and the single file column store
+    written by older versions of the cache
+    Input arguments: versions of the dataset to keep, path to the csv file
+    '''
+    remove_panels(cache_dir(source_path), {os.path.basename(panel_dir(source_path, version)) for version in keep})
+    try:
+        os.remove(cache_dir(source_path) + '.col')
+    except OSError:
+        pass
+
+
+def load_data(path=DATA_PATH):
+    '''
+    Function to load the dataset as a panel of indicators, using the cached panel when it is still valid
+    The cache is valid when the mtime and size of the csv are unchanged, or when the content hash is unchanged
+    The columns are mapped read-only from the cache, so every process serving the app shares one copy in memory
+    Input arguments: path to the csv file
+    Returns the panel and the sha256 hash of the csv it was loaded from
+    '''
+    mtime, size = file_fingerprint(path)
+    current = read_current(path)
+    if current is not None and current['mtime'] == mtime and current['size'] == size:
+        sha = current['sha256']
+    else:
+        # the file has been touched or was never cached, it is only parsed again if the content has changed
+        sha = file_hash(path)
+
+    panel = open_panel(panel_dir(path, sha))
+    if panel is not None:
+        if current is None or (current['mtime'], current['size'], current['sha256']) != (mtime, size, sha):
+            try:
+                write_current(path, mtime, size, sha)
+            except OSError:
+                pass
+        return panel, sha
+
+    try:
+        with build_lock(path):
+            # another worker may have built the panel while this one waited for the lock
+            panel = open_panel(panel_dir(path, sha))
+            if panel is not None:
+                return panel, sha
+            # sorting the rows by year (keeping the csv order within a year) so each year is one contiguous block
+            df = pd.read_csv(path).sort_values(by='Year', kind='stable', ignore_index=True)
+            indicators = [column for column in df.columns if column not in KEY_COLUMNS]
+            write_panel(panel_dir(path, sha), df[KEY_COLUMNS], ((name, df[name].to_numpy()) for name in indicators),
+                        {'sha256': sha}, STRING_COLUMNS, df.columns)
+            write_current(path, mtime, size, sha)
+    except OSError:
+        # a read-only checkout can still serve the app, just without the cache
+        df = pd.read_csv(path).sort_values(by='Year', kind='stable', ignore_index=True)
+        return frame_panel(df, KEY_COLUMNS, {'sha256': sha}), sha
+    # serving from the mapped files, like the processes that find the cache already built
+    return open_panel(panel_dir(path, sha)), sha
+
+
+def build_year_index(df):
+    '''
+    Function to find the block of rows belonging to each year in a frame sorted by year
+    Input arguments: dataframe sorted by the Year column
+    Returns a dictionairy of year to (start, stop) row positions
+    '''
+    years = df['Year'].to_numpy()
+    if len(years) == 0:
+        return {}
+    boundaries = np.flatnonzero(np.diff(years)) + 1
+    starts = np.concatenate(([0], boundaries))
+    stops = np.concatenate((boundaries, [len(years)]))
+    return {int(years[start]): (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+
+def same_countries_every_year(df, year_index):
+    '''
+    Function to check whether every year has the same countries in the same order, in which case the country codes
+    and names of a map never change when the year does
+    Input arguments: dataframe sorted by year, year index
+    Returns True or False
+    '''
+    blocks = list(year_index.values())
+    if not blocks:
+        return True
+    first_start, first_stop = blocks[0]
+    for column in ('Code', 'Country'):
+        values = df[column].to_numpy(dtype=object)
+        first = values[first_start:first_stop]
+        for start, stop in blocks[1:]:
+            if stop - start != len(first) or not (values[start:stop] == first).all():
+                return False
+    return True
+
+
+def source_fingerprint():
+    '''
+    Function to tell cheaply whether the source of the dataset has changed, without reading it
+    Returns the path of the current panel and the mtime and size of its manifest with DASHBOARD_PANEL_DIR, otherwise
+    the mtime and size of the csv file
+    '''
+    if PANEL_DIR:
+        directory = current_panel_dir(PANEL_DIR)
+        return directory, file_fingerprint(os.path.join(directory, MANIFEST))
+    return file_fingerprint(DATA_PATH)
+
+
+class Dataset:
+    '''
+    One version of the dataset: the panel of indicators, the frame of the indicators the pages use and its year index
+    A version is never changed once loaded, a new version of the data is loaded as a new Dataset and swapped in
+    '''
+
+    def __init__(self, panel, data_hash, fingerprint=None):
+        missing_indicators = [name for name in PAGE_INDICATORS if name not in panel]
+        if missing_indicators:
+            raise KeyError('the dataset has no {} column'.format(', '.join(missing_indicators)))
+        self.panel = panel
+        self.data_hash = data_hash
+        # short version of the dataset, used in cache keys so cached figures never outlive their data
+        self.version = data_hash[:12]
+        # the fingerprint of the source when it was loaded, to notice when a newer version is written
+        self.fingerprint = fingerprint
+        # the pages treat this frame as read-only
+        self.df = panel.frame(PAGE_INDICATORS)
+        # building the year index once, so the slider callbacks can look up a year directly
+        self.year_index = build_year_index(self.df)
+        # when the countries don't change with the year, moving the slider doesn't need to send them again
+        self.same_countries = same_countries_every_year(self.df, self.year_index)
+
+
+def open_dataset():
+    '''
+    Function to load the latest version of the dataset, from DASHBOARD_PANEL_DIR when it is set or else from the csv
+    file in the repository
+    Returns the Dataset
+    '''
+    # taken before loading, so a version written while this one loads is still noticed as new
+    fingerprint = source_fingerprint()
+    if PANEL_DIR:
+        panel = open_panel(current_panel_dir(PANEL_DIR))
+        if panel is None:
+            raise FileNotFoundError('DASHBOARD_PANEL_DIR {} holds no complete panel'.format(PANEL_DIR))
+        return Dataset(panel, panel.meta['sha256'], fingerprint)
+    panel, data_hash = load_data()
+    return Dataset(panel, data_hash, fingerprint)
+
+
+# the version being built by reload_data, seen only by the thread building it
+_warming = contextvars.ContextVar('warming', default=None)
+_reload_hooks = []
+_swap_hooks = []
+_reload_lock = threading.Lock()
+
+
+def current_data():
+    '''
+    Function to get the version of the dataset to use, read on every call rather than kept, so a new version can be
+    swapped in while the app is serving
+    Returns the Dataset
+    '''
+    warming = _warming.get()
+    return dataset if warming is None else warming
+
+
+def on_reload(func):
+    '''
+    Function to register work to do for each new version of the dataset before it is served, such as building
+    figures or layouts. The work sees the new version through current_data()
+    Input arguments: function without arguments
+    Returns the function, so it can be used as a decorator
+    '''
+    _reload_hooks.append(func)
+    return func
+
+
+def on_swap(func):
+    '''
+    Function to register work to do once a new version of the dataset is swapped in, such as deleting the files kept
+    for older versions
+    Input arguments: function taking the versions to keep, the new version and the one it replaced (which other
+    workers may still be serving)
+    Returns the function, so it can be used as a decorator
+    '''
+    _swap_hooks.append(func)
+    return func
+
+
+def reload_data():
+    '''
+    Function to load the latest version of the dataset and swap it in for the one being served, without a restart
+    The work registered with on_reload is done for the new version first, while requests are still answered from the
+    old one, so the caches of the new version are warm when it is swapped in. If the new version fails to load or
+    to build, the old one is kept
+    Returns True if a new version was swapped in
+    '''
+    global dataset
+    with _reload_lock:
+        new_dataset = open_dataset()
+        if new_dataset.data_hash == dataset.data_hash:
+            # only the fingerprint changed (the file was touched, or written again with the same content)
+            dataset.fingerprint = new_dataset.fingerprint
+            return False
+        token = _warming.set(new_dataset)
+        try:
+            for hook in _reload_hooks:
+                hook()
+        finally:
+            _warming.reset(token)
+        # a single assignment, so every request sees either the old version or the new one
+        old_dataset, dataset = dataset, new_dataset
+        for hook in _swap_hooks:
+            hook((new_dataset.version, old_dataset.version))
+        return True
+
+
+def year_slice(year, indicators=()):
+    '''
+    Function to retrieve the rows for a single year without scanning or copying the frame
+    Input arguments: year, names of indicators to add to the columns the pages use
+    Returns a dataframe with the rows for that year (empty if the year is not in the data)
+    '''
+    data = current_data()
+    start, stop = data.year_index.get(year, (0, 0))
+    block = data.df.iloc[start:stop]
+    missing = [name for name in indicators if name not in block.columns]
+    if missing:
+        block = block.assign(**{name: data.panel.column(name)[start:stop] for name in missing})
+    return block
+
+
+def indicator_frame(indicators):
+    '''
+    Function to get the whole dataset with some indicators added to the columns the pages use
+    Input arguments: names of the indicators
+    Returns a dataframe
+    '''
+    data = current_data()
+    missing = [name for name in indicators if name not in data.df.columns]
+    if not missing:
+        return data.df
+    return data.df.assign(**{name: data.panel.column(name) for name in missing})
+
+
+# loading the dataset once, the indicators the pages use are loaded now and the others when they are first picked
+# an app serving a larger panel (such as the World Bank development indicators) is pointed at its folder instead
+dataset = open_dataset()
+# the panels written by python -m dashboard.ingest are deleted by it, the app only deletes the ones it cached
+if not PANEL_DIR:
+    on_swap(remove_old_panels)
+
+
+def __getattr__(name):
+    # the attributes of the current version, for the scripts importing them directly (the app calls current_data())
+    if name in ('panel', 'df', 'year_index', 'data_hash'):
+        return getattr(current_data(), name)
+    if name == 'data_version':
+        return current_data().version
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
@@ -0,0 +1,320 @@
+'''
+Building blocks for the figures on pages 1 and 3, assembled as dictionairies instead of through plotly express.
+
+px and go process their arguments and validate every trace each time a figure is made, and page 1 used to
+deepcopy a whole map to make its second map. Here the layout of each figure is built once as a skeleton,
+and the figure for a year is assembled from the skeleton and the traces of that year. The skeletons are
+shared between every figure built from them, so they are never modified, a figure that needs different
+values gets a shallow copy with those keys replaced.
+
+Once a page has drawn its figures, moving the year slider only changes the values of the traces and a few
+titles, so figure_patch turns the figure of the new year into a dash Patch holding just those parts.
+
+The maps are drawn with the render profile set by DASHBOARD_RENDER_PROFILE. The 'lite' profile drops the
+decorative layers of the globes, draws thinner country borders, only sends the parts of the template a map uses
+and only sends the hover data the hover text shows.
+'''
+import base64
+
+import numpy as np
+from dash import Patch
+import plotly.io as pio
+from plotly.colors import sequential
+
+from dashboard import config
+
+# the default plotly template, as the dictionairy px attaches to each figure
+TEMPLATE = pio.templates['plotly'].to_plotly_json()
+
+# the colour scale px builds from color_continuous_scale='reds'
+REDS = [[i / (len(sequential.Reds) - 1), colour] for i, colour in enumerate(sequential.Reds)]
+
+# the globe styling shared by the maps, rotated and zoomed in to focus on Africa
+GEO_STYLE = {
+    'domain': {'x': [0.0, 1.0], 'y': [0.0, 1.0]},
+    'projection': {'type': 'orthographic', 'rotation': {'lon': 17, 'lat': 2}, 'scale': 1.43},
+    'showframe': False,
+    'showcoastlines': True,
+    'showcountries': True,
+    'countrycolor': '#d1d1d1',
+    'showocean': True,
+    'oceancolor': '#c9d2e0',
+    'showlakes': True,
+    'lakecolor': '#99c0db',
+    'showrivers': True,
+    'rivercolor': '#99c0db',
+}
+
+# short names of the numpy types plotly.js can read as typed arrays
+TYPED_ARRAY_DTYPES = {
+    'int8': 'i1', 'uint8': 'u1', 'int16': 'i2', 'uint16': 'u2',
+    'int32': 'i4', 'uint32': 'u4', 'float32': 'f4', 'float64': 'f8',
+}
+
+# black border drawn around each country
+COUNTRY_BORDER = {'line': {'color': 'black', 'width': 1.5}}
+
+# the parts of the template a map uses, without the defaults of the other trace types, axes and subplots
+MAP_TEMPLATE = {
+    'data': {trace_type: TEMPLATE['data'][trace_type] for trace_type in ('choropleth', 'scattergeo')},
+    'layout': {key: value for key, value in TEMPLATE['layout'].items()
+               if key not in ('xaxis', 'yaxis', 'polar', 'ternary', 'scene', 'colorscale')},
+}
+
+# the render profiles of the maps, 'full' is the original look and 'lite' is quicker to draw on low end devices
+RENDER_PROFILES = {
+    'full': {
+        'template': TEMPLATE,
+        'geo': {},
+        'country_border': COUNTRY_BORDER,
+        'trim_hover': False,
+    },
+    'lite': {
+        'template': MAP_TEMPLATE,
+        # only the country outlines are kept, without the land the template fills in, coastlines, ocean, lakes and rivers
+        'geo': {'showland': False, 'showcoastlines': False, 'showocean': False, 'showlakes': False, 'showrivers': False},
+        'country_border': {'line': {'color': 'black', 'width': 0.5}},
+        # the hover data is sent once as numbers, rather than as rows repeating the values and country codes
+        'trim_hover': True,
+    },
+}
+
+if config.RENDER_PROFILE not in RENDER_PROFILES:
+    raise ValueError('DASHBOARD_RENDER_PROFILE must be one of {}, not {!r}'.format(', '.join(RENDER_PROFILES), config.RENDER_PROFILE))
+# the profile the maps of the app are drawn with
+PROFILE = RENDER_PROFILES[config.RENDER_PROFILE]
+
+
+def log_range(values):
+    '''
+    Function to find the range of the colour axis of a map coloured by the logarithm of the values
+    Input arguments: series of values over every year
+    Returns list of the minimum and maximum of the logarithm, ignoring missing values
+    '''
+    logged = np.log(np.asarray(values, dtype=float))
+    return [float(np.nanmin(logged)), float(np.nanmax(logged))]
+
+
+def value_range(values):
+    '''
+    Function to find the range of the colour axis of a map coloured by the values themselves
+    Input arguments: series of values over every year
+    Returns list of the minimum and maximum, ignoring missing values
+    '''
+    values = np.asarray(values, dtype=float)
+    return [float(np.nanmin(values)), float(np.nanmax(values))]
+
+
+def uses_log_scale(values):
+    '''
+    Function to check whether a map can be coloured by the logarithm of an indicator, which needs every value to be
+    positive. Indicators such as growth rates or balances are coloured by their values instead
+    Input arguments: series of values over every year
+    Returns a boolean
+    '''
+    values = np.asarray(values, dtype=float)
+    return bool(np.all(values[~np.isnan(values)] > 0))
+
+
+def typed_array(values):
+    '''
+    Function to encode a numeric array as a plotly.js typed array, the way plotly encodes arrays when it
+    validates a figure. Figures built as dictionairies skip the validation, and their arrays would otherwise
+    be sent as much longer lists of numbers
+    Arrays plotly.js has no typed array for (empty arrays, booleans, 64 bit integers too large for 32 bits) are
+    sent as plain lists, like plotly does
+    Input arguments: numpy array
+    Returns dictionairy with the type and base64 encoded bytes of the array, or a list
+    '''
+    values = np.ascontiguousarray(values)
+    if values.size == 0:
+        return values.tolist()
+    # plotly.js has no 64 bit integers, so they are sent in the smallest type that holds them
+    if values.dtype in (np.int64, np.uint64):
+        smaller_types = (np.int8, np.int16, np.int32) if values.dtype == np.int64 else (np.uint8, np.uint16, np.uint32)
+        for smaller in smaller_types:
+            limits = np.iinfo(smaller)
+            if limits.min <= values.min() and values.max() <= limits.max:
+                values = values.astype(smaller)
+                break
+    if values.dtype.name not in TYPED_ARRAY_DTYPES:
+        return values.tolist()
+    encoded = {'dtype': TYPED_ARRAY_DTYPES[values.dtype.name], 'bdata': base64.b64encode(values).decode('ascii')}
+    if values.ndim > 1:
+        encoded['shape'] = ', '.join(str(length) for length in values.shape)
+    return encoded
+
+
+def geo_layout(colorbar_title, range_color, margin, **geo):
+    '''
+    Function to build the layout skeleton of a map coloured by the red colour axis
+    Input arguments: title of the colour bar, [min, max] of the colour axis, dictionairy of the margins,
+    any geo settings to add to the shared globe styling
+    Returns dictionairy of the layout
+    '''
+    return {
+        'template': PROFILE['template'],
+        'geo': {**GEO_STYLE, **geo, **PROFILE['geo']},
+        'coloraxis': {
+            'colorbar': {'title': {'text': colorbar_title}},
+            'colorscale': REDS,
+            'cmin': range_color[0],
+            'cmax': range_color[1],
+            'autocolorscale': False,
+        },
+        'legend': {'tracegroupgap': 0},
+        'margin': margin,
+        'font': {'color': 'black'},
+        'paper_bgcolor': 'white',
+    }
+
+
+def with_layout(layout, **changes):
+    '''
+    Function to make a shallow copy of a layout skeleton with some of its keys replaced
+    Input arguments: dictionairy of the layout, keys to replace
+    Returns dictionairy of the new layout, sharing the unchanged values with the skeleton
+    '''
+    return {**layout, **changes}
+
+
+def choropleth_customdata(values, codes):
+    '''
+    Function to build the hover data of a choropleth for the render profile
+    Input arguments: array of the values, array of the country codes
+    Returns array of rows of (value, code, value) like px, or just the values when the hover data is trimmed
+    '''
+    if PROFILE['trim_hover']:
+        return values
+    return np.column_stack([values.astype(object), codes, values.astype(object)])
+
+
+def bubble_customdata(codes, gdp, population):
+    '''
+    Function to build the hover data of the population bubbles for the render profile
+    Input arguments: arrays of the country codes, GDP and population
+    Returns array of rows of (code, GDP, population) like px, or of (GDP, population) when the hover data is trimmed
+    '''
+    if PROFILE['trim_hover']:
+        return np.column_stack([gdp, population.astype(float)])
+    return np.column_stack([codes, gdp.astype(object), population.astype(object)])
+
+
+def choropleth_trace(filtered_df, column, log=True):
+    '''
+    Function to build the choropleth trace coloured by the logarithm of a column, with the same hover
+    information px.choropleth gave the maps
+    Input arguments: dataframe of one year, name of the column, whether to colour by the logarithm or by the values
+    Returns dictionairy of the trace
+    '''
+    values = filtered_df[column].to_numpy(dtype=float)
+    codes = filtered_df['Code'].to_numpy(dtype=object)
+    trace = {
+        'type': 'choropleth',
+        'geo': 'geo',
+        'coloraxis': 'coloraxis',
+        'name': '',
+        'locations': codes.tolist(),
+        'z': typed_array(np.log(values) if log else values),
+        'hovertext': filtered_df['Country'].tolist(),
+        'customdata': choropleth_customdata(values, codes),
+        'hovertemplate': f'<b>%{{hovertext}}</b><br><br>{column}=%{{customdata[2]:,}}<br>color=%{{z}}<extra></extra>',
+        'marker': PROFILE['country_border'],
+    }
+    if PROFILE['trim_hover']:
+        trace['customdata'] = typed_array(trace['customdata'])
+        trace['hovertemplate'] = f'<b>%{{hovertext}}</b><br>{column}=%{{customdata:,}}<extra></extra>'
+    return trace
+
+
+def population_bubble_trace(filtered_df):
+    '''
+    Function to build the layer of population bubbles drawn over a map, sized like px.scatter_geo with
+    size='Population' and the default size_max of 20
+    Input arguments: dataframe of one year
+    Returns dictionairy of the trace
+    '''
+    population = filtered_df['Population'].to_numpy()
+    codes = filtered_df['Code'].to_numpy(dtype=object)
+    trace = {
+        'type': 'scattergeo',
+        'geo': 'geo',
+        'mode': 'markers',
+        'name': '',
+        'legendgroup': '',
+        'showlegend': False,
+        'locations': codes.tolist(),
+        'hovertext': filtered_df['Country'].tolist(),
+        'customdata': bubble_customdata(codes, filtered_df['GDP (USD)'].to_numpy(dtype=float), population),
+        'hovertemplate': '<b>%{hovertext}</b><br><br>Population=%{customdata[2]:,}<br>GDP (USD)=%{customdata[1]:,}<extra></extra>',
+        'marker': {
+            'color': '#636efa',
+            'opacity': 0.5,
+            'size': typed_array(population),
+            'sizemode': 'area',
+            'sizeref': float(population.max()) / 20 ** 2,
+            'symbol': 'circle',
+        },
+    }
+    if PROFILE['trim_hover']:
+        trace['customdata'] = typed_array(trace['customdata'])
+        trace['hovertemplate'] = '<b>%{hovertext}</b><br>Population=%{customdata[1]:,}<br>GDP (USD)=%{customdata[0]:,}<extra></extra>'
+    return trace
+
+
+# the parts of a map trace that only change with the year when the countries in the data do
+COUNTRY_PATHS = ['locations', 'hovertext']
+
+
+def map_trace_paths(trace_paths, same_countries):
+    '''
+    Function to add the country codes and names to the paths of a map trace to update, unless every year of the
+    dataset has the same countries, in which case the browser already has them
+    Input arguments: list of paths in the trace, whether every year has the same countries
+    Returns list of paths
+    '''
+    return list(trace_paths) if same_countries else COUNTRY_PATHS + list(trace_paths)
+
+
+def figure_patch(figure, trace_paths=(), layout_paths=(), traces=None):
+    '''
+    Function to build a dash Patch updating the parts of a figure that change with the year, so the browser keeps
+    the rest of the figure it already has
+    Input arguments: dictionairy of the figure for the new year, paths (tuples of keys and list positions, or a
+    single key) inside each trace and inside the layout to update, positions of the traces to update (every trace
+    by default). A path missing from a trace is skipped, a path missing from the layout is deleted in the browser.
+    With None as the trace paths the traces are sent whole, for figures whose number of traces changes with the year
+    Returns dash Patch
+    '''
+    def target(patch, path):
+        path = path if isinstance(path, tuple) else (path,)
+        for key in path[:-1]:
+            patch = patch[key]
+        return patch, path[-1]
+
+    def lookup(value, path):
+        for key in path if isinstance(path, tuple) else (path,):
+            try:
+                value = value[key]
+            except (KeyError, IndexError, TypeError):
+                return None
+        return value
+
+    patch = Patch()
+    if trace_paths is None:
+        patch['data'] = figure['data']
+        trace_paths = ()
+    for i in range(len(figure['data'])) if traces is None else traces:
+        for path in trace_paths:
+            value = lookup(figure['data'][i], path)
+            if value is not None:
+                parent, key = target(patch['data'][i], path)
+                parent[key] = value
+    for path in layout_paths:
+        value = lookup(figure['layout'], path)
+        parent, key = target(patch['layout'], path)
+        if value is None:
+            del parent[key]
+        else:
+            parent[key] = value
+    return patch
@@ -0,0 +1,444 @@
+# image manipulation for the small island insets on Page 3, done with numpy arrays rather than per pixel calls
+import base64
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from dashboard import config
+
+TRANSPARENT = (0, 0, 0, 0)
+BLACK = (0, 0, 0, 255)
+
+# source images of the insets, stored in the root of the repo
+INSET_SOURCES = {
+    'seychelles': 'seychelles-map.webp',
+    'mauritius': 'mauritius_img.png',
+}
+
+# name of each inset's country in the dataset
+INSET_COUNTRIES = {
+    'seychelles': 'Seyshelles',
+    'mauritius': 'Mauritius',
+}
+
+# defining colour scale, matching the 'reds' colour scale of the map
+red_scale_rgb = [
+    (0.0, (255,245,240)),
+    (0.125, (254,224,210)),
+    (0.25, (252,187,161)),
+    (0.375, (252,146,114)),
+    (0.5, (251,106,74)),
+    (0.625, (239,59,44)),
+    (0.75, (203,24,29)),
+    (0.875, (165,15,21)),
+    (1.0, (103,0,13)),
+]
+
+
+# defining normalisation function
+def generating_normalised_val(new_value, max_val, min_val):
+    return(new_value - min_val) / (max_val - min_val)
+
+
+# function to interporate colour for normalised_val
+def interpolate_color(value, color_scale):
+    # Ensure the value is within the 0-1 range
+    value = max(0, min(1, value))
+
+    # Find the two closest points in the colorscale
+    for i in range(1, len(color_scale)):
+        if value <= color_scale[i][0]:
+            lower = color_scale[i - 1]
+            upper = color_scale[i]
+            break
+    else:
+        # If the value is above the last threshold, use the last color
+        return color_scale[-1][1]
+
+    # Interpolate between the two colors
+    ratio = (value - lower[0]) / (upper[0] - lower[0])
+    lower_color = lower[1]
+    upper_color = upper[1]
+
+    # Linear interpolation of the RGB components
+    interp_color = [int(lower_val + (upper_val - lower_val) * ratio) for lower_val, upper_val in zip(lower_color, upper_color)]
+    return interp_color
+
+
+def inset_colour(gdp_per_capita):
+    '''
+    Function to find the colour of an inset, using the same log scale (5 to 9) as the insets have always used
+    Input arguments: GDP per capita of the island
+    Returns an (r, g, b) tuple
+    '''
+    normalised_val = generating_normalised_val(np.log(gdp_per_capita), 9, 5)
+    return tuple(int(value) for value in interpolate_color(normalised_val, red_scale_rgb))
+
+
+def read_inset_source(filename):
+    '''
+    Function to read the bytes of an inset source image from the local tree, or from the remote copy when enabled
+    Input arguments: name of the image file
+    Returns the bytes of the file
+    '''
+    path = os.path.join(config.INSET_DIR, filename)
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        if not config.INSET_REMOTE_FALLBACK:
+            raise
+    # only needed for the fallback, so requests is not imported otherwise
+    import requests
+    response = requests.get(config.INSET_REMOTE_URL + filename, timeout=10)
+    response.raise_for_status()
+    return response.content
+
+
+@functools.lru_cache(maxsize=None)
+def inset_pixels(name):
+    '''
+    Function to load and decode an inset source image once, keeping its pixels in memory
+    Input arguments: name of the inset, a key of INSET_SOURCES
+    Returns a read-only array of RGBA pixels
+    '''
+    img = Image.open(BytesIO(read_inset_source(INSET_SOURCES[name])))
+    pixels = np.array(img.convert('RGBA'))
+    pixels.flags.writeable = False
+    return pixels
+
+
+def rgba_array(img):
+    '''
+    Function to get the pixels of an image as an array
+    Input arguments: PIL image, or an array of RGBA pixels which is returned unchanged
+    Returns an array of shape (height, width, 4)
+    '''
+    if isinstance(img, np.ndarray):
+        return img
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    return np.asarray(img)
+
+
+def dark_mask(pixels, threshold=20):
+    '''
+    Function to find the pixels where any of the red, green or blue values is at most the threshold
+    Input arguments: array of RGBA pixels, threshold
+    Returns a boolean array of shape (height, width)
+    '''
+    return (pixels[..., :3] <= threshold).any(axis=-1)
+
+
+def light_mask(pixels, threshold=20):
+    '''
+    Function to find the pixels where all of the red, green and blue values are at least the threshold
+    Input arguments: array of RGBA pixels, threshold
+    Returns a boolean array of shape (height, width)
+    '''
+    return (pixels[..., :3] >= threshold).all(axis=-1)
+
+
+def edge_mask(mask):
+    '''
+    Function to find the pixels of a mask with at least one of their four neighbours outside the mask
+    Neighbours beyond the border of the image are ignored
+    Input arguments: boolean array
+    Returns a boolean array of the edge pixels
+    '''
+    # padding with True, so pixels beyond the border never count as being outside the mask
+    padded = np.pad(mask, 1, constant_values=True)
+    outside_neighbour = ~(padded[1:-1, :-2] & padded[1:-1, 2:] & padded[:-2, 1:-1] & padded[2:, 1:-1])
+    return mask & outside_neighbour
+
+
+def dilate_axis(mask, thickness, axis):
+    '''
+    Function to grow a mask by thickness pixels in both directions along one axis, clipped to the image
+    A running sum over a window of (2 * thickness + 1) pixels is used, so the cost doesn't depend on the thickness
+    Input arguments: boolean array, thickness in pixels, axis (0 for columns, 1 for rows)
+    Returns the dilated boolean array
+    '''
+    padding = [(0, 0), (0, 0)]
+    padding[axis] = (thickness + 1, thickness)
+    running_sum = np.cumsum(np.pad(mask, padding), axis=axis, dtype=np.int32)
+    window = 2 * thickness + 1
+    if axis == 0:
+        return (running_sum[window:] - running_sum[:-window]) > 0
+    return (running_sum[:, window:] - running_sum[:, :-window]) > 0
+
+
+def dilate(mask, thickness):
+    '''
+    Function to grow a mask by a square of (2 * thickness + 1) pixels around every pixel, clipped to the image
+    The square is separable, so the mask is grown along the rows and then along the columns
+    Input arguments: boolean array, thickness in pixels
+    Returns the dilated boolean array
+    '''
+    if thickness <= 0:
+        return mask.copy()
+    return dilate_axis(dilate_axis(mask, thickness, 1), thickness, 0)
+
+
+def draw_outlined(mask, fill_colour, outline_colour=BLACK, thickness=7, background=TRANSPARENT):
+    '''
+    Function to fill a mask with a colour and draw an outline of the given thickness over its edges
+    Input arguments: boolean mask, RGBA fill colour, RGBA outline colour, outline thickness in pixels, RGBA background colour
+    Returns an RGBA array of shape (height, width, 4)
+    '''
+    pixels = fill_mask(mask.shape, mask, fill_colour, background)
+    pixels[dilate(edge_mask(mask), thickness)] = outline_colour
+    return pixels
+
+
+def fill_mask(shape, mask, colour, background=TRANSPARENT):
+    '''
+    Function to create an RGBA array with the colour where the mask is set and the background elsewhere
+    Input arguments: (height, width) of the image, boolean mask, RGBA colour, RGBA background colour
+    Returns an array of shape (height, width, 4)
+    '''
+    pixels = np.empty(shape + (4,), dtype=np.uint8)
+    pixels[...] = background
+    pixels[mask] = colour
+    return pixels
+
+
+def recolour_seychelles(img, target_colour):
+    '''
+    Function to colour the dark pixels of the Seychelles map with the target colour, leaving the rest transparent
+    Input arguments: PIL image or array of RGBA pixels, RGB colour
+    Returns a new RGBA image
+    '''
+    pixels = rgba_array(img)
+    new_pixels = fill_mask(pixels.shape[:2], dark_mask(pixels), tuple(target_colour) + (255,))
+    return Image.fromarray(new_pixels, 'RGBA')
+
+
+def recolour_mauritius(img, target_colour, padding_width=10, outline_colour=BLACK, outline_thickness=7):
+    '''
+    Function to colour the light pixels of the Mauritius map with the target colour and draw a thick outline around them
+    The image is padded with transparent pixels first, so the outline is not cut off at the border
+    Input arguments: PIL image or array of RGBA pixels, RGB colour, padding in pixels, RGBA outline colour,
+    outline thickness in pixels
+    Returns a new RGBA image
+    '''
+    pixels = np.pad(rgba_array(img), ((padding_width, padding_width), (padding_width, padding_width), (0, 0)))
+
+    new_pixels = draw_outlined(light_mask(pixels), tuple(target_colour) + (255,), outline_colour, outline_thickness)
+    return Image.fromarray(new_pixels, 'RGBA')
+
+
+def palette_image(img):
+    '''
+    Function to convert an RGBA image with at most 256 distinct colours to a palette image without losing any colour
+    The alpha of each palette entry is kept in the transparency of the image
+    Input arguments: PIL image
+    Returns the palette image, or None when the image has more than 256 colours
+    '''
+    pixels = np.ascontiguousarray(rgba_array(img))
+    # viewing each RGBA pixel as one 32 bit number, so the distinct colours can be found with a flat unique
+    packed = pixels.view(np.uint32).reshape(-1)
+    colours, indices = np.unique(packed, return_inverse=True)
+    if len(colours) > 256:
+        return None
+    colours = colours.view(np.uint8).reshape(-1, 4)
+    paletted = Image.fromarray(indices.reshape(pixels.shape[:2]).astype(np.uint8), 'P')
+    paletted.putpalette(colours[:, :3].tobytes())
+    paletted.info['transparency'] = colours[:, 3].tobytes()
+    return paletted
+
+
+def encode_image(img, image_format='png'):
+    '''
+    Function to encode an image as small as possible without changing any pixel
+    PNGs are written as palette images when possible and optimised, WebPs are written lossless
+    Input arguments: PIL image, 'png' or 'webp'
+    Returns the encoded bytes and the mime type
+    '''
+    buffer = BytesIO()
+    if image_format == 'webp':
+        img.save(buffer, format='webp', lossless=True, quality=100, method=6)
+        return buffer.getvalue(), 'image/webp'
+    paletted = palette_image(img)
+    if paletted is not None:
+        paletted.save(buffer, format='png', optimize=True, transparency=paletted.info['transparency'])
+    else:
+        img.save(buffer, format='png', optimize=True)
+    return buffer.getvalue(), 'image/png'
+
+
+class DataUriCache:
+    '''
+    A cache of encoded data URIs keyed by a hash of the image content, so each distinct image is only encoded once
+    '''
+
+    def __init__(self, image_format='png'):
+        self.image_format = image_format
+        self.hits = 0
+        self.misses = 0
+        self._uris = {}
+
+    def content_key(self, img):
+        '''
+        Function to hash the size, mode and pixels of an image
+        Input arguments: PIL image
+        Returns the hex digest
+        '''
+        sha = hashlib.sha256('{}|{}|{}'.format(img.mode, img.size, self.image_format).encode())
+        sha.update(img.tobytes())
+        return sha.hexdigest()
+
+    def data_uri(self, img):
+        '''
+        Function to get the data URI of an image, encoding it the first time its content is seen
+        Input arguments: PIL image
+        Returns the data URI as a string
+        '''
+        key = self.content_key(img)
+        uri = self._uris.get(key)
+        if uri is not None:
+            self.hits += 1
+            return uri
+        self.misses += 1
+        data, mime_type = encode_image(img, self.image_format)
+        uri = 'data:{};base64,{}'.format(mime_type, base64.b64encode(data).decode('ascii'))
+        self._uris[key] = uri
+        return uri
+
+    def __len__(self):
+        return len(self._uris)
+
+
+# a single cache for the process, used for every layout image
+data_uri_cache = DataUriCache(config.IMAGE_FORMAT)
+
+
+# bumped whenever the rendered insets change in a way the hash of this file does not show
+INSET_FORMAT = 1
+
+
+def inset_code_version():
+    '''
+    Function to fingerprint the code rendering the insets, so a deploy changing it renders them again instead of
+    reusing the bank rendered by the old code
+    Returns a short hex digest
+    '''
+    sha = hashlib.sha1(str(INSET_FORMAT).encode())
+    with open(os.path.abspath(__file__), 'rb') as f:
+        sha.update(f.read())
+    return sha.hexdigest()[:10]
+
+
+# functions to render each inset from its source pixels and a colour
+INSET_RENDERERS = {
+    'seychelles': recolour_seychelles,
+    'mauritius': recolour_mauritius,
+}
+
+
+def render_inset_uri(name, colour):
+    '''
+    Function to render an inset in a colour and encode it, run in the worker processes of the inset bank
+    Input arguments: name of the inset, RGB colour
+    Returns the data URI
+    '''
+    return data_uri_cache.data_uri(INSET_RENDERERS[name](inset_pixels(name), colour))
+
+
+def inset_colours(df, year_index):
+    '''
+    Function to find the colour of every inset in every year
+    Input arguments: dataframe sorted by year, year index
+    Returns a dictionairy of (inset name, year) to RGB colour
+    '''
+    colours = {}
+    for year, (start, stop) in year_index.items():
+        block = df.iloc[start:stop]
+        for name, country in INSET_COUNTRIES.items():
+            values = block.loc[block['Country'] == country, 'GDP per Capita']
+            if len(values):
+                colours[(name, year)] = inset_colour(values.iloc[0])
+    return colours
+
+
+def render_insets(jobs, workers):
+    '''
+    Function to render a list of (inset name, colour) jobs, in a process pool when there is more than one worker
+    The pool uses fork, so the workers don't re-import the app. Forking is only safe from a process running a single
+    thread (such as the gunicorn master loading the app), a fork taken while other threads hold locks (the threads of
+    a gunicorn worker, a request, the thread reloading the dataset) can leave the workers stuck on them, so otherwise
+    or without fork the insets are rendered here
+    Input arguments: list of (inset name, colour), number of worker processes
+    Returns a list of data URIs in the same order as the jobs
+    '''
+    single_threaded = threading.active_count() == 1
+    if workers > 1 and len(jobs) > 1 and single_threaded and 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            return list(pool.map(render_inset_uri, *zip(*jobs)))
+    return [render_inset_uri(name, colour) for name, colour in jobs]
+
+
+def build_inset_bank(df, year_index, version, workers=None, directory=None):
+    '''
+    Function to render the inset images for every (inset, year) once, reusing the copy on disk when there is one
+    Each distinct (inset, colour) is only rendered once
+    Input arguments: dataframe sorted by year, year index, dataset version, number of worker processes,
+    folder to keep the rendered insets in (None to keep them in memory only)
+    Returns a dictionairy of (inset name, year) to data URI
+    '''
+    name = 'insets-{}-{}-{}.json'.format(version, inset_code_version(), config.IMAGE_FORMAT)
+    path = os.path.join(directory, name) if directory else None
+    if path and os.path.exists(path):
+        try:
+            with open(path) as f:
+                return {(name, int(year)): uri for name, year, uri in json.load(f)}
+        except (OSError, ValueError):
+            pass
+
+    colours = inset_colours(df, year_index)
+    jobs = sorted(set((name, colour) for (name, _), colour in colours.items()))
+    uris = dict(zip(jobs, render_insets(jobs, workers or os.cpu_count() or 1)))
+    bank = {key: uris[(key[0], colour)] for key, colour in colours.items()}
+
+    if path:
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(path + '.tmp', 'w') as f:
+                json.dump([[name, year, uri] for (name, year), uri in sorted(bank.items())], f)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            pass
+    return bank
+
+
+def remove_old_inset_banks(directory, keep):
+    '''
+    Function to delete the inset banks rendered for versions of the dataset other than the ones kept
+    Input arguments: folder the inset banks are kept in, versions of the dataset to keep
+    '''
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if name.startswith('insets-') and name.split('-')[1] not in keep:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+if __name__ == '__main__':
+    # building the inset bank ahead of time, run with: python -m dashboard.images
+    from dashboard.data import data_version, df, year_index
+    bank = build_inset_bank(df, year_index, data_version, config.INSET_WORKERS, config.INSET_BANK_DIR)
+    print('built {} inset images'.format(len(bank)))
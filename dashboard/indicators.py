@@ -0,0 +1,215 @@
+'''
+A panel of indicators stored by column and partitioned by indicator, so a process only loads the indicators it uses.
+
+The World Bank development indicators have thousands of indicators for hundreds of countries over 60+ years, far
+more than fits in one dataframe. Here the columns identifying the rows (country, code, year...) are kept in one
+column store file (see dashboard/store.py), and each indicator in a file of its own holding one value per row, in
+the same order. An indicator is only mapped the first time it is asked for, and the mapped files are shared by
+every process serving the app.
+
+A panel folder is never changed once written, a new version of the data is written to a new folder. A folder of
+panels (such as the one written each night by python -m dashboard.ingest) has a 'current' file naming the folder of
+the latest version.
+
+Layout of a panel folder:
+    manifest.json             format, metadata, key columns and the file of each indicator, written last
+    keys.col                  the key columns of every row, sorted by year
+    indicators/<name>.col     one file per indicator, with a 'value' column in the order of keys.col
+'''
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dashboard.store import open_store, write_store
+
+PANEL_FORMAT = 1
+MANIFEST = 'manifest.json'
+KEYS_FILE = 'keys.col'
+INDICATOR_DIR = 'indicators'
+CURRENT_FILE = 'current'
+
+# columns identifying the rows, every other column of a dataset is an indicator stored in a file of its own
+KEY_COLUMNS = ['ID', 'Year', 'Country', 'Continent', 'Code']
+
+# key columns holding text, dictionary encoded, everything else is stored as a numeric array
+STRING_COLUMNS = ['Country', 'Continent', 'Code']
+
+
+def indicator_file(name):
+    '''
+    Function to name the file of an indicator, readable and unique whatever characters the name has
+    Input arguments: name of the indicator
+    Returns the file name
+    '''
+    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')[:60]
+    return '{}-{}.col'.format(slug, hashlib.sha1(name.encode()).hexdigest()[:8])
+
+
+def write_panel(directory, keys, indicators, meta, text_columns, columns=None):
+    '''
+    Function to write a panel folder, one indicator at a time so only one needs to be in memory
+    The manifest is written last, so a folder is only read once every file in it is complete
+    Input arguments: path of the folder, dataframe of the key columns sorted by year, iterable of (name, array of
+    values in the order of the keys), dictionairy of metadata, names of the key columns holding text, order of the
+    columns when the panel is read back as a dataframe (the key columns then the indicators by default)
+    Returns list of the names of the indicators written
+    '''
+    os.makedirs(os.path.join(directory, INDICATOR_DIR), exist_ok=True)
+    write_store(keys, os.path.join(directory, KEYS_FILE), {}, text_columns)
+
+    files = {}
+    for name, values in indicators:
+        values = np.asarray(values)
+        if len(values) != len(keys):
+            raise ValueError('indicator {!r} has {} values for {} rows'.format(name, len(values), len(keys)))
+        files[name] = indicator_file(name)
+        write_store(pd.DataFrame({'value': values}), os.path.join(directory, INDICATOR_DIR, files[name]),
+                    {'indicator': name}, ())
+
+    manifest = {'format': PANEL_FORMAT, 'meta': meta, 'rows': len(keys), 'keys': list(keys.columns),
+                'columns': list(columns) if columns is not None else list(keys.columns) + list(files),
+                'indicators': files}
+    tmp_path = os.path.join(directory, MANIFEST + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST))
+    return list(files)
+
+
+class IndicatorPanel:
+    '''
+    A panel of indicators, with the key columns loaded up front and each indicator loaded the first time it is used
+    '''
+
+    def __init__(self, keys, names, load, columns=None, meta=None):
+        self.keys = keys
+        self.names = list(names)
+        self._name_set = frozenset(self.names)
+        self.columns = list(columns) if columns is not None else list(keys.columns) + self.names
+        self.meta = meta or {}
+        self._load = load
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self._name_set
+
+    @property
+    def loaded(self):
+        return list(self._loaded)
+
+    def column(self, name):
+        '''
+        Function to get the values of an indicator, loading it on first use
+        Input arguments: name of the indicator
+        Returns read-only numpy array in the order of the keys
+        '''
+        values = self._loaded.get(name)
+        if values is None:
+            if name not in self:
+                raise KeyError(name)
+            with self._lock:
+                # another thread may have loaded it while this one waited
+                values = self._loaded.get(name)
+                if values is None:
+                    values = self._loaded[name] = self._load(name)
+        return values
+
+    def frame(self, names):
+        '''
+        Function to build a dataframe of the key columns and some of the indicators, without copying them
+        Input arguments: names of the indicators
+        Returns the dataframe, with its columns in the order of the panel
+        '''
+        columns = {column: self.keys[column] for column in self.keys.columns}
+        columns.update((name, self.column(name)) for name in names)
+        order = [column for column in self.columns if column in columns]
+        return pd.DataFrame({column: columns[column] for column in order}, copy=False)
+
+
+def open_panel(directory):
+    '''
+    Function to open a panel folder, mapping its key columns and reading the list of its indicators
+    Input arguments: path of the folder
+    Returns the panel, or None if the folder holds no complete panel
+    '''
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('format') != PANEL_FORMAT:
+        return None
+    keys, _ = open_store(os.path.join(directory, KEYS_FILE))
+    if keys is None:
+        return None
+
+    def load(name):
+        values, _ = open_store(os.path.join(directory, INDICATOR_DIR, manifest['indicators'][name]))
+        if values is None:
+            raise OSError('the file of indicator {!r} in {} can not be read'.format(name, directory))
+        return values['value'].to_numpy()
+
+    return IndicatorPanel(keys, manifest['indicators'], load, manifest['columns'], manifest['meta'])
+
+
+def current_panel_dir(directory):
+    '''
+    Function to find the panel folder to serve from a folder, which is either a panel or a folder of panels
+    Input arguments: path of the folder
+    Returns path of the panel folder, the latest version named in the 'current' file of a folder of panels
+    '''
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            return os.path.join(directory, f.read().strip())
+    except OSError:
+        return directory
+
+
+def set_current_panel(directory, name):
+    '''
+    Function to mark a panel as the latest version in a folder of panels, replacing the 'current' file in one step
+    Input arguments: path of the folder of panels, name of the panel folder inside it
+    '''
+    tmp_path = os.path.join(directory, CURRENT_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(name)
+    os.replace(tmp_path, os.path.join(directory, CURRENT_FILE))
+
+
+def remove_panels(directory, keep):
+    '''
+    Function to delete the panels in a folder of panels other than the ones kept
+    Only complete panels (with a manifest) are deleted, so a panel still being written by another process is left
+    Input arguments: path of the folder of panels, names of the panel folders to keep
+    '''
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if name not in keep and os.path.exists(os.path.join(directory, name, MANIFEST)):
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def frame_panel(df, key_columns, meta=None):
+    '''
+    Function to wrap a dataframe already in memory as a panel, used when the panel can't be written to disk
+    The columns are copied into read-only arrays, so the shared frame can't be edited in place
+    Input arguments: dataframe sorted by year, names of the key columns, dictionairy of metadata
+    Returns the panel
+    '''
+    arrays = {}
+    for column in df.columns:
+        array = df[column].to_numpy(copy=True)
+        array.flags.writeable = False
+        arrays[column] = array
+    keys = pd.DataFrame({column: arrays[column] for column in key_columns}, copy=False)
+    names = [column for column in df.columns if column not in key_columns]
+    return IndicatorPanel(keys, names, arrays.__getitem__, list(df.columns), meta)
@@ -0,0 +1,234 @@
+'''
+Command line pipeline turning raw exports into the dataset of the app, replacing african_data_formating.ipynb.
+
+Run from the root of the repository (no Jupyter kernel needed, so it can run in a nightly batch) with:
+    python -m dashboard.ingest data_africa.csv [more exports] [--panel folder] [--csv africa_economics_v2.csv]
+
+The exports are read in chunks, so their size is not limited by memory. Each chunk is normalized:
+    - spaces around the column names are removed ('Population ' becomes 'Population') and the names used by
+      World Bank exports are renamed to the names the app uses
+    - values written as '..' (how World Bank exports mark missing values) are read as missing
+    - the GDP the notebook filled in by hand (Sao Tome and Principe, from the World Bank) is filled in
+    - the ISO code of each country is looked up and the GDP per capita is derived, for the whole chunk at once
+and each of its columns is appended to a file of its own in a temporary folder. Once every chunk is read, the rows
+are ordered by year and the columns are written one at a time as a panel of indicators (see dashboard/indicators.py),
+so memory only ever holds one chunk or one column.
+
+Each panel is written to a folder named after the hash of the exports, inside the --panel folder, and marked as the
+current one, so the app serves it with DASHBOARD_PANEL_DIR set to the --panel folder. Running the pipeline again on
+unchanged exports leaves the panel as it is. Only the new panel and the one it replaces (which the app may still be
+serving until it swaps in the new one) are kept, older panels are deleted.
+'''
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from dashboard.config import CACHE_DIR
+from dashboard.indicators import (KEY_COLUMNS, MANIFEST, STRING_COLUMNS, current_panel_dir, remove_panels,
+                                  set_current_panel, write_panel)
+
+# rows read from the exports at a time
+CHUNK_ROWS = 100000
+
+# names used by World Bank exports for the columns the app uses
+COLUMN_ALIASES = {'Country Name': 'Country', 'Country Code': 'Code', 'Time': 'Year'}
+
+# how missing values are written in World Bank exports, on top of the empty cells pandas reads as missing
+MISSING_VALUES = ['..']
+
+# creating a dictionairy with the country and country codes
+COUNTRY_CODES = {
+    'Uganda': 'UGA', 'Burundi': 'BDI', 'Djibouti': 'DJI', 'Zambia': 'ZMB', 'Zimbabwe': 'ZWE', 'Kenya': 'KEN',
+    'Comoros': 'COM', 'Mauritius': 'MUS', 'Madagascar': 'MDG', 'Mayotte': 'MYT', 'Malawi': 'MWI', 'Mozambique': 'MOZ',
+    'Reunion': 'REU', 'Rwanda': 'RWA', 'Seychelles': 'SYC', 'Somalia': 'SOM', 'Tanzania': 'TZA', 'Eritrea': 'ERI',
+    'Ethiopia': 'ETH', 'South Sudan': 'SSD', 'Sudan': 'SDN', 'Algeria': 'DZA', 'Egypt': 'EGY', 'SADR': 'ESH',
+    'Libya': 'LBY', 'Morocco': 'MAR', 'Tunisia': 'TUN', 'Botswana': 'BWA', 'Lesotho': 'LSO', 'Namibia': 'NAM',
+    'Eswatini': 'SWZ', 'South Africa': 'ZAF', 'Angola': 'AGO', 'Gabon': 'GAB', 'Cameroon': 'CMR',
+    'Democratic Republic of the Congo': 'COD', 'Republic of the Congo': 'COG', 'Sao Tome and Principe': 'STP',
+    'Central African Republic': 'CAF', 'Chad': 'TCD', 'Equatorial Guinea': 'GNQ', 'Benin': 'BEN', 'Burkina Faso': 'BFA',
+    'Gambia': 'GMB', 'Ghana': 'GHA', 'Guinea': 'GIN', 'Guinea-Bissau': 'GNB', 'Cape Verde': 'CPV', 'Ivory Coast': 'CIV',
+    'Liberia': 'LBR', 'Mauritania': 'MRT', 'Mali': 'MLI', 'Niger': 'NER', 'Nigeria': 'NGA',
+    'Saint Helena, Ascension and Tristan da Cunha': 'SHN', 'Senegal': 'SEN', 'Sierra Leone': 'SLE', 'Togo': 'TGO'
+}
+
+# code given to the countries missing from the dictionairy above
+MISSING_CODE = 'Not available'
+
+# GDP (USD) missing from the exports, by country and year, source world bank
+GDP_CORRECTIONS = {
+    'Sao Tome and Principe': dict(zip(range(2001, 2023), [
+        75951133.38, 85171073.88, 102085769.12, 114582283.9, 136450662.4, 142775104.1, 149146918.9, 188021165,
+        200668065, 190021192.5, 226455001.2, 229371348.2, 267041747.6, 293119143.2, 259999643, 292267272.2,
+        322002845.2, 383717327.8, 412976064.5, 471229484.6, 524402450.8, 542686976.5])),
+}
+
+
+def normalize_chunk(chunk):
+    '''
+    Function to bring a chunk of an export to the schema of the app
+    Input arguments: dataframe of rows read from an export
+    Returns the dataframe, with the columns renamed, the GDP filled in, the Code and GDP per Capita columns added
+    '''
+    chunk = chunk.rename(columns=lambda column: COLUMN_ALIASES.get(column.strip(), column.strip()))
+
+    if 'GDP (USD)' in chunk.columns:
+        for country, corrections in GDP_CORRECTIONS.items():
+            corrected = chunk['Year'].map(corrections)
+            rows = (chunk['Country'] == country).to_numpy() & corrected.notna().to_numpy()
+            if rows.any():
+                chunk['GDP (USD)'] = chunk['GDP (USD)'].astype(float).mask(rows, corrected)
+
+    if 'Code' not in chunk.columns:
+        chunk['Code'] = chunk['Country'].map(COUNTRY_CODES).fillna(MISSING_CODE)
+
+    if 'GDP per Capita' not in chunk.columns and {'GDP (USD)', 'Population'} <= set(chunk.columns):
+        chunk['GDP per Capita'] = chunk['GDP (USD)'] / chunk['Population']
+    return chunk
+
+
+def exports_hash(paths):
+    '''
+    Function to hash the content of the exports, reading them in blocks
+    Input arguments: list of paths to the exports
+    Returns the hex digest
+    '''
+    sha = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+    return sha.hexdigest()
+
+
+class ColumnSpill:
+    '''
+    The columns of every chunk read so far, appended to one file per column so they do not need to fit in memory
+    Text columns are kept as codes into a dictionairy of their distinct values, and numbers as 64 bit floats,
+    turned back into integers at the end when every chunk held integers
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.columns = None
+        self.rows = 0
+        self._dictionaries = {}
+        self._integer = {}
+
+    def _path(self, column):
+        return os.path.join(self.directory, '{}.bin'.format(self.columns.index(column)))
+
+    def append(self, chunk):
+        '''
+        Function to append the columns of a chunk to their files
+        Input arguments: normalized dataframe
+        '''
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self._integer = {column: True for column in self.columns}
+        elif list(chunk.columns) != self.columns:
+            raise ValueError('the exports have different columns: {} and {}'.format(self.columns, list(chunk.columns)))
+
+        for column in self.columns:
+            if column in STRING_COLUMNS:
+                # the codes of this chunk are mapped to the codes of the whole dataset, missing text is -1
+                codes, uniques = pd.factorize(chunk[column])
+                dictionary = self._dictionaries.setdefault(column, {})
+                mapping = np.array([dictionary.setdefault(value, len(dictionary)) for value in uniques] + [-1], dtype=np.int32)
+                values = mapping[codes]
+            else:
+                numbers = pd.to_numeric(chunk[column], errors='coerce')
+                self._integer[column] &= numbers.dtype.kind in 'iu'
+                values = numbers.to_numpy(dtype=np.float64)
+            with open(self._path(column), 'ab') as f:
+                values.tofile(f)
+        self.rows += len(chunk)
+
+    def read(self, column, order):
+        '''
+        Function to read a whole column back, with its rows in a new order
+        Input arguments: name of the column, array of row positions
+        Returns pandas categorical for text, numpy array of integers or floats for numbers
+        '''
+        if column in STRING_COLUMNS:
+            codes = np.fromfile(self._path(column), dtype=np.int32)[order]
+            return pd.Categorical.from_codes(codes, categories=list(self._dictionaries[column]))
+        values = np.fromfile(self._path(column), dtype=np.float64)[order]
+        if self._integer[column] and not np.isnan(values).any():
+            return values.astype(np.int64)
+        return values
+
+
+def mark_current(panel_root, name):
+    '''
+    Function to mark a panel as the current one and delete the panels older than the one it replaces
+    Input arguments: folder of panels, name of the panel folder
+    '''
+    previous = os.path.basename(current_panel_dir(panel_root))
+    set_current_panel(panel_root, name)
+    remove_panels(panel_root, {name, previous})
+
+
+def ingest(paths, panel_root, csv_path=None, chunk_rows=CHUNK_ROWS):
+    '''
+    Function to read raw exports in chunks and write them as a panel of indicators, and optionally as a csv file
+    Input arguments: list of paths to the exports, folder of panels, path of the csv file to write (None to skip),
+    rows to read at a time
+    Returns path of the panel folder
+    '''
+    sha = exports_hash(paths)
+    name = 'panel-{}'.format(sha[:12])
+    directory = os.path.join(panel_root, name)
+    if os.path.exists(os.path.join(directory, MANIFEST)) and csv_path is None:
+        print('{} is already ingested in {}'.format(', '.join(paths), directory))
+        mark_current(panel_root, name)
+        return directory
+
+    os.makedirs(panel_root, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=panel_root) as spill_dir:
+        spill = ColumnSpill(spill_dir)
+        header = True
+        for path in paths:
+            for chunk in pd.read_csv(path, chunksize=chunk_rows, na_values=MISSING_VALUES):
+                chunk = normalize_chunk(chunk)
+                if 'Year' not in chunk.columns or 'Country' not in chunk.columns:
+                    raise ValueError('{} has no Year or Country column'.format(path))
+                spill.append(chunk)
+                if csv_path is not None:
+                    chunk.to_csv(csv_path + '.tmp', mode='w' if header else 'a', header=header, index=False)
+                    header = False
+        if csv_path is not None:
+            os.replace(csv_path + '.tmp', csv_path)
+        print('read {:,} rows of {} columns'.format(spill.rows, len(spill.columns)))
+
+        if not os.path.exists(os.path.join(directory, MANIFEST)):
+            # ordering the rows by year, keeping the order of the exports within a year, as the app does
+            order = np.argsort(spill.read('Year', slice(None)), kind='stable')
+            keys = pd.DataFrame({column: spill.read(column, order) for column in spill.columns if column in KEY_COLUMNS})
+            indicators = [column for column in spill.columns if column not in KEY_COLUMNS]
+            write_panel(directory, keys, ((column, spill.read(column, order)) for column in indicators),
+                        {'sha256': sha, 'sources': [os.path.basename(path) for path in paths]},
+                        STRING_COLUMNS, spill.columns)
+            print('wrote {} indicators to {}'.format(len(indicators), directory))
+    mark_current(panel_root, name)
+    return directory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingest raw exports into the dataset of the dashboard')
+    parser.add_argument('exports', nargs='+', help='csv exports to read, with a row per country and year')
+    parser.add_argument('--panel', default=os.path.join(CACHE_DIR, 'panels'),
+                        help='folder of panels to write to, serve it with DASHBOARD_PANEL_DIR')
+    parser.add_argument('--csv', help='also write the normalized rows to this csv file')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='rows to read at a time')
+    args = parser.parse_args(argv)
+    ingest(args.exports, args.panel, args.csv, args.chunk_rows)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+# importing libraries
+import threading
+
+from dashboard import config
+from dashboard.data import current_data, on_reload
+
+
+def deferred(build):
+    '''
+    Function to wrap work that is only needed once for each version of the dataset, such as building a figure or a
+    layout. With DASHBOARD_LAZY_PAGES the work is done on the first call, otherwise it is done straight away, and
+    again for each new version of the dataset before it is swapped in
+    Input arguments: function without arguments
+    Returns function without arguments that returns the result of the work, only doing it once for each version
+    '''
+    lock = threading.Lock()
+    results = {}
+
+    def get():
+        version = current_data().version
+        if version not in results:
+            with lock:
+                # another request may have finished the work while this one waited
+                if version not in results:
+                    # keeping the previous version too, requests may still be answered from it during a swap
+                    for old_version in list(results)[:-1]:
+                        del results[old_version]
+                    results[version] = build()
+        return results[version]
+
+    if not config.LAZY_PAGES:
+        get()
+        on_reload(get)
+    return get
+
+
+def page_layout(build):
+    '''
+    Function to give dash the layout of a page, as a function dash calls when the page is visited, so a page shows
+    the version of the dataset being served. The layout is built once for each version, at startup or on the first
+    visit with DASHBOARD_LAZY_PAGES
+    Input arguments: function without arguments that builds the layout
+    Returns the function dash calls for the layout
+    '''
+    get = deferred(build)
+
+    # dash passes the query string of the url as keyword arguments, the layout does not use them
+    def layout(**kwargs):
+        return get()
+    return layout
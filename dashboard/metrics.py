@@ -0,0 +1,183 @@
+# importing libraries
+import bisect
+import threading
+import time
+
+from flask import Response, g, request
+
+CALLBACK_PATH = '/_dash-update-component'
+LAYOUT_PATH = '/_dash-layout'
+
+# upper bounds of the histogram buckets, in seconds and in bytes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# the callback names come from the requests, so the number kept apart is limited and the rest are counted as 'other'
+MAX_CALLBACKS = 200
+
+
+class Histogram:
+    '''
+    A Prometheus style histogram, counting the observations at or below each bucket bound
+    '''
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last count is for observations above every bound
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        '''
+        Function to write the histogram in the Prometheus text format
+        Input arguments: name of the metric, formatted labels without the braces
+        Returns list of lines
+        '''
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, cumulative))
+        lines.append('{}_sum{{{}}} {}'.format(name, labels, self.total))
+        lines.append('{}_count{{{}}} {}'.format(name, labels, self.count))
+        return lines
+
+
+def label_value(value):
+    # escaping the characters the text format does not allow inside a label value
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def callback_name(body):
+    '''
+    Function to name the callback of a request by its outputs, so every callback is measured without registering it
+    Input arguments: the decoded JSON body of the request
+    Returns the outputs joined by commas, such as 'histogram-chart.figure,bar-chart.figure'
+    '''
+    if isinstance(body, dict) and isinstance(body.get('outputs'), list):
+        return ','.join('{}.{}'.format(output.get('id'), output.get('property')) for output in body['outputs']
+                        if isinstance(output, dict))
+    if isinstance(body, dict) and isinstance(body.get('outputs'), dict):
+        return '{}.{}'.format(body['outputs'].get('id'), body['outputs'].get('property'))
+    return 'unknown'
+
+
+class Metrics:
+    '''
+    Latency, response size and error counts of the dash callbacks and the layout route, together with the hit
+    counts of the caches, kept in memory and served in the Prometheus text format
+    '''
+
+    def __init__(self):
+        self._latency = {}
+        self._sizes = {}
+        self._errors = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def register_cache(self, name, cache):
+        '''
+        Function to include a cache in the metrics
+        Input arguments: name of the cache, object with hits and misses counters
+        '''
+        self._caches[name] = cache
+
+    def observe(self, route, callback, seconds, nbytes=None, error=False):
+        '''
+        Function to record a request
+        Input arguments: 'callback' or 'layout', name of the callback ('' for the layout), time taken in seconds,
+        size of the response body in bytes, whether the request failed
+        '''
+        key = (route, callback)
+        with self._lock:
+            if key not in self._latency and len(self._latency) >= MAX_CALLBACKS:
+                key = (route, 'other')
+            if key not in self._latency:
+                self._latency[key] = Histogram(LATENCY_BUCKETS)
+                self._sizes[key] = Histogram(SIZE_BUCKETS)
+                self._errors[key] = 0
+            self._latency[key].observe(seconds)
+            if nbytes is not None:
+                self._sizes[key].observe(nbytes)
+            if error:
+                self._errors[key] += 1
+
+    def render(self):
+        '''
+        Function to write every metric in the Prometheus text format
+        Returns the text
+        '''
+        lines = []
+        with self._lock:
+            keys = sorted(self._latency)
+            lines += ['# HELP dashboard_request_duration_seconds Time taken to answer dash callbacks and the layout route.',
+                      '# TYPE dashboard_request_duration_seconds histogram']
+            for route, callback in keys:
+                lines += self._latency[route, callback].lines(
+                    'dashboard_request_duration_seconds', 'route="{}",callback="{}"'.format(route, label_value(callback)))
+            lines += ['# HELP dashboard_response_bytes Size of the response bodies sent, after any compression.',
+                      '# TYPE dashboard_response_bytes histogram']
+            for route, callback in keys:
+                lines += self._sizes[route, callback].lines(
+                    'dashboard_response_bytes', 'route="{}",callback="{}"'.format(route, label_value(callback)))
+            lines += ['# HELP dashboard_request_errors_total Requests that failed with an exception or a server error.',
+                      '# TYPE dashboard_request_errors_total counter']
+            for route, callback in keys:
+                lines.append('dashboard_request_errors_total{{route="{}",callback="{}"}} {}'.format(
+                    route, label_value(callback), self._errors[route, callback]))
+
+        lines += ['# HELP dashboard_cache_hits_total Lookups answered by a cache.',
+                  '# TYPE dashboard_cache_hits_total counter']
+        lines += ['dashboard_cache_hits_total{{cache="{}"}} {}'.format(name, cache.hits) for name, cache in self._caches.items()]
+        lines += ['# HELP dashboard_cache_misses_total Lookups a cache could not answer.',
+                  '# TYPE dashboard_cache_misses_total counter']
+        lines += ['dashboard_cache_misses_total{{cache="{}"}} {}'.format(name, cache.misses) for name, cache in self._caches.items()]
+        lines += ['# HELP dashboard_cache_hit_ratio Share of the lookups answered by a cache since the server started.',
+                  '# TYPE dashboard_cache_hit_ratio gauge']
+        for name, cache in self._caches.items():
+            lookups = cache.hits + cache.misses
+            lines.append('dashboard_cache_hit_ratio{{cache="{}"}} {}'.format(name, cache.hits / lookups if lookups else 0.0))
+        return '\n'.join(lines) + '\n'
+
+    def init_app(self, server, path='/metrics'):
+        '''
+        Function to add the hooks timing the requests and the route serving the metrics to the flask server of the app
+        The hooks have to be added before any hook that can answer a request early, such as the payload store
+        Input arguments: flask server, path of the metrics route
+        '''
+        @server.before_request
+        def start_timer():
+            if request.path.endswith(CALLBACK_PATH):
+                g.metrics_request = ('callback', callback_name(request.get_json(silent=True)), time.perf_counter())
+            elif request.path.endswith(LAYOUT_PATH):
+                g.metrics_request = ('layout', '', time.perf_counter())
+
+        @server.after_request
+        def record_response(response):
+            measured = g.pop('metrics_request', None)
+            if measured is not None:
+                route, callback, start = measured
+                nbytes = None if response.direct_passthrough else response.calculate_content_length()
+                self.observe(route, callback, time.perf_counter() - start, nbytes, error=response.status_code >= 500)
+            return response
+
+        # an exception the app does not handle skips the after_request hooks, so it is counted here
+        @server.teardown_request
+        def record_exception(exception):
+            measured = g.pop('metrics_request', None)
+            if measured is not None and exception is not None:
+                route, callback, start = measured
+                self.observe(route, callback, time.perf_counter() - start, error=True)
+
+        @server.route(path)
+        def serve_metrics():
+            return Response(self.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# a single set of metrics for the app
+metrics = Metrics()
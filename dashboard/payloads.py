@@ -0,0 +1,224 @@
+# importing libraries
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+import dash
+import plotly
+from flask import Response, g, request
+
+from dashboard import config
+from dashboard.cache import FigureCache
+from dashboard.compression import compressor
+from dashboard.data import current_data, on_swap
+
+CALLBACK_PATH = '/_dash-update-component'
+
+# bumped whenever the stored responses change in a way the hash of the code below does not show
+PAYLOAD_FORMAT = 1
+
+# the code building the stored responses, a deploy changing any of it stores new responses instead of serving the
+# ones built by the old code
+FIGURE_SOURCES = ['dashboard/data.py', 'dashboard/figures.py', 'dashboard/aggregation.py', 'dashboard/images.py',
+                  'pages/page1.py', 'pages/page3.py']
+
+
+def code_version(paths=FIGURE_SOURCES):
+    '''
+    Function to fingerprint the code building the stored responses, together with the payload format and the
+    versions of dash and plotly, which decide how the figures are serialized
+    Input arguments: paths of the source files, from the root of the repository
+    Returns a short hex digest
+    '''
+    sha = hashlib.sha1('{}|{}|{}'.format(PAYLOAD_FORMAT, dash.__version__, plotly.__version__).encode())
+    for path in paths:
+        with open(os.path.join(config.ROOT_DIR, path), 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()[:10]
+
+
+def payload_size(payload):
+    '''
+    Function to measure the memory taken by a payload
+    Input arguments: dictionairy of encoding to bytes
+    Returns the size in bytes of every encoding kept
+    '''
+    return sum(len(body) for body in payload.values())
+
+
+class PayloadStore:
+    '''
+    A store of the final JSON responses of year slider callbacks, kept serialized and compressed
+    Responses are keyed by (dataset version, code version, page, outputs, year, other inputs, patch) and can be
+    persisted to disk to survive restarts, the code version keeps the responses of an older deploy from being served.
+    In memory they are kept in a least recently used cache with a byte budget, as a panel can have thousands of
+    metrics; once a new version of the dataset is swapped in, the responses of the old one are no longer asked for
+    and are evicted as the cache fills, and the old version's folder on disk is no longer read.
+    The first render of a page and a change of the other inputs (such as the metric selector) get whole figures, and
+    moves of the year slider get patches, so they are stored apart
+    '''
+
+    def __init__(self, directory=None, code=None, max_bytes=config.PAYLOAD_CACHE_BYTES):
+        self.directory = directory
+        self.code = code or code_version()
+        self.hits = 0
+        self.misses = 0
+        self._callbacks = {}
+        self._payloads = FigureCache(max_bytes)
+
+    def register(self, page, outputs, input_id, other_inputs=()):
+        '''
+        Function to mark a callback as cacheable, its response must only depend on the value of its inputs
+        Input arguments: name of the page, list of 'id.property' outputs, id of the input holding the year, ids of
+        the other inputs, whose values must be strings or numbers
+        '''
+        self._callbacks[tuple(outputs)] = (page, input_id, tuple(other_inputs))
+
+    def key_for(self, body):
+        '''
+        Function to build the key of a callback request
+        Input arguments: the decoded JSON body of the request
+        Returns the key, or None if the request is not for a registered callback
+        '''
+        if not isinstance(body, dict) or not isinstance(body.get('outputs'), list):
+            return None
+        outputs = tuple('{}.{}'.format(output.get('id'), output.get('property')) for output in body['outputs'])
+        if outputs not in self._callbacks:
+            return None
+        page, input_id, other_inputs = self._callbacks[outputs]
+        values = {callback_input.get('id'): callback_input.get('value') for callback_input in body.get('inputs') or []
+                  if isinstance(callback_input, dict)}
+        year = values.get(input_id)
+        others = tuple(values.get(other) for other in other_inputs)
+        if not isinstance(year, int) or not all(isinstance(value, (str, int, float)) for value in others):
+            return None
+        # dash sends no changed props when the callback runs for the first render of the page, the callbacks only
+        # answer with a patch when the year slider is the one input that changed
+        patch = body.get('changedPropIds') == ['{}.value'.format(input_id)]
+        return current_data().version, self.code, page, outputs, year, others, patch
+
+    def _file_path(self, key):
+        version, code, page, outputs, year, others, patch = key
+        outputs_hash = hashlib.sha1('|'.join(outputs).encode()).hexdigest()[:10]
+        name = '{}-{}-{}'.format(page, outputs_hash, year)
+        if others:
+            name += '-' + hashlib.sha1(json.dumps(others).encode()).hexdigest()[:10]
+        name += '-patch.json.gz' if patch else '.json.gz'
+        # the figures depend on the code and the render profile, so each of them keeps its own payloads
+        return os.path.join(self.directory, version, '{}-{}'.format(code, config.RENDER_PROFILE), name)
+
+    def get(self, key):
+        '''
+        Function to look up a payload in memory, falling back to the copy on disk
+        Input arguments: key
+        Returns a dictionairy of encoding to bytes, or None
+        '''
+        payload = self._payloads.get(key)
+        if payload is None and self.directory:
+            try:
+                with open(self._file_path(key), 'rb') as f:
+                    compressed = f.read()
+                payload = self._encode(gzip.decompress(compressed), compressed)
+                self._payloads.put(key, payload, payload_size(payload))
+            except (OSError, EOFError):
+                return None
+        return payload
+
+    def _encode(self, body, gzipped=None):
+        # compressed while the request waits, so with the fast settings of the compressor rather than the strongest
+        # (brotli is only used when installed)
+        payload = {'identity': body}
+        for encoding in compressor.encodings():
+            payload[encoding] = gzipped if encoding == 'gzip' and gzipped else compressor.compress(body, encoding)
+        return payload
+
+    def put(self, key, body):
+        '''
+        Function to compress a payload and keep it in memory and on disk
+        Input arguments: key, the JSON response as bytes
+        Returns the payload, a dictionairy of encoding to bytes
+        '''
+        payload = self._encode(body)
+        self._payloads.put(key, payload, payload_size(payload))
+        if self.directory:
+            path = self._file_path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + '.tmp', 'wb') as f:
+                    f.write(payload['gzip'])
+                os.replace(path + '.tmp', path)
+            except OSError:
+                pass
+        return payload
+
+    def clear(self):
+        self._payloads.clear()
+
+    def remove_old_versions(self, keep):
+        '''
+        Function to delete the folders of the payloads stored for versions of the dataset other than the ones kept
+        Input arguments: versions of the dataset to keep
+        '''
+        try:
+            versions = os.listdir(self.directory)
+        except OSError:
+            return
+        for version in versions:
+            if version not in keep:
+                shutil.rmtree(os.path.join(self.directory, version), ignore_errors=True)
+
+    def respond(self, payload):
+        '''
+        Function to build a response from a payload, using the best encoding the browser accepts
+        Input arguments: dictionairy of encoding to bytes
+        Returns a flask response
+        '''
+        accepted = request.headers.get('Accept-Encoding', '')
+        response = Response(content_type='application/json')
+        for encoding in ('br', 'gzip'):
+            if encoding in payload and encoding in accepted:
+                response.set_data(payload[encoding])
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response.set_data(payload['identity'])
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    def init_app(self, server):
+        '''
+        Function to add the hooks serving stored payloads to the flask server of the app
+        Input arguments: flask server
+        '''
+        @server.before_request
+        def serve_stored_payload():
+            if request.method != 'POST' or not request.path.endswith(CALLBACK_PATH):
+                return None
+            key = self.key_for(request.get_json(silent=True))
+            if key is None:
+                return None
+            payload = self.get(key)
+            if payload is None:
+                self.misses += 1
+                g.payload_key = key
+                return None
+            self.hits += 1
+            return self.respond(payload)
+
+        @server.after_request
+        def store_payload(response):
+            key = g.pop('payload_key', None)
+            # a response built while a new version of the dataset was swapped in may hold either version, so it is
+            # only stored when the version is the one it was asked for
+            if (key is not None and response.status_code == 200 and not response.direct_passthrough
+                    and key[0] == current_data().version):
+                return self.respond(self.put(key, response.get_data()))
+            return response
+
+
+# a single store for the app, persisted next to the dataset cache unless disabled
+payload_store = PayloadStore(config.PAYLOAD_DIR if config.PERSIST_PAYLOADS else None)
+if payload_store.directory:
+    on_swap(payload_store.remove_old_versions)
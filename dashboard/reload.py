@@ -0,0 +1,112 @@
+'''
+Swapping in a new version of the dataset while the app is serving, so a data refresh needs no restart.
+
+Everything cached from the dataset is keyed by its version (the figure cache, the payload store, the top shares,
+the map and page layouts and the inset images), so the caches never serve figures of an older version and its
+entries are evicted as the caches fill. A new version is loaded, and its layouts, inset images and (with
+DASHBOARD_PREWARM, or under gunicorn) figures are built, while the old one keeps answering the requests, and only
+then swapped in (see reload_data in dashboard/data.py).
+
+Each worker process watches the source of the dataset from a thread started with its first request, so the workers
+pick up a new version within DASHBOARD_RELOAD_INTERVAL seconds of each other. With a csv file the first worker to
+notice builds its panel and the others wait for it and map the same files, with DASHBOARD_PANEL_DIR the panel is
+already built by python -m dashboard.ingest and every worker maps it.
+'''
+import hmac
+import logging
+import os
+import threading
+import time
+
+from flask import abort, jsonify, request
+
+from dashboard import config, data
+
+logger = logging.getLogger(__name__)
+
+
+class DataReloader:
+    '''
+    Checks whether the source of the dataset has changed since the version being served was loaded, and swaps in
+    the new version, every few seconds in each worker process and when asked through the reload route
+    '''
+
+    def __init__(self, interval=60.0):
+        self.interval = interval
+        self.reloads = 0
+        self.failures = 0
+        self._failed_fingerprint = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def check(self, force=False):
+        '''
+        Function to swap in the latest version of the dataset if its source has changed
+        A version that fails to load is not tried again until its source changes, unless forced
+        Input arguments: whether to load the source even if its fingerprint is unchanged
+        Returns True if a new version was swapped in
+        '''
+        try:
+            fingerprint = data.source_fingerprint()
+        except OSError:
+            # the source is being replaced, it is checked again next time
+            return False
+        if not force and fingerprint in (data.current_data().fingerprint, self._failed_fingerprint):
+            return False
+        try:
+            swapped = data.reload_data()
+        except Exception:
+            # the version being served is kept
+            logger.exception('could not load the new version of the dataset, still serving %s',
+                             data.current_data().version)
+            self._failed_fingerprint = fingerprint
+            self.failures += 1
+            if force:
+                raise
+            return False
+        if swapped:
+            self.reloads += 1
+            logger.info('serving version %s of the dataset', data.current_data().version)
+        return swapped
+
+    def _watch(self):
+        while True:
+            # checking straight away too, a worker forked from a master started before the last refresh is behind
+            self.check()
+            time.sleep(self.interval)
+
+    def start(self):
+        '''
+        Function to start the thread watching the source in this process, if it is not running yet
+        Threads do not survive a fork, so each gunicorn worker starts its own
+        '''
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._watch, name='dataset-reloader', daemon=True).start()
+
+    def init_app(self, server, path='/admin/reload-data', token=None):
+        '''
+        Function to start watching with the first request each worker answers, and to add the reload route
+        The route only reloads the worker answering it, with several workers their threads pick up the new version
+        Input arguments: flask server, path of the reload route, token the requests to the route must send in the
+        X-Reload-Token header (None to leave the route out)
+        '''
+        if self.interval > 0:
+            @server.before_request
+            def start_watching():
+                if self._pid != os.getpid():
+                    self.start()
+
+        if token:
+            @server.route(path, methods=['POST'])
+            def reload_dataset():
+                if not hmac.compare_digest(request.headers.get('X-Reload-Token', '').encode(), token.encode()):
+                    abort(403)
+                reloaded = self.check(force=True)
+                return jsonify(version=data.current_data().version, reloaded=reloaded)
+
+
+# a single reloader for the app, started by app.py
+reloader = DataReloader(config.RELOAD_INTERVAL)
@@ -0,0 +1,114 @@
+'''
+A single file column store that every worker process maps read-only, so the dataset is held in memory once.
+
+The file starts with a header describing the columns, followed by the raw bytes of each column, aligned so the
+columns can be used straight from the mapped file. Numeric columns are stored as they are. Text columns are
+dictionary encoded: each distinct string is kept once in the header and the column holds the small integer code of
+its string, read back as a pandas categorical on top of the mapped codes.
+
+Layout of the file:
+    MAGIC (8 bytes) | header length (8 bytes, little endian) | header (JSON) | padding | column | padding | column ...
+'''
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b'DASHCOL1'
+# columns start on a multiple of this many bytes, so every numpy type can be read in place
+ALIGNMENT = 64
+
+
+def aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def smallest_code_type(count):
+    '''
+    Function to find the smallest integer type that can hold the codes of a dictionary encoded column
+    Input arguments: number of distinct strings
+    Returns numpy dtype
+    '''
+    for code_type in (np.int8, np.int16, np.int32):
+        if count <= np.iinfo(code_type).max:
+            return np.dtype(code_type)
+    return np.dtype(np.int64)
+
+
+def encode_column(series, text):
+    '''
+    Function to turn a column into the array written to the store
+    Input arguments: series, whether to dictionary encode it
+    Returns the array and the dictionairy describing it in the header
+    '''
+    if not text:
+        values = np.ascontiguousarray(series.to_numpy())
+        return values, {'encoding': 'plain', 'dtype': values.dtype.str}
+    codes, strings = pd.factorize(series, sort=True)
+    codes = codes.astype(smallest_code_type(len(strings)))
+    return codes, {'encoding': 'dictionary', 'dtype': codes.dtype.str, 'strings': [str(value) for value in strings]}
+
+
+def write_store(df, path, meta, text_columns):
+    '''
+    Function to write a dataframe to a column store file
+    The file is written to a temporary path and then renamed, so a process that has the old file mapped keeps
+    reading it, and readers never see a partial file
+    Input arguments: dataframe, path of the file, dictionairy of metadata, names of the columns holding text
+    '''
+    arrays = []
+    columns = []
+    for name in df.columns:
+        values, description = encode_column(df[name], name in text_columns)
+        arrays.append(values)
+        columns.append(dict(description, name=name, length=len(values)))
+
+    # the offsets depend on the length of the header, which holds the offsets, so they are found from the end of
+    # the header rounded up to a whole block, growing the block until the header fits
+    header_space = ALIGNMENT
+    while True:
+        offset = header_space
+        for column, values in zip(columns, arrays):
+            column['offset'] = offset
+            offset = aligned(offset + values.nbytes)
+        header = json.dumps({'meta': meta, 'rows': len(df), 'columns': columns}).encode()
+        if len(MAGIC) + 8 + len(header) <= header_space:
+            break
+        header_space = aligned(len(MAGIC) + 8 + len(header))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + len(header).to_bytes(8, 'little') + header)
+        for column, values in zip(columns, arrays):
+            f.write(b'\0' * (column['offset'] - f.tell()))
+            f.write(values.tobytes())
+    os.replace(tmp_path, path)
+
+
+def open_store(path):
+    '''
+    Function to map a column store file read-only and build a dataframe on top of it without copying the columns
+    Input arguments: path of the file
+    Returns the dataframe and the dictionairy of metadata, or (None, None) if the file can't be read
+    '''
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None, None
+            header = json.loads(f.read(int.from_bytes(f.read(8), 'little')))
+        mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    except (OSError, ValueError):
+        return None, None
+
+    columns = {}
+    for column in header['columns']:
+        dtype = np.dtype(column['dtype'])
+        values = mapped[column['offset']:column['offset'] + column['length'] * dtype.itemsize].view(dtype)
+        if column['encoding'] == 'dictionary':
+            values = pd.Categorical.from_codes(values, dtype=pd.CategoricalDtype(pd.Index(column['strings'], dtype=str)),
+                                               validate=False)
+        columns[column['name']] = values
+    df = pd.DataFrame(columns, columns=[column['name'] for column in header['columns']], copy=False)
+    return df, header['meta']
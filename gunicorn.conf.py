@@ -0,0 +1,13 @@
+# settings for gunicorn, run from the root of the repository with: gunicorn -c gunicorn.conf.py wsgi:server
+# the values come from the environment variables read in dashboard/config.py, imported under another name as
+# gunicorn reads a module level 'config' as one of its own settings
+from dashboard import config as dashboard_config
+
+bind = dashboard_config.BIND
+workers = dashboard_config.WORKERS
+# with more than one thread gunicorn uses its threaded worker, so slow clients do not hold a whole process
+threads = dashboard_config.THREADS
+# importing the app in the master process, before the workers are forked
+preload_app = True
+# building the figures of a cold cache can take a while on a small machine
+timeout = 60
@@ -1,249 +1,226 @@
 # importing libraries
 import dash
-from dash import dcc, html, callback
-from dash.dependencies import Input, Output
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import copy
-from plotly.subplots import make_subplots
+from dash import dcc, html, callback, clientside_callback, ctx, ClientsideFunction
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+from plotly.colors import qualitative
 import numpy as np
+from dashboard import config
+from dashboard.aggregation import top_shares
+from dashboard.animation import add_gdp_map_frames, add_pie_frames, add_top_five_bar_frames, animation_controls
+from dashboard.cache import figure_cache, prewarm, versioned_cache
+from dashboard.clientside import set_figures, year_data
+from dashboard.figures import PROFILE, TEMPLATE, choropleth_trace, figure_patch, geo_layout, log_range, map_trace_paths, population_bubble_trace, typed_array, uses_log_scale, value_range, with_layout
+from dashboard.lazy import page_layout
+from dashboard.payloads import payload_store
 
 # defining name of page and path
 dash.register_page(__name__, path='/', name="Evolution of African GDP: Overview")
 
-# loading the data
-url = "https://github.com/10Dennisw/economics-africa-dashboard/raw/master/africa_economics_v2.csv"
-df = pd.read_csv(url)
-
-# defining the layout of the page
-layout = html.Div(style={'backgroundColor': 'white', 'color': '#FFFFFF', 'margin': '0', 'width': '1000px'}, children=[
-    html.Div(style={'backgroundColor': 'white', 'width': '990px', 'border': '2px solid black', 'margin-left': '5px', 'margin-right': '5px'}, children=[
-        html.B('Select Year to Filter On:', className = 'fix_label', style = {'color': 'black', 'paddingLeft': '20px'}),
-        # creating a slider for each year, allowing the user to select a year to filter on
-        dcc.Slider(
-            id='year-slider',
-            min=df['Year'].min(),  
-            max=df['Year'].max(),  
-            value=df['Year'].min(), # setting the default value
-            marks={
-                str(year): {'label': str(year), 'style': {'color': 'black'}}  # Setting label color to black
-                for year in range(df['Year'].min(), df['Year'].max() + 1)
-                },
-            step=1, # setting each step as one year
-        ), 
-    ]),
-    # Creating a 2 maps to be side by side - using 49% width.
-    # The first map is just a chloropleth map, while the second map has an additional layer above, showing the population
-    html.Div(style={'display': 'flex', 'backgroundColor': 'white'}, children=[
-        # Setting the format for the first map
-        dcc.Graph(
-            id='world-map',
-            # defining the style of figure
-            style={'border': '2px solid black', 
-                   'height': '375px', 'width': '490px', 
-                   'float': 'left',
-                   'margin-left': '5px', 'margin-right': '10px','margin-top': '10px', 'margin-bottom': '5px', 
-                   'backgroundColor': '#000000'}
-        ),
+# loading the data, the current version is looked up on every call so a new version can be swapped in
+from dashboard.data import current_data, on_reload, year_slice
+
+# the indicator the charts show until another one is picked in the metric selector
+DEFAULT_METRIC = 'GDP (USD)'
+
+# the metrics whose values add up across countries, the pie chart shows each country's share of the total, which
+# means nothing for a metric such as GDP per Capita, so the pie is only drawn for these
+ADDITIVE_METRICS = ['GDP (USD)', 'Population']
+
+# defining the layout of the page, the figures are added by the callbacks or by build_layout
+# the slider covers the years of the version of the dataset being served, so it is built for each version
+def build_base_layout():
+    df = current_data().df
+    return html.Div(style={'backgroundColor': 'white', 'color': '#FFFFFF', 'margin': '0', 'width': '1000px'}, children=[
+        html.Div(style={'backgroundColor': 'white', 'width': '990px', 'border': '2px solid black', 'margin-left': '5px', 'margin-right': '5px'}, children=[
+            html.B('Select Year to Filter On:', className = 'fix_label', style = {'color': 'black', 'paddingLeft': '20px'}),
+            # creating a slider for each year, allowing the user to select a year to filter on
+            dcc.Slider(
+                id='year-slider',
+                min=df['Year'].min(),  
+                max=df['Year'].max(),  
+                value=df['Year'].min(), # setting the default value
+                marks={
+                    str(year): {'label': str(year), 'style': {'color': 'black'}}  # Setting label color to black
+                    for year in range(df['Year'].min(), df['Year'].max() + 1)
+                    },
+                step=1, # setting each step as one year
+            ), 
+        ]),
+        # Creating a 2 maps to be side by side - using 49% width.
+        # The first map is just a chloropleth map, while the second map has an additional layer above, showing the population
+        html.Div(style={'display': 'flex', 'backgroundColor': 'white'}, children=[
+            # Setting the format for the first map
+            dcc.Graph(
+                id='world-map',
+                # defining the style of figure
+                style={'border': '2px solid black', 
+                       'height': '375px', 'width': '490px', 
+                       'float': 'left',
+                       'margin-left': '5px', 'margin-right': '10px','margin-top': '10px', 'margin-bottom': '5px', 
+                       'backgroundColor': '#000000'}
+            ),
         
-        # Setting the format for the second map
-        dcc.Graph(
-            id='world-map-with-population',
-            # defining the style of figure
-            style={'border': '2px solid black', 
-                   'height': '375px', 'width': '490px', 
-                   'float': 'right', 'margin-top': '10px', 'margin-right': '5px', 'margin-bottom': '5px', 
-                   'backgroundColor': '#000000'}
-        ),
-    ]),
+            # Setting the format for the second map
+            dcc.Graph(
+                id='world-map-with-population',
+                # defining the style of figure
+                style={'border': '2px solid black', 
+                       'height': '375px', 'width': '490px', 
+                       'float': 'right', 'margin-top': '10px', 'margin-right': '5px', 'margin-bottom': '5px', 
+                       'backgroundColor': '#000000'}
+            ),
+        ]),
     
-    # Having an additional row, which also has two different charts. A bar chart and pie chart
-    html.Div(style={'display': 'flex', 'backgroundColor': 'white'}, children=[   
-        # Setting the format for the bar chart
-        dcc.Graph(
-            id='gdp-bar-chart',
-            style={'border': '2px solid black', 
-                   'height': '375px', 'width': '490px', 
-                   'float': 'left',
-                   'margin-left': '5px', 'margin-right': '10px','margin-top': '5px', 'margin-bottom': '1px', 
-                   'backgroundColor': '#000000'}       
-        ),
-
-        # Setting the format for the pie chart
-        dcc.Graph(
-            id='gdp-pie-chart',
-            style={'border': '2px solid black', 
-                   'height': '375px', 'width': '490px', 
-                   'float': 'right', 
-                   'margin-top': '5px', 'margin-right': '5px', 'margin-bottom': '1px', 
-                   'backgroundColor': '#000000'}
-        ),
-    ]),
-])
-
-# callack used to create interactivity between the user (through the slider)
-@callback(
-    [Output('world-map', 'figure'),
-     Output('world-map-with-population', 'figure'),
-     Output('gdp-bar-chart', 'figure'),
-     Output('gdp-pie-chart', 'figure')],
-    [Input('year-slider', 'value')],
-    allow_duplicate=True
-)
-
-# function to update the charts based upon the year selected by the slider 
-def update_charts(selected_year):
-
-    # filter the df based upon the year selected by the user on the slider
-    filtered_df = df.loc[df['Year'] == selected_year]
-
-    # creating a dictionairy with countries and their respective colours
-    country_colours = {
-        'South Africa': 'rgb(255, 128, 0)', 
-        'Egypt': 'rgb(213, 109, 225)',  
-        'Nigeria': 'rgb(93, 247, 26)',  
-        'Algeria': 'rgb(0, 255, 255)',  
-        'Morocco': 'rgb(255, 178, 102)',  
-        'Angola': 'rgb(255, 0, 0)',
-        'Sudan': 'rgb(246, 29, 159)',
-        'Other': 'rgb(255, 255, 0)'
-        }
-
-    ############################################################################################################
-    # MAP CHARTS
-    
-    # defining the features of the choropleth Map
-    map_fig = px.choropleth(
-        filtered_df,
-        locations='Code',
-        color=np.log(filtered_df['GDP (USD)']),
-        hover_name='Country',
-        hover_data={'Code': False, 'GDP (USD)': ':,'},
-        custom_data=[filtered_df['GDP (USD)']],
-        color_continuous_scale='reds',
-        projection='orthographic',
-        title='',
-        template='plotly',
-        range_color=[min(np.log(df['GDP (USD)'])), max(np.log(df['GDP (USD)']))]
-    )
-
-    # defining the featured of the additional layer for the second map with population bubbles
-    scattergeo_fig = px.scatter_geo(
-        filtered_df,
-        locations='Code',  
-        size='Population',  
-        hover_name='Country',
-        hover_data={'Code': False, 'GDP (USD)': ':,', 'Population': ':,'},
-        projection='orthographic',
-        title='',
-        template='plotly',
-        opacity=0.5
-    )
-    
-    # customising the appearance and marker traces in both map figures
-    map_fig.update_traces(marker=dict(line={"color": "black", "width": 1.5}))
-
-    # Setting the layout of the map and customising the appearance
-    map_fig.update_layout(geo=dict(showframe=False,
-                                   showcoastlines=True,
-                                    showcountries=True,
-                                    countrycolor="#d1d1d1",
-                                    showocean=True,
-                                    oceancolor="#c9d2e0",
-                                    showlakes=True,
-                                    lakecolor="#99c0db",
-                                    showrivers=True,
-                                    rivercolor="#99c0db",
-                                    resolution=110
-                                    ),
-        coloraxis_colorbar=dict(title="GDP (log)"), # the colour is denotated by the logarithm of the GDP
-        paper_bgcolor = "white",
-        font=dict(color="black"),
-        margin=dict(l=20, r=20, t=40, b=10)
-    )
-    
-    # working on map figures
-    map_fig.update_geos(projection_rotation=dict(lon=17, lat=2)) # setting the map to focus on Africa
-    map_fig.update_geos(projection_scale=1.43)  # updating zoom
-
-    map_fig2= copy.deepcopy(map_fig) # creating a deepcopy of the map to avoid changes being updated to both maps
-    
-    map_fig.update_layout(title_text="<b>Chloropleth Map of GDP (log)</b>",
-                          title_x=0.5)
-    
-    map_fig.add_annotation(
-        text="<b>As the year increases,<br>watch the shade of red<br>increase as Africa's<br>economies grow larger</b>",
-        xref="paper", 
-        yref="paper",
-        x=0.18,  
-        y=0.25,  
-        showarrow=False, 
-        font=dict(size=12),  
-        align="center",  
-        xanchor="center", 
-        yanchor="bottom" ,
-        bgcolor="white",  
-        bordercolor="black",  
-        borderwidth=1   
-    )
-
-    map_fig_with_population = map_fig2.add_trace(scattergeo_fig.data[0]) # adding the population bubbles to the chloropleth map
-    map_fig_with_population.update_layout(title_text="<b>Map of GDP (log) with Population Bubbles</b>",
-                                          title_x=0.5)
-    
-    map_fig_with_population.add_annotation(
-        text="<b>Nigeria is Africa's<br>most populous<br>economy</b>",
-        x=0.36,  # Adjusted longitude for Nigeria
-        y=0.54,  # Adjusted latitude for Nigeria
-        showarrow=True,
-        arrowhead=1,
-        arrowcolor="black",
-        arrowwidth=2,
-        ax=-55,
-        ay=100,
-        font=dict(size=12),
-        bgcolor="white",  
-        bordercolor="black",  
-        borderwidth=1  
-    )
-
-    ############################################################################################################
-    # BAR CHART
-    
-    # creating as new df to get top five values of GDP
-    top_five_df = filtered_df.sort_values(by='GDP (USD)', ascending=False).head(5)
-
-    # defining the features of the bar chart Map
-    bar_fig = px.bar(
-        top_five_df,
-        x='Country',
-        y='GDP (USD)',
-        title=f'<b>Largest 5 African Economies in {selected_year}</b>',
-        labels={'GDP (USD)': 'GDP (USD in Billions)'},
-        hover_data={'GDP (USD)': ':,', 'Population': ':,'},
-        color='Country', # introducing colour to have different colour based upon country
-        color_discrete_map=country_colours # setting it to country colour dictionairy
+        # Having an additional row, which also has two different charts. A bar chart and pie chart
+        html.Div(style={'display': 'flex', 'backgroundColor': 'white'}, children=[   
+            # Setting the format for the bar chart
+            dcc.Graph(
+                id='gdp-bar-chart',
+                style={'border': '2px solid black', 
+                       'height': '375px', 'width': '490px', 
+                       'float': 'left',
+                       'margin-left': '5px', 'margin-right': '10px','margin-top': '5px', 'margin-bottom': '1px', 
+                       'backgroundColor': '#000000'}       
+            ),
+
+            # Setting the format for the pie chart
+            dcc.Graph(
+                id='gdp-pie-chart',
+                style={'border': '2px solid black', 
+                       'height': '375px', 'width': '490px', 
+                       'float': 'right', 
+                       'margin-top': '5px', 'margin-right': '5px', 'margin-bottom': '1px', 
+                       'backgroundColor': '#000000'}
+            ),
+        ]),
+    ])
+
+# creating a dictionairy with countries and their respective colours
+country_colours = {
+    'South Africa': 'rgb(255, 128, 0)', 
+    'Egypt': 'rgb(213, 109, 225)',  
+    'Nigeria': 'rgb(93, 247, 26)',  
+    'Algeria': 'rgb(0, 255, 255)',  
+    'Morocco': 'rgb(255, 178, 102)',  
+    'Angola': 'rgb(255, 0, 0)',
+    'Sudan': 'rgb(246, 29, 159)',
+    'Other': 'rgb(255, 255, 0)'
+    }
+
+def chart_colours(countries):
+    '''
+    Function to pick the colour of each country in the bar and pie charts, the countries without a colour of their
+    own (when ranking by another metric) are given one by their rank
+    Input arguments: list of the top five countries, largest first
+    Returns dictionairy of country to colour, with 'Other'
+    '''
+    return {**{country: country_colours.get(country, qualitative.Plotly[i]) for i, country in enumerate(countries)},
+            'Other': country_colours['Other']}
+
+# the response only depends on the year and the metric, so it can be served from the payload store
+payload_store.register('page1', ['world-map.figure', 'world-map-with-population.figure', 'gdp-bar-chart.figure', 'gdp-pie-chart.figure'], 'year-slider', ['page1-metric'])
+
+# the selector of the metric the charts show, with every indicator of the dataset
+def build_metric_selector():
+    return html.Div(style={'paddingLeft': '20px', 'paddingRight': '20px', 'paddingBottom': '10px'}, children=[
+        html.B('Select Metric:', className = 'fix_label', style = {'color': 'black'}),
+        dcc.Dropdown(id='page1-metric', options=current_data().panel.names, value=DEFAULT_METRIC, clearable=False, style={'color': 'black'}),
+    ])
+
+############################################################################################################
+# MAP LAYOUTS
+
+# the layout of both maps only depends on the range of GDP over every year, so it is built once for each version
+def build_default_maps():
+    map_skeleton = geo_layout('GDP (log)', log_range(current_data().df['GDP (USD)']), dict(l=20, r=20, t=40, b=10), resolution=110)
+
+    map_layout = with_layout(map_skeleton,
+        title=dict(text="<b>Chloropleth Map of GDP (log)</b>", x=0.5),
+        annotations=[dict(
+            text="<b>As the year increases,<br>watch the shade of red<br>increase as Africa's<br>economies grow larger</b>",
+            xref="paper", 
+            yref="paper",
+            x=0.18,  
+            y=0.25,  
+            showarrow=False, 
+            font=dict(size=12),  
+            align="center",  
+            xanchor="center", 
+            yanchor="bottom" ,
+            bgcolor="white",  
+            bordercolor="black",  
+            borderwidth=1   
+        )]
     )
 
-    # rotating the angle of the x-axis labels to 25 degrees
-    bar_fig.update_layout(xaxis_tickangle=25)
-    # Addinga black outline of each bar
-    bar_fig.update_traces(marker_line_color='black', marker_line_width=2)
-    # updating the layout for the bar charts
-    bar_fig.update_layout(
-        paper_bgcolor = "white",
-        font=dict(color="black"),
-        title=dict(x=0.5),
-        margin=dict(l=30, r=30, t=60, b=60),
-        # Editing the y-axis to be easier to interpret for the user
-        yaxis=dict(tickvals = [100000000000, 200000000000, 300000000000, 400000000000, 500000000000, 600000000000],
-                   ticktext = [100, 200, 300, 400, 500, 600],
-                   range=[0, 600000000000]),
-        legend_title_text='Country'
+    map_with_population_layout = with_layout(map_skeleton,
+        title=dict(text="<b>Map of GDP (log) with Population Bubbles</b>", x=0.5),
+        annotations=[dict(
+            text="<b>Nigeria is Africa's<br>most populous<br>economy</b>",
+            x=0.36,  # Adjusted longitude for Nigeria
+            y=0.54,  # Adjusted latitude for Nigeria
+            showarrow=True,
+            arrowhead=1,
+            arrowcolor="black",
+            arrowwidth=2,
+            ax=-55,
+            ay=100,
+            font=dict(size=12),
+            bgcolor="white",  
+            bordercolor="black",  
+            borderwidth=1  
+        )]
     )
+    return map_layout, map_with_population_layout
+
+@versioned_cache(maxsize=32)
+def metric_maps(metric):
+    '''
+    Function to get the layouts of both maps for a metric, built once for each metric and version of the dataset
+    Input arguments: name of the indicator
+    Returns (whether the maps are coloured by the logarithm, layout of the map, layout of the map with population)
+    '''
+    if metric == DEFAULT_METRIC:
+        return (True,) + build_default_maps()
+    values = current_data().panel.column(metric)
+    log = uses_log_scale(values)
+    label = f'{metric} (log)' if log else metric
+    skeleton = geo_layout(label, log_range(values) if log else value_range(values), dict(l=20, r=20, t=40, b=10), resolution=110)
+    return (log,
+            with_layout(skeleton, title=dict(text=f"<b>Chloropleth Map of {label}</b>", x=0.5)),
+            with_layout(skeleton, title=dict(text=f"<b>Map of {label} with Population Bubbles</b>", x=0.5)))
+
+############################################################################################################
+# BAR AND PIE CHART LAYOUTS
+
+# the parts of the bar chart that are the same every year
+bar_trace = dict(
+    type='bar',
+    orientation='v',
+    xaxis='x',
+    yaxis='y',
+    showlegend=True,
+    textposition='auto',
+    hovertemplate='Country=%{x}<br>GDP (USD in Billions)=%{y:,}<br>Population=%{customdata[0]:,}<extra></extra>',
+    marker=dict(pattern=dict(shape=''), line=dict(color='black', width=2)) # Addinga black outline of each bar
+)
 
-    bar_fig.add_annotation(
+bar_layout = dict(
+    template=TEMPLATE,
+    xaxis=dict(anchor='y', domain=[0.0, 1.0], title=dict(text='Country'), categoryorder='array',
+               tickangle=25), # rotating the angle of the x-axis labels to 25 degrees
+    # Editing the y-axis to be easier to interpret for the user
+    yaxis=dict(anchor='x', domain=[0.0, 1.0], title=dict(text='GDP (USD in Billions)'),
+               tickvals = [100000000000, 200000000000, 300000000000, 400000000000, 500000000000, 600000000000],
+               ticktext = [100, 200, 300, 400, 500, 600],
+               range=[0, 600000000000]),
+    legend=dict(title=dict(text='Country'), tracegroupgap=0),
+    barmode='relative',
+    paper_bgcolor = "white",
+    font=dict(color="black"),
+    margin=dict(l=30, r=30, t=60, b=60),
+    annotations=[dict(
         text="<b>As the year increases,<br>watch the bars of<br>Africa's largest five<br>economies grow taller</b>",
         xref="paper", 
         yref="paper",
@@ -257,112 +234,283 @@ def update_charts(selected_year):
         bgcolor="white",  
         bordercolor="black",  
         borderwidth=1   
-    )
+    )]
+)
 
-    
-    ############################################################################################################
-    # PIE CHART
+# the parts of the pie chart that are the same every year
+pie_trace = dict(
+    type='pie',
+    name = "",
+    hovertemplate = "%{label}: %{text} Billion USD<br>Population: %{customdata:,}",
+    textinfo='percent',
+    # Adding a black outline around each section of the piece, and setting the width to black
+    marker=dict(line=dict(color='black', width=2)),
+    insidetextfont=dict(color='black', family="Arial", size=12)
+)
 
-    # function for getting the labels and values for the pie chart
-    def getting_labels_and_values(filtered_df):
-        ''' 
-        Function to retrieve the largest economies in the df and retrieve the values, 
-        setting other economies not in the Top 5 to other
-        Input arguments: dataframe
-        Returns list of labels and values
-        '''
-        pie_df = filtered_df.sort_values(by='GDP (USD)', ascending=False) # sorting values
-        top5_indices = pie_df['GDP (USD)'].nlargest(5).index # getting index for top 5 largest
-        pie_df.loc[~pie_df.index.isin(top5_indices), 'Country'] = 'Other' #setting countries not in top5_indices to 'Other'
+pie_layout = dict(
+    template=TEMPLATE,
+    paper_bgcolor="white",
+    font=dict(color="black"),
+    margin=dict(l=30, r=30, t=60, b=60),
+)
 
-        pie_df = pie_df.groupby('Country').sum().reset_index() # grouping the df by country/ economy
+# the annotation shown on the pie chart in 2000, its text is filled in with the shares of South Africa
+pie_annotation = dict(
+    xref="paper", 
+    yref="paper",
+    x=1.15,  
+    y=0.05,  
+    showarrow=False, 
+    font=dict(size=12),  
+    align="center",  
+    xanchor="center", 
+    yanchor="bottom" ,
+    bgcolor="white",  
+    bordercolor="black",  
+    borderwidth=1   
+)
 
-        # creating empty lists
-        label_lst = []
-        values_lst = []
+# the note shown in place of the pie chart for the metrics that don't add up across countries
+pie_note = dict(
+    xref="paper",
+    yref="paper",
+    x=0.5,
+    y=0.5,
+    showarrow=False,
+    font=dict(size=14),
+    align="center",
+    text="<b>A pie chart is only drawn for metrics<br>that add up across countries,<br>such as " + " and ".join(ADDITIVE_METRICS) + "</b>"
+)
 
-        # iterating through df and appending label and value to list
-        for i, r in pie_df.iterrows():
-            country = r['Country']
-            GDP = r['GDP (USD)']
-            label_lst.append(country)
-            values_lst.append(GDP)
+# function to update the charts based upon the year selected by the slider 
+# the figures only depend on the year, so they are cached and reused when the slider returns to a year
+@figure_cache.memoize('page1')
+def update_charts(selected_year, metric=DEFAULT_METRIC):
 
-        return label_lst, values_lst
+    # filter the df based upon the year selected by the user on the slider, with the metric picked
+    filtered_df = year_slice(selected_year, (metric,))
 
-    # Sorting and filtering the filtered dataframe to show 6 values, largest 5 economies and the other economies combined 
-    pie_df = filtered_df.sort_values(by='GDP (USD)', ascending=False)
-    top5_indices = pie_df['GDP (USD)'].nlargest(5).index
-    pie_df.loc[~pie_df.index.isin(top5_indices), 'Country'] = 'Other' #setting countries not in top5_indices to 'Other'
+    ############################################################################################################
+    # MAP CHARTS
 
-    grouped_df = pie_df.groupby('Country').agg({
-        'GDP (USD)': 'sum',
-        'Population': 'sum'
-    }).reset_index()
-    grouped_df
+    # the choropleth map, assembled from the layout built once for every year and the trace of this year
+    log, map_layout, map_with_population_layout = metric_maps(metric)
+    map_fig = {'data': [choropleth_trace(filtered_df, metric, log)], 'layout': map_layout}
 
-    label_lst, valueslst = getting_labels_and_values(pie_df)
+    # the second map has an additional layer above, showing the population
+    map_fig_with_population = {
+        'data': [choropleth_trace(filtered_df, metric, log), population_bubble_trace(filtered_df)],
+        'layout': map_with_population_layout
+    }
 
-    text_lst = []
-    for value in valueslst:
-        text_lst.append(round(value/10**10,2))
+    ############################################################################################################
+    # BAR CHART
+    
+    # the five largest economies of the year (or countries by the metric picked), largest first, and the rest grouped
+    # as 'Other' with their population, from the shares computed once for every year
+    shares = top_shares(metric, 5, ('Population',))[selected_year]
+    top_five_df = shares['top']
+    top_five_countries = top_five_df['Country'].tolist()
+    top_five_values = top_five_df[metric].to_numpy()
+    top_five_population = top_five_df['Population'].to_numpy()
+    colours = chart_colours(top_five_countries)
+
+    # the GDP chart is scaled in billions, other metrics are scaled to their values
+    if metric == DEFAULT_METRIC:
+        metric_bar_trace, metric_bar_layout = bar_trace, bar_layout
+        bar_title = f'<b>Largest 5 African Economies in {selected_year}</b>'
+    else:
+        metric_bar_trace = with_layout(bar_trace, hovertemplate=f'Country=%{{x}}<br>{metric}=%{{y:,}}<br>Population=%{{customdata[0]:,}}<extra></extra>')
+        metric_bar_layout = with_layout(bar_layout, yaxis=dict(anchor='x', domain=[0.0, 1.0], title=dict(text=metric)), annotations=[])
+        bar_title = f'<b>Largest 5 African Countries by {metric} in {selected_year}</b>'
+
+    # one bar per country, so each country has its own colour and legend entry
+    bar_traces = []
+    for i, country in enumerate(top_five_countries):
+        bar_traces.append(with_layout(metric_bar_trace,
+            name=country,
+            legendgroup=country,
+            x=[country],
+            y=typed_array(top_five_values[i:i + 1]),
+            customdata=typed_array(top_five_population[i:i + 1, np.newaxis]),
+            marker=with_layout(bar_trace['marker'], color=colours[country]) # setting it to country colour dictionairy
+        ))
+
+    # setting the title of the year and ordering the bars from the largest economy
+    bar_fig = {'data': bar_traces,
+               'layout': with_layout(metric_bar_layout,
+                                     title=dict(text=bar_title, x=0.5),
+                                     xaxis=with_layout(bar_layout['xaxis'], categoryarray=top_five_countries))}
 
-    population_lst = []
-    for i, r in grouped_df.iterrows():
-        population_lst.append(r['Population'])
+    
+    ############################################################################################################
+    # PIE CHART
 
+    # the largest 5 economies and the other economies combined, ordered by label
+    grouped_df = shares['shares']
+    label_lst = grouped_df['Country'].tolist()
+    valueslst = grouped_df[metric].tolist()
+    population_lst = grouped_df['Population'].tolist()
+
+    # the GDP shares are labelled in billions, other metrics with their totals
+    if metric == DEFAULT_METRIC:
+        metric_pie_trace = pie_trace
+        text_lst = [round(value/10**10,2) for value in valueslst]
+        pie_title = f'<b>African GDP Distribution in {selected_year}</b>'
+    else:
+        metric_pie_trace = with_layout(pie_trace, hovertemplate=f"%{{label}}: %{{text}} ({metric})<br>Population: %{{customdata:,}}")
+        text_lst = [round(value, 2) for value in valueslst]
+        pie_title = f'<b>African {metric} Distribution in {selected_year}</b>'
 
     # Features of the pie chart
-    pie_fig = go.Figure(go.Pie(
-        name = "",
-        values = valueslst,
-        labels = label_lst,
-        text = text_lst,
-        marker=dict(colors=[country_colours[label] for label in label_lst]),
-        hovertemplate = "%{label}: %{text} Billion USD<br>Population: %{customdata:,}",
-        textinfo='percent',
-        customdata=population_lst
-    ))
-
-    # Setting the layout for the pie chart
-    pie_fig.update_layout(
-        paper_bgcolor="white",
-        font=dict(color="black"),
-        title=dict(x=0.5),
-        margin=dict(l=30, r=30, t=60, b=60),
-    )
-
-    pie_fig.update_layout(title_text=f'<b>African GDP Distribution in {selected_year}</b>',
-                          title=dict(x=0.5),
-                          font=dict(color="black")
-                          )
-
-    # Adding a black outline around each section of the piece, and setting the width to black
-    pie_fig.update_traces(marker=dict(line=dict(color='black', width=2)),
-                        insidetextfont=dict(color='black', family="Arial", size=12)) 
+    if metric in ADDITIVE_METRICS:
+        pie_fig = {'data': [with_layout(metric_pie_trace,
+                                        values=valueslst,
+                                        labels=label_lst,
+                                        text=text_lst,
+                                        marker=with_layout(pie_trace['marker'], colors=[colours[label] for label in label_lst]),
+                                        customdata=population_lst)],
+                   'layout': with_layout(pie_layout, title=dict(x=0.5, text=pie_title))}
+    else:
+        # the shares of a total of this metric mean nothing, so a note is shown instead, without any axes
+        pie_fig = {'data': [],
+                   'layout': with_layout(pie_layout, title=dict(x=0.5, text=pie_title), annotations=[pie_note],
+                                         xaxis=dict(visible=False), yaxis=dict(visible=False))}
     
-    if selected_year == 2000:
+    if selected_year == 2000 and metric == DEFAULT_METRIC:
         SA_pop = filtered_df[filtered_df['Country'] == 'South Africa']['Population'].iloc[0]
         total_population = filtered_df['Population'].sum()
 
         SA_gdp = filtered_df[filtered_df['Country'] == 'South Africa']['GDP (USD)'].iloc[0]
         total_gdp = filtered_df['GDP (USD)'].sum()
 
-        pie_fig.add_annotation(
-            text=f"<b>Despite having {round((SA_pop/total_population)*100,2)}%<br>of Africa's recorded<br>population, it has<br>{round((SA_gdp/total_gdp)*100,2)}% of Africa's<br>total GDP</b>",
-            xref="paper", 
-            yref="paper",
-            x=1.15,  
-            y=0.05,  
-            showarrow=False, 
-            font=dict(size=12),  
-            align="center",  
-            xanchor="center", 
-            yanchor="bottom" ,
-            bgcolor="white",  
-            bordercolor="black",  
-            borderwidth=1   
-        )
+        pie_fig['layout']['annotations'] = [with_layout(pie_annotation,
+            text=f"<b>Despite having {round((SA_pop/total_population)*100,2)}%<br>of Africa's recorded<br>population, it has<br>{round((SA_gdp/total_gdp)*100,2)}% of Africa's<br>total GDP</b>"
+        )]
 
     # returning the map figure and bar chart
-    return map_fig, map_fig_with_population, bar_fig, pie_fig
\ No newline at end of file
+    return map_fig, map_fig_with_population, bar_fig, pie_fig
+
+# optionally building the figures for every year at startup, and for each new version of the dataset before it is
+# swapped in
+def prewarm_charts():
+    prewarm(update_charts, current_data().year_index)
+
+if config.PREWARM:
+    prewarm_charts()
+    on_reload(prewarm_charts)
+
+# outputs updated by the slider
+chart_outputs = [Output('world-map', 'figure'),
+                 Output('world-map-with-population', 'figure'),
+                 Output('gdp-bar-chart', 'figure'),
+                 Output('gdp-pie-chart', 'figure')]
+
+# the parts of each figure that change with the year, as (paths in each trace, paths in the layout)
+# the map geometry, styling, colour scale and annotations are left as they are in the browser, and so are the
+# countries of the maps when every year has the same ones (see map_trace_paths)
+# the bar chart sends its traces whole, as a year with fewer than five values has fewer bars
+chart_patch_paths = [
+    (['z', 'customdata'], []),
+    (['z', 'customdata', ('marker', 'size'), ('marker', 'sizeref')], []),
+    (None, [('title', 'text'), ('xaxis', 'categoryarray')]),
+    (['values', 'labels', 'text', 'customdata', ('marker', 'colors')], [('title', 'text'), 'annotations']),
+]
+
+def year_patch_paths():
+    '''
+    Function to get the parts of each figure to send when the year changes, for the version of the dataset served
+    Returns list of (paths in each trace, paths in the layout)
+    '''
+    same_countries = current_data().same_countries
+    return [(map_trace_paths(trace_paths, same_countries), layout_paths) for trace_paths, layout_paths in chart_patch_paths[:2]] + chart_patch_paths[2:]
+
+def update_figures(selected_year, metric=DEFAULT_METRIC):
+    '''
+    Function to update the charts when the slider moves or another metric is picked, the first render of the page
+    and a new metric get the whole figures and later moves of the slider only send the parts that change with the year
+    Input arguments: year selected on the slider, metric picked
+    Returns list of figures or dash Patches
+    '''
+    # the page may still show the slider of an older version of the dataset, with years this version doesn't have
+    if metric not in current_data().panel or selected_year not in current_data().year_index:
+        raise PreventUpdate
+    figures = update_charts(selected_year, metric)
+    if list(ctx.triggered_prop_ids) != ['year-slider.value']:
+        return figures
+    return [figure_patch(figure, trace_paths, layout_paths) for figure, (trace_paths, layout_paths) in zip(figures, year_patch_paths())]
+
+def build_layout():
+    '''
+    Function to finish the layout of the page, adding the figures the slider mode needs before the first callback
+    Returns the layout, built from the version of the dataset being served
+    '''
+    data = current_data()
+    df, year_index = data.df, data.year_index
+    base_layout = build_base_layout()
+    if config.SLIDER_MODE == 'clientside':
+        # building the figures for the first year on the server, the browser then swaps in the values of each year
+        initial_figures = update_charts(int(df['Year'].min()))
+        set_figures(base_layout, {output.component_id: figure for output, figure in zip(chart_outputs, initial_figures)})
+
+        # the annotation shown on the pie chart in 2000, its text is recalculated in the browser
+        base_layout.children.append(dcc.Store(id='page1-year-data', data={
+            'years': year_data(df, year_index),
+            'colours': country_colours,
+            # the colours given by rank to the countries without a colour of their own, as in chart_colours
+            'rank_colours': qualitative.Plotly,
+            'pie_annotation': pie_annotation,
+            'trim_hover': PROFILE['trim_hover'],
+        }))
+    elif config.SLIDER_MODE == 'animation':
+        # building the maps and bar chart once with a frame per year, played back in the browser
+        # the frames are added to copies, so the cached figures of the first year are left unchanged
+        first_year = int(df['Year'].min())
+        map_fig, map_fig_with_population, bar_fig, pie_fig = update_charts(first_year)
+        set_figures(base_layout, {
+            'world-map': add_gdp_map_frames(map_fig, df, year_index),
+            'world-map-with-population': add_gdp_map_frames(map_fig_with_population, df, year_index, with_population=True),
+            'gdp-bar-chart': add_top_five_bar_frames(bar_fig, df, year_index, country_colours),
+            'gdp-pie-chart': add_pie_frames(pie_fig, {year: update_charts(year)[3] for year in year_index}),
+        })
+        # one play button for every chart, moving the year slider, which every chart follows in the browser
+        base_layout.children[0].children.extend(animation_controls())
+    else:
+        # the charts are built on the server, so they can show any metric of the dataset
+        base_layout.children[0].children.append(build_metric_selector())
+    return base_layout
+
+# the layout is finished when the app starts (and for each new version of the dataset), or on the first visit with
+# DASHBOARD_LAZY_PAGES
+layout = page_layout(build_layout)
+
+if config.SLIDER_MODE == 'clientside':
+    clientside_callback(
+        ClientsideFunction(namespace='dashboard', function_name='updatePage1'),
+        chart_outputs,
+        [Input('year-slider', 'value')],
+        [State('page1-year-data', 'data')] + [State(output.component_id, 'figure') for output in chart_outputs],
+        prevent_initial_call=True
+    )
+elif config.SLIDER_MODE == 'animation':
+    # the play button moves the year slider on a timer, stopping at the last year
+    clientside_callback(
+        ClientsideFunction(namespace='dashboard', function_name='animatePage1'),
+        [Output('page1-animation-interval', 'disabled'), Output('page1-play', 'children'), Output('year-slider', 'value')],
+        [Input('page1-play', 'n_clicks'), Input('page1-animation-interval', 'n_intervals')],
+        [State('page1-animation-interval', 'disabled'), State('year-slider', 'value'),
+         State('year-slider', 'min'), State('year-slider', 'max')],
+        prevent_initial_call=True
+    )
+    # every chart moves to the frame of the year on the slider, in the browser, without calling the server
+    clientside_callback(
+        ClientsideFunction(namespace='dashboard', function_name='showPage1Frame'),
+        Output('page1-animation-frame', 'data'),
+        [Input('year-slider', 'value')],
+        [State('page1-animation', 'data')],
+        prevent_initial_call=True
+    )
+else:
+    # callack used to create interactivity between the user (through the slider)
+    callback(chart_outputs, [Input('year-slider', 'value'), Input('page1-metric', 'value')], allow_duplicate=True)(update_figures)
@@ -1,137 +1,109 @@
 # Importing necessary libraries
+import functools
 import dash
 from dash import dcc, html
-from dash import Input, Output, callback
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-
-# libraries for image manipulation
-from PIL import Image, ImageOps, ImageDraw
-import requests
-from io import BytesIO
+from dash import Input, Output, State, callback, clientside_callback, ctx, ClientsideFunction
+from dash.exceptions import PreventUpdate
+
+from dashboard import config
+from dashboard.aggregation import top_shares
+from dashboard.cache import versioned_cache
+from dashboard.clientside import set_figures, year_data
+from dashboard.figures import PROFILE, TEMPLATE, choropleth_trace, figure_patch, geo_layout, log_range, map_trace_paths, typed_array, uses_log_scale, value_range, with_layout
+from dashboard.images import build_inset_bank, remove_old_inset_banks
+from dashboard.lazy import deferred, page_layout
+from dashboard.payloads import payload_store
 
 # defining name of page and path
 dash.register_page(__name__, path='/Page3', name="Africa: GDP per Capita")
 
 ############################################################################################################
 # Loading data
-url = "https://github.com/10Dennisw/economics-africa-dashboard/raw/master/africa_economics_v2.csv"
-df = pd.read_csv(url)
-filtered_df_map=df[df['Year']==2000]
+# the current version is looked up on every call, so a new version can be swapped in
+from dashboard.data import current_data, on_swap, year_slice
 
-############################################################################################################
-# Defining layout for Page 3 with a bar chart
-layout = html.Div(style={'backgroundColor': 'white', 'color': '#FFFFFF', 'margin': '0', 'width': '1000px'}, children=[
-    html.Div(style={'backgroundColor': 'white', 'width': '990px', 'border': '2px solid black', 'margin-left': '5px', 'margin-right': '5px'}, children=[
-        html.B('Select Year to Filter On:', className = 'fix_label', style = {'color': 'black', 'paddingLeft': '20px'}),
-        dcc.Slider(
-            id='year-slider-page-three',
-            min=df['Year'].min(),
-            max=df['Year'].max(),
-            value=df['Year'].min(), # setting the default value
-            marks={
-                str(year): {'label': str(year), 'style': {'color': 'black'}}  # Setting label color to black
-                for year in range(df['Year'].min(), df['Year'].max() + 1)
-                },
-            step=1
-        ),
-    ]),
-    html.Div(style={'display': 'flex', 'backgroundColor': 'white'}, children=[
-        dcc.Graph(
-            id='gdp-per-capita-graph',
-            style={'border': '2px solid black', 
-                   'height': '375px', 'width': '100%', 
-                   'margin-left': '5px', 'margin-right': '5px', 'margin-top': '6px', 'margin-bottom': '1px', 
-                   'backgroundColor': '#000000'},
-                )
-    ]),
-
-    html.Div(style={'display': 'flex', 'backgroundColor': 'white'}, children=[   
-        # Setting the format for the line chart
-        dcc.Graph(id='histogram-chart',
-                  style={'border': '2px solid black', 
-                         'height': '375px', 'width': '49%', 
-                         'float': 'left',
-                         'margin-left': '5px', 'margin-right': '10px','margin-top': '5px', 'margin-bottom': '1px', 
-                         'backgroundColor': '#000000'}       
-        ),
-        # Setting the format for the bar chart
-        dcc.Graph(id='bar-chart',
-            style={'border': '2px solid black', 
-                   'height': '375px', 'width': '49%', 
-                   'float': 'right', 'margin-top': '5px', 'margin-right': '5px', 'margin-bottom': '1px', 
-                   'backgroundColor': '#000000'}
-        ),
-    ]),
-])
-
-# callack used to create interactivity between the user (through the slider)
-@callback(
-    [Output('gdp-per-capita-graph', 'figure'),
-     Output('histogram-chart', 'figure'),
-     Output('bar-chart', 'figure')],
-    [Input('year-slider-page-three', 'value')],
-    allow_duplicate=True
-)
+# the indicator the charts show until another one is picked in the metric selector
+DEFAULT_METRIC = 'GDP per Capita'
 
-def update_charts(selected_year):
-    # filter the df based upon the year selected by the user on the slider
-    filtered_df = df.loc[df['Year'] == selected_year]
+# rendering the inset images of the small islands for every year once, the callback only looks them up
+# with DASHBOARD_LAZY_PAGES they are rendered when the page is first used, and otherwise again for each new version
+# of the dataset before it is swapped in
+def build_insets():
+    data = current_data()
+    return build_inset_bank(data.df, data.year_index, data.version, config.INSET_WORKERS, config.INSET_BANK_DIR)
 
-    ############################################################################################################
-    # Creating Map Figure
+inset_bank = deferred(build_insets)
 
-    map_fig = px.choropleth(
-        filtered_df,
-        locations='Code',
-        color=np.log(filtered_df['GDP per Capita']),
-        hover_name='Country',
-        hover_data={'Code': False, 'GDP per Capita': ':,'},
-        custom_data=[filtered_df['GDP per Capita']],
-        color_continuous_scale='reds',
-        projection='orthographic',
-        title='',
-        template='plotly',
-        range_color=[min(np.log(df['GDP per Capita'])), max(np.log(df['GDP per Capita']))]
-    )
+# the inset images of the versions older than the one replaced by a new version are deleted from disk
+if config.INSET_BANK_DIR:
+    on_swap(lambda keep: remove_old_inset_banks(config.INSET_BANK_DIR, keep))
+
+############################################################################################################
+# Defining layout for Page 3 with a bar chart, the figures are added by the callbacks or by build_layout
+# the slider covers the years of the version of the dataset being served, so it is built for each version
+def build_base_layout():
+    df = current_data().df
+    return html.Div(style={'backgroundColor': 'white', 'color': '#FFFFFF', 'margin': '0', 'width': '1000px'}, children=[
+        html.Div(style={'backgroundColor': 'white', 'width': '990px', 'border': '2px solid black', 'margin-left': '5px', 'margin-right': '5px'}, children=[
+            html.B('Select Year to Filter On:', className = 'fix_label', style = {'color': 'black', 'paddingLeft': '20px'}),
+            dcc.Slider(
+                id='year-slider-page-three',
+                min=df['Year'].min(),
+                max=df['Year'].max(),
+                value=df['Year'].min(), # setting the default value
+                marks={
+                    str(year): {'label': str(year), 'style': {'color': 'black'}}  # Setting label color to black
+                    for year in range(df['Year'].min(), df['Year'].max() + 1)
+                    },
+                step=1
+            ),
+        ]),
+        html.Div(style={'display': 'flex', 'backgroundColor': 'white'}, children=[
+            dcc.Graph(
+                id='gdp-per-capita-graph',
+                style={'border': '2px solid black', 
+                       'height': '375px', 'width': '100%', 
+                       'margin-left': '5px', 'margin-right': '5px', 'margin-top': '6px', 'margin-bottom': '1px', 
+                       'backgroundColor': '#000000'},
+                    )
+        ]),
 
-    # Update the layout
-    map_fig.update_layout(
-        title=dict(
-            text=f'<b>Map of the Logarithm of GDP per Capita in {selected_year}</b>',
-            x=0.5  # Center the title
+        html.Div(style={'display': 'flex', 'backgroundColor': 'white'}, children=[   
+            # Setting the format for the line chart
+            dcc.Graph(id='histogram-chart',
+                      style={'border': '2px solid black', 
+                             'height': '375px', 'width': '49%', 
+                             'float': 'left',
+                             'margin-left': '5px', 'margin-right': '10px','margin-top': '5px', 'margin-bottom': '1px', 
+                             'backgroundColor': '#000000'}       
             ),
-        geo=dict(
-            showframe=False,
-            showcoastlines=True,
-            showcountries=True,
-            countrycolor="#d1d1d1",
-            showocean=True,
-            oceancolor="#c9d2e0",
-            showlakes=True,
-            lakecolor="#99c0db",
-            showrivers=True,
-            rivercolor="#99c0db",
-            projection_type='orthographic'
+            # Setting the format for the bar chart
+            dcc.Graph(id='bar-chart',
+                style={'border': '2px solid black', 
+                       'height': '375px', 'width': '49%', 
+                       'float': 'right', 'margin-top': '5px', 'margin-right': '5px', 'margin-bottom': '1px', 
+                       'backgroundColor': '#000000'}
             ),
-        paper_bgcolor="white",
-        font=dict(color="black"),
-        margin=dict(l=20, r=20, t=40, b=10)
-    )
-    
-    # setting the border line width
-    map_fig.update_traces(marker=dict(line={"color": "black", "width": 1.5}))
-    
-    # setting the map to focus on Africa
-    map_fig.update_geos(projection_rotation=dict(lon=17, lat=2)) 
-    map_fig.update_geos(projection_scale=1.43)  # updating zoom 
-
-    map_fig.add_trace(go.Scattergeo(
+        ]),
+    ])
+
+# the response only depends on the year and the metric, so it can be served from the payload store
+payload_store.register('page3', ['gdp-per-capita-graph.figure', 'histogram-chart.figure', 'bar-chart.figure'], 'year-slider-page-three', ['page3-metric'])
+
+# the selector of the metric the charts show, with every indicator of the dataset
+def build_metric_selector():
+    return html.Div(style={'paddingLeft': '20px', 'paddingRight': '20px', 'paddingBottom': '10px'}, children=[
+        html.B('Select Metric:', className = 'fix_label', style = {'color': 'black'}),
+        dcc.Dropdown(id='page3-metric', options=current_data().panel.names, value=DEFAULT_METRIC, clearable=False, style={'color': 'black'}),
+    ])
+
+############################################################################################################
+# Map layout
+
+# markers showing where the small islands are on the map
+island_markers = [
+    dict(
+        type='scattergeo',
         lon=[55.4920],  # Longitude for Seychelles 
         lat=[-4.6796],  # Latitude for Seychelles
         mode='markers',
@@ -142,9 +114,9 @@ def update_charts(selected_year):
         ),
         name='Seychelles',
         showlegend=False
-    ))
-
-    map_fig.add_trace(go.Scattergeo(
+    ),
+    dict(
+        type='scattergeo',
         lon=[57.5522],  # Longitude for Mauritius
         lat=[-20.3484],  # Latitude for Mauritius
         mode='markers',
@@ -155,13 +127,39 @@ def update_charts(selected_year):
         ),
         name='Mauritius',
         showlegend=False
-    ))
+    ),
+]
+
+# setting size and format of the sychelles image
+x0_seychelles, y0_seychelles = 0.85, 0.6
+sizex_seychelles = 0.15
+sizey_seychelles = 0.35
+
+seychelles_image = dict(
+    x=x0_seychelles+0.01, y=y0_seychelles+0.001,
+    xref="paper", yref="paper",
+    sizex=0.34, sizey=0.34,
+    xanchor="left", yanchor="bottom",
+    layer="above"
+)
 
-    map_fig.update_layout(
-        margin=dict(r=100)  # Increase the right margins for images
-    )    
+# setting size and format of the mauritius image
+x0_mauritius, y0_mauritius= 0.8, 0.11
+sizex_mauritius = 0.07
+sizey_mauritius = 0.20
+
+mauritius_image = dict(
+    x=x0_mauritius, y=y0_mauritius,
+    xref="paper", yref="paper",
+    sizex=0.2, sizey=0.2,
+    xanchor="left", yanchor="bottom",
+    layer="above"
+)
 
-    map_fig.update_layout(
+# the colour scale covers the range of GDP per capita over every year, so the layout is built once for each version
+# with the right margin increased for the images
+def build_default_map_layout():
+    return with_layout(geo_layout('color', log_range(current_data().df['GDP per Capita']), dict(l=20, r=100, t=40, b=10)),
         annotations=[
             dict(
                 text="<b>Equitorial Guinea</b>",
@@ -252,267 +250,242 @@ def update_charts(selected_year):
                 yanchor="bottom" ,
                 bgcolor="white", 
             ),
-        ]),
-    
-    ############################################################################################################
-    # defining colour scale 
-    red_scale_rgb = [
-        (0.0, (255,245,240)),  
-        (0.125, (254,224,210)),  
-        (0.25, (252,187,161)),  
-        (0.375, (252,146,114)), 
-        (0.5, (251,106,74)),  
-        (0.625, (239,59,44)),
-        (0.75, (203,24,29)), 
-        (0.875, (165,15,21)),  
-        (1.0, (103,0,13)),
-    ]
-
-    # defining normalisation function
-    def generating_normalised_val(new_value, max_val, min_val):
-        return(new_value - min_val) / (max_val - min_val)
-    
-    # function to interporate colour for normalised_val
-    def interpolate_color(value, color_scale):
-        # Ensure the value is within the 0-1 range
-        value = max(0, min(1, value))
-
-        # Find the two closest points in the colorscale
-        for i in range(1, len(color_scale)):
-            if value <= color_scale[i][0]:
-                lower = color_scale[i - 1]
-                upper = color_scale[i]
-                break
-        else:
-            # If the value is above the last threshold, use the last color
-            return color_scale[-1][1]
-
-        # Interpolate between the two colors
-        ratio = (value - lower[0]) / (upper[0] - lower[0])
-        lower_color = lower[1]
-        upper_color = upper[1]
-
-        # Linear interpolation of the RGB components
-        interp_color = [int(lower_val + (upper_val - lower_val) * ratio) for lower_val, upper_val in zip(lower_color, upper_color)]
-        return interp_color
-
-    # retriving target rgb values for the seychelles
-    filtered_seychelles_df = filtered_df_map[filtered_df_map['Country'] == 'Seyshelles']
-    value = filtered_seychelles_df['GDP per Capita'].iloc[0]
-    new_value=np.log(value)
-    normalised_val = generating_normalised_val(new_value, 9, 5)
-    reds_target, greens_target, blue_target  = interpolate_color(normalised_val, red_scale_rgb)
-
-    # image manipulation to set the image to target rgb colours
-    # Define the path to your image
-    response = requests.get("https://raw.githubusercontent.com/10Dennisw/economics-africa-dashboard/master/seychelles-map.webp")
-
-    # Load the image
-    img = Image.open(BytesIO(response.content))
-
-
-    # Convert the image to RGBA if it's not already in that mode
-    if img.mode != 'RGBA':
-        img = img.convert('RGBA')
-
-    # Prepare the new image
-    new_img_s = Image.new('RGBA', img.size)
-    width, height = img.size
-
-    # Define the black and red colors
-    black = (0, 0, 0, 255)
-    target_colour = (reds_target, greens_target, blue_target, 255)
-
-    width, height = img.size
-    for x in range(width):
-        for y in range(height):
-            r, g, b, a = img.getpixel((x, y))
-            # If the pixel is black, copy it to the new image
-            if r <= 20 or g <= 20 or b <= 20:
-                new_img_s.putpixel((x, y), target_colour)
-
-    # setting size and format of the sychelles image
-    x0_seychelles, y0_seychelles = 0.85, 0.6
-    sizex_seychelles = 0.15
-    sizey_seychelles = 0.35
-
-    map_fig.add_shape(type="rect",
-        x0=x0_seychelles, y0=y0_seychelles, x1=x0_seychelles+sizex_seychelles, y1=y0_seychelles+sizey_seychelles,
-        line=dict(color="black", width=1),
-        fillcolor="white",
-        xref="paper", yref="paper",
-        layer="below"
+        ],
+        shapes=[
+            dict(type="rect",
+                x0=x0_seychelles, y0=y0_seychelles, x1=x0_seychelles+sizex_seychelles, y1=y0_seychelles+sizey_seychelles,
+                line=dict(color="black", width=1),
+                fillcolor="white",
+                xref="paper", yref="paper",
+                layer="below"
+            ),
+            dict(type="rect",
+                x0=x0_mauritius, y0=y0_mauritius, x1=x0_mauritius+sizex_mauritius, y1=y0_mauritius+sizey_mauritius,
+                line=dict(color="black", width=1),
+                fillcolor="white",
+                xref="paper", yref="paper",
+                layer="below"
+            ),
+        ]
     )
 
-    map_fig.add_layout_image(dict(
-        source=new_img_s,
-        x=x0_seychelles+0.01, y=y0_seychelles+0.001,
-        xref="paper", yref="paper",
-        sizex=0.34, sizey=0.34,
-        xanchor="left", yanchor="bottom",
-        layer="above"
-    ))
-
-    # retrieving rbg colours for the mauritius image
-    filtered_mauritius_df = filtered_df_map[filtered_df_map['Country'] == 'Mauritius']
-    value = filtered_mauritius_df['GDP per Capita'].iloc[0]
-    new_value=np.log(value)
-    normalised_val = generating_normalised_val(new_value, 9, 5)
-    reds_target, greens_target, blue_target  = interpolate_color(normalised_val, red_scale_rgb)
-
-    # manipulating image to make it the target colour
-    response = requests.get("https://raw.githubusercontent.com/10Dennisw/economics-africa-dashboard/master/mauritius_img.png")
-    img = Image.open(BytesIO(response.content))
-
-    # Ensure the image is in RGBA mode
-    if img.mode != 'RGBA':
-        img = img.convert('RGBA')
-
-    # Add padding around the image
-    padding_width = 10  # Padding width in pixels
-    padded_img = ImageOps.expand(img, border=padding_width, fill=(0, 0, 0, 0))  # Fill with transparent color for RGBA
-
-    # Prepare the new image with the same size as the padded image
-    new_img_m = Image.new('RGBA', padded_img.size)
-
-    # Define colours and thickness
-    transparent_colour = (0, 0, 0, 0)  # Transparent
-    target_colour = (reds_target, greens_target, blue_target, 255)  # Red (example target color)
-    outline_colour = (0, 0, 0, 255)  # Black for the outline
-    outline_thickness = 7  # Thickness of the outline
-
-    # a function to check if a pixel is a target pixel
-    def is_target_pixel(pixel):
-        r, g, b, a = pixel
-        return r >= 20 and g >= 20 and b >= 20
-
-    # List to store edge pixels
-    edge_pixels = []
-
-    # Identifing the edge pixels
-    for x in range(padded_img.size[0]):
-        for y in range(padded_img.size[1]):
-            current_pixel = padded_img.getpixel((x, y))
-            if is_target_pixel(current_pixel):
-                neighbors = [(x-1, y), (x+1, y), (x, y-1), (x, y+1)]
-                is_edge = any((0 <= nx < padded_img.size[0] and 0 <= ny < padded_img.size[1] and not is_target_pixel(padded_img.getpixel((nx, ny))))
-                            for nx, ny in neighbors)
-                if is_edge:
-                    edge_pixels.append((x, y))
-
-    # Dilating the edge pixels and drawing the outline
-    for x, y in edge_pixels:
-        for dx in range(-outline_thickness, outline_thickness + 1):
-            for dy in range(-outline_thickness, outline_thickness + 1):
-                if 0 <= x + dx < padded_img.size[0] and 0 <= y + dy < padded_img.size[1]:
-                    new_img_m.putpixel((x + dx, y + dy), outline_colour)
-
-    # Filling in the target areas with the target colour
-    for x in range(padded_img.size[0]):
-        for y in range(padded_img.size[1]):
-            if is_target_pixel(padded_img.getpixel((x, y))) and new_img_m.getpixel((x, y)) != outline_colour:
-                new_img_m.putpixel((x, y), target_colour)
-            else:
-                if new_img_m.getpixel((x, y)) != outline_colour:
-                    new_img_m.putpixel((x, y), transparent_colour)
-
-    # setting size and format of the sychelles image
-    x0_mauritius, y0_mauritius= 0.8, 0.11
-    sizex_mauritius = 0.07
-    sizey_mauritius = 0.20
-
-    map_fig.add_shape(type="rect",
-        x0=x0_mauritius, y0=y0_mauritius, x1=x0_mauritius+sizex_mauritius, y1=y0_mauritius+sizey_mauritius,
-        line=dict(color="black", width=1),
-        fillcolor="white",
-        xref="paper", yref="paper",
-        layer="below"
-    )
+@versioned_cache(maxsize=32)
+def metric_map(metric):
+    '''
+    Function to get the layout of the map for a metric, built once for each metric and version of the dataset
+    The inset images of the small islands are coloured by GDP per capita, so the maps of other metrics only mark the
+    islands, without the insets
+    Input arguments: name of the indicator
+    Returns (whether the map is coloured by the logarithm, layout of the map)
+    '''
+    if metric == DEFAULT_METRIC:
+        return True, build_default_map_layout()
+    values = current_data().panel.column(metric)
+    log = uses_log_scale(values)
+    return log, geo_layout('color', log_range(values) if log else value_range(values), dict(l=20, r=20, t=40, b=10))
+
+############################################################################################################
+# Histogram and bar chart layouts
+
+# the parts of the histogram that are the same every year
+hist_trace = dict(
+    type='histogram',
+    nbinsx=50,
+    bingroup='x',
+    orientation='v',
+    xaxis='x',
+    yaxis='y',
+    name='',
+    legendgroup='',
+    showlegend=False,
+    hovertemplate='GDP per Capita=%{x}<br>count=%{y}<extra></extra>',
+    # adding a black outline around the each bar of the histogram
+    marker=dict(color='#E14DFF', pattern=dict(shape=''), line=dict(color='black', width=1.5))
+)
+
+hist_layout = dict(
+    template=TEMPLATE,
+    xaxis=dict(anchor='y', domain=[0.0, 1.0], title=dict(text='GDP per Capita')),
+    yaxis=dict(anchor='x', domain=[0.0, 1.0], title=dict(text='count')),
+    legend=dict(tracegroupgap=0),
+    barmode='relative',
+    font=dict(color="black")
+)
+
+# the parts of the bar chart that are the same every year
+bar_trace = dict(
+    type='bar',
+    orientation='h',
+    marker=dict(line=dict(color='black', width=1.5)) # adding black outline around each bar
+)
 
-    # colour manipulation of the image to make it the shade of red
+# vertical line showing the average GDP per Capita, placed for each year
+median_line = dict(
+    type="line",
+    y0=-0.4,
+    line=dict(
+        color="black",
+        width=3,
+        dash="dashdot"
+        ),
+    name='Average GDP per Capita'
+)
 
-    map_fig.add_layout_image(dict(
-        source=new_img_m,
-        x=x0_mauritius, y=y0_mauritius,
-        xref="paper", yref="paper",
-        sizex=0.2, sizey=0.2,
-        xanchor="left", yanchor="bottom",
-        layer="above"
-    ))
+# adding titles and axis labels
+bar_layout = dict(
+    template=TEMPLATE,
+    title=dict(text='<b>Top 10 Economies (GDP per Capita)</b>', x=0.5),
+    yaxis=dict(title=dict(text='Country')),
+    xaxis=dict(title=dict(text='GDP per Capita')),
+    font=dict(color="black"),
+    # adding annotation for medium line
+    annotations=[dict(font=dict(color='black',size=10),
+                      x=0.1,
+                      y=1.08,
+                      showarrow=False,
+                      text="<b>Medium GDP per Capita of African Economies</b>",
+                      textangle=0,
+                      xanchor='left',
+                      xref="paper",
+                      yref="paper"
+                      )]
+)
 
-    config = {'staticPlot': True}
+@functools.lru_cache(maxsize=32)
+def metric_charts(metric):
+    '''
+    Function to get the histogram and bar chart skeletons for a metric, built once for each metric
+    Input arguments: name of the indicator
+    Returns (histogram trace, histogram layout, bar chart layout)
+    '''
+    if metric == DEFAULT_METRIC:
+        return hist_trace, hist_layout, bar_layout
+    return (with_layout(hist_trace, hovertemplate=f'{metric}=%{{x}}<br>count=%{{y}}<extra></extra>'),
+            with_layout(hist_layout, xaxis=with_layout(hist_layout['xaxis'], title=dict(text=metric))),
+            with_layout(bar_layout,
+                        title=dict(text=f'<b>Top 10 Economies ({metric})</b>', x=0.5),
+                        xaxis=dict(title=dict(text=metric)),
+                        annotations=[with_layout(bar_layout['annotations'][0], text=f"<b>Medium {metric} of African Economies</b>")]))
+
+def update_charts(selected_year, metric=DEFAULT_METRIC):
+    # filter the df based upon the year selected by the user on the slider, with the metric picked
+    filtered_df = year_slice(selected_year, (metric,))
 
+    ############################################################################################################
+    # Creating Map Figure
 
+    # assembling the map from the layout built once for every year, the trace of this year and the inset images
+    # of the small islands, coloured by their GDP per capita in the selected year
+    log, metric_map_layout = metric_map(metric)
+    if metric == DEFAULT_METRIC:
+        map_fig = {
+            'data': [choropleth_trace(filtered_df, 'GDP per Capita')] + island_markers,
+            'layout': with_layout(metric_map_layout,
+                title=dict(
+                    text=f'<b>Map of the Logarithm of GDP per Capita in {selected_year}</b>',
+                    x=0.5  # Center the title
+                    ),
+                images=[
+                    dict(seychelles_image, source=inset_bank().get(('seychelles', selected_year))),
+                    dict(mauritius_image, source=inset_bank().get(('mauritius', selected_year))),
+                ]
+            )
+        }
+    else:
+        title = f'Map of the Logarithm of {metric}' if log else f'Map of {metric}'
+        map_fig = {
+            'data': [choropleth_trace(filtered_df, metric, log)] + island_markers,
+            'layout': with_layout(metric_map_layout, title=dict(text=f'<b>{title} in {selected_year}</b>', x=0.5))
+        }
 
     ############################################################################################################
     # Creating Histogram figure
-    hist_fig = px.histogram(filtered_df, 
-                            x='GDP per Capita', 
-                            nbins=50, 
-                            title=f'<b>Histogram of (GDP per Capita) in {selected_year}</b>', 
-                            labels={'GDP per Capita': 'GDP per Capita', 'count': 'Frequency'})
-    
-    # adding a black outline around the each bar of the histogram
-    hist_fig.update_traces(marker_color='#E14DFF', marker_line_color='black', marker_line_width=1.5)
-
-    hist_fig.update_layout(title_x=0.5, # setting the title to be in the middle of the figure
-                           font=dict(color="black")
-                           )
+    metric_hist_trace, metric_hist_layout, metric_bar_layout = metric_charts(metric)
+    hist_fig = {'data': [with_layout(metric_hist_trace, x=typed_array(filtered_df[metric].to_numpy()))],
+                'layout': with_layout(metric_hist_layout, title=dict(text=f'<b>Histogram of ({metric}) in {selected_year}</b>', x=0.5))}
 
     ############################################################################################################
     # Creating bar chart
 
     # defining average value through the median due to outliers
-    average_val = filtered_df['GDP per Capita'].median()
+    average_val = filtered_df[metric].median()
     # filtering and sorting the dataframe to show the top 10 values in order
-    top_10 = filtered_df.nlargest(10, 'GDP per Capita')
-    top_10 = top_10.sort_values(by=['GDP per Capita'], ascending=True)
-
-    # creating a horizontal bar plot
-    bar_fig = go.Figure(go.Bar(
-        y=top_10['Country'],
-        x=top_10['GDP per Capita'],
-        orientation='h'
-    ))
-
-    # adding a vertical line to show average GDP per Capita
-    bar_fig.add_shape(
-        type="line",
-        x0=average_val,
-        y0=-0.4,
-        x1=average_val,
-        y1=len(top_10),
-        line=dict(
-            color="black",
-            width=3,
-            dash="dashdot"
-            ),
-        name='Average GDP per Capita'
-        )
-
-    # adding titles and axis labels
-    bar_fig.update_layout(
-        title=f'<b>Top 10 Economies (GDP per Capita)</b>',
-        title_x=0.5,
-        yaxis=dict(title='Country'),
-        xaxis=dict(title='GDP per Capita'),
-        font=dict(color="black")
+    top_10 = top_shares(metric, 10)[selected_year]['top'].iloc[::-1]
+
+    # creating a horizontal bar plot, with a vertical line to show average of the metric
+    bar_fig = {'data': [with_layout(bar_trace, y=top_10['Country'].tolist(), x=typed_array(top_10[metric].to_numpy()))],
+               'layout': with_layout(metric_bar_layout, shapes=[with_layout(median_line, x0=average_val, x1=average_val, y1=len(top_10))])}
+
+    return map_fig, hist_fig, bar_fig
+
+# outputs updated by the slider
+chart_outputs = [Output('gdp-per-capita-graph', 'figure'),
+                 Output('histogram-chart', 'figure'),
+                 Output('bar-chart', 'figure')]
+
+# the parts of each figure that change with the year, as (paths in each trace, paths in the layout, traces to update)
+# only the choropleth of the map changes, the island markers, annotations and shapes are left as they are, and so
+# are the countries of the map when every year has the same ones (see map_trace_paths)
+chart_patch_paths = [
+    (['z', 'customdata'], [('title', 'text'), ('images', 0, 'source'), ('images', 1, 'source')], [0]),
+    (['x'], [('title', 'text')], None),
+    (['x', 'y'], [('shapes', 0, 'x0'), ('shapes', 0, 'x1'), ('shapes', 0, 'y1')], None),
+]
+
+def update_figures(selected_year, metric=DEFAULT_METRIC):
+    '''
+    Function to update the charts when the slider moves or another metric is picked, the first render of the page
+    and a new metric get the whole figures and later moves of the slider only send the parts that change with the year
+    Input arguments: year selected on the slider, metric picked
+    Returns list of figures or dash Patches
+    '''
+    # the page may still show the slider of an older version of the dataset, with years this version doesn't have
+    if metric not in current_data().panel or selected_year not in current_data().year_index:
+        raise PreventUpdate
+    figures = update_charts(selected_year, metric)
+    if list(ctx.triggered_prop_ids) != ['year-slider-page-three.value']:
+        return figures
+    map_paths, map_layout_paths, map_traces = chart_patch_paths[0]
+    if metric != DEFAULT_METRIC:
+        # the maps of other metrics have no inset images to update
+        map_layout_paths = [('title', 'text')]
+    patch_paths = [(map_trace_paths(map_paths, current_data().same_countries), map_layout_paths, map_traces)] + chart_patch_paths[1:]
+    return [figure_patch(figure, *paths) for figure, paths in zip(figures, patch_paths)]
+
+def build_layout():
+    '''
+    Function to finish the layout of the page, adding the figures the slider mode needs before the first callback
+    Returns the layout, built from the version of the dataset being served
+    '''
+    data = current_data()
+    df, year_index = data.df, data.year_index
+    base_layout = build_base_layout()
+    if config.SLIDER_MODE == 'clientside':
+        # building the figures for the first year on the server, the browser then swaps in the values of each year
+        initial_figures = update_charts(int(df['Year'].min()))
+        set_figures(base_layout, {output.component_id: figure for output, figure in zip(chart_outputs, initial_figures)})
+        base_layout.children.append(dcc.Store(id='page3-year-data', data={
+            'years': year_data(df, year_index),
+            'insets': {str(year): [inset_bank().get(('seychelles', year)), inset_bank().get(('mauritius', year))] for year in year_index},
+            'trim_hover': PROFILE['trim_hover'],
+        }))
+    else:
+        # the charts are built on the server, so they can show any metric of the dataset
+        base_layout.children[0].children.append(build_metric_selector())
+    return base_layout
+
+# the layout is finished when the app starts (and for each new version of the dataset), or on the first visit with
+# DASHBOARD_LAZY_PAGES
+layout = page_layout(build_layout)
+
+if config.SLIDER_MODE == 'clientside':
+    clientside_callback(
+        ClientsideFunction(namespace='dashboard', function_name='updatePage3'),
+        chart_outputs,
+        [Input('year-slider-page-three', 'value')],
+        [State('page3-year-data', 'data')] + [State(output.component_id, 'figure') for output in chart_outputs],
+        prevent_initial_call=True
     )
-
-    # adding black outline around each bar
-    bar_fig.update_traces(marker_line_color='black', marker_line_width=1.5)
-
-    # adding annotation for medium line
-    bar_fig.add_annotation(dict(font=dict(color='black',size=10),
-                                x=0.1,
-                                y=1.08,
-                                showarrow=False,
-                                text="<b>Medium GDP per Capita of African Economies</b>",
-                                textangle=0,
-                                xanchor='left',
-                                xref="paper",
-                                yref="paper"
-                                )
-                            )
-
-    return map_fig, hist_fig, bar_fig
\ No newline at end of file
+else:
+    # callack used to create interactivity between the user (through the slider)
+    callback(chart_outputs, [Input('year-slider-page-three', 'value'), Input('page3-metric', 'value')], allow_duplicate=True)(update_figures)
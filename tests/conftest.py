@@ -0,0 +1,5 @@
+# lets the tests import the app's packages when pytest is run from anywhere
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,76 @@
+# tests of the figure cache and of the decorator memoizing the callbacks
+import types
+
+from dashboard import cache
+from dashboard.cache import FigureCache
+
+
+def test_get_counts_hits_and_misses():
+    figure_cache = FigureCache(100)
+    figure_cache.put('a', 'figure a', 10)
+    assert figure_cache.get('a') == 'figure a'
+    assert figure_cache.get('b') is None
+    assert (figure_cache.hits, figure_cache.misses) == (1, 1)
+
+
+def test_least_recently_used_is_evicted_first():
+    figure_cache = FigureCache(30)
+    for key in 'abc':
+        figure_cache.put(key, key, 10)
+    # using a makes b the least recently used
+    figure_cache.get('a')
+    figure_cache.put('d', 'd', 10)
+    assert figure_cache.get('b') is None
+    assert [figure_cache.get(key) for key in 'acd'] == ['a', 'c', 'd']
+    assert figure_cache.current_bytes == 30
+
+
+def test_replacing_a_key_counts_its_bytes_once():
+    figure_cache = FigureCache(100)
+    figure_cache.put('a', 'old', 40)
+    figure_cache.put('a', 'new', 25)
+    assert figure_cache.get('a') == 'new'
+    assert (len(figure_cache), figure_cache.current_bytes) == (1, 25)
+
+
+def test_value_larger_than_the_budget_is_not_cached():
+    figure_cache = FigureCache(30)
+    figure_cache.put('a', 'a', 10)
+    figure_cache.put('big', 'big', 31)
+    assert figure_cache.get('big') is None
+    # the entries already cached are kept
+    assert figure_cache.get('a') == 'a'
+
+
+def test_clear():
+    figure_cache = FigureCache(100)
+    figure_cache.put('a', 'a', 10)
+    figure_cache.clear()
+    assert (len(figure_cache), figure_cache.current_bytes) == (0, 0)
+
+
+def test_memoize_keys_by_page_version_and_inputs(monkeypatch):
+    dataset = types.SimpleNamespace(version='version 1')
+    monkeypatch.setattr(cache, 'current_data', lambda: dataset)
+    figure_cache = FigureCache(10 ** 6)
+    calls = []
+
+    def update_charts(year, metric='GDP (USD)'):
+        calls.append((year, metric))
+        return {'data': [], 'layout': {'title': {'text': '{} {}'.format(metric, year)}}}
+
+    page1 = figure_cache.memoize('page1')(update_charts)
+    page3 = figure_cache.memoize('page3')(update_charts)
+
+    assert page1(2000) is page1(2000, 'GDP (USD)')
+    assert calls == [(2000, 'GDP (USD)')]
+    page1(2001)
+    page1(2000, 'Population')
+    page3(2000)
+    assert len(calls) == 4
+
+    # a new version of the dataset doesn't use the figures of the old one
+    dataset.version = 'version 2'
+    page1(2000)
+    assert len(calls) == 5
+    assert page1.__wrapped__ is update_charts
@@ -0,0 +1,46 @@
+# tests of the year slider callbacks, sent through the Flask test client like the browser sends them
+import pytest
+
+import app
+
+# the outputs, year slider and metric selector of each page
+PAGES = {
+    'page1': (['world-map', 'world-map-with-population', 'gdp-bar-chart', 'gdp-pie-chart'], 'year-slider', 'page1-metric'),
+    'page3': (['gdp-per-capita-graph', 'histogram-chart', 'bar-chart'], 'year-slider-page-three', 'page3-metric'),
+}
+
+
+def slider_request(page, year, metric='GDP (USD)', moved=True):
+    '''
+    Function to send the request of a page's callback, as for a move of the year slider or for the first render
+    Returns the response
+    '''
+    outputs, slider, selector = PAGES[page]
+    body = {
+        'output': '..' + '...'.join(output + '.figure' for output in outputs) + '..',
+        'outputs': [{'id': output, 'property': 'figure'} for output in outputs],
+        'inputs': [{'id': slider, 'property': 'value', 'value': year},
+                   {'id': selector, 'property': 'value', 'value': metric}],
+        'changedPropIds': [slider + '.value'] if moved else [],
+        'state': [],
+    }
+    return app.app.server.test_client().post('/_dash-update-component', json=body)
+
+
+@pytest.mark.parametrize('page', PAGES)
+@pytest.mark.parametrize('moved', [True, False])
+def test_year_in_data(page, moved):
+    response = slider_request(page, 2000, moved=moved)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('page', PAGES)
+def test_year_missing_from_data_is_not_updated(page):
+    # a year an older version of the dataset had, still on the slider of an open page
+    assert slider_request(page, 1999).status_code == 204
+    assert slider_request(page, 1999, moved=False).status_code == 204
+
+
+@pytest.mark.parametrize('page', PAGES)
+def test_unknown_metric_is_not_updated(page):
+    assert slider_request(page, 2000, metric='not an indicator').status_code == 204
@@ -0,0 +1,75 @@
+# tests of the compression of the responses and of the ETags of the layout and component bundle routes
+import gzip
+
+import pytest
+from flask import Flask, Response
+
+from dashboard.compression import ResponseCompressor
+
+LAYOUT = b'{"props": {"children": []}}' * 100
+BUNDLE = b'console.log("dash");' * 200
+
+
+@pytest.fixture
+def client():
+    server = Flask(__name__)
+    compressor = ResponseCompressor()
+
+    @server.route('/_dash-layout')
+    def layout():
+        return Response(LAYOUT, content_type='application/json')
+
+    @server.route('/_dash-component-suites/dash/dash.js')
+    def bundle():
+        return Response(BUNDLE, content_type='application/javascript')
+
+    @server.route('/small')
+    def small():
+        return Response(b'{}', content_type='application/json')
+
+    compressor.init_app(server)
+    server.compressor = compressor
+    return server.test_client()
+
+
+def test_compressed_when_accepted(client):
+    response = client.get('/_dash-layout', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data) == LAYOUT
+
+
+def test_not_compressed_when_not_accepted_or_small(client):
+    response = client.get('/_dash-layout')
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == LAYOUT
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+@pytest.mark.parametrize('path', ['/_dash-layout', '/_dash-component-suites/dash/dash.js'])
+def test_current_copy_gets_304(client, path):
+    response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+    etag = response.headers['ETag']
+    assert etag.endswith('-gzip"')
+
+    response = client.get(path, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_each_encoding_has_its_own_etag(client):
+    gzip_etag = client.get('/_dash-layout', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    identity_etag = client.get('/_dash-layout').headers['ETag']
+    assert gzip_etag != identity_etag
+    # the copy of another encoding is sent again
+    response = client.get('/_dash-layout', headers={'If-None-Match': gzip_etag})
+    assert response.status_code == 200
+    assert response.data == LAYOUT
+
+
+def test_bundle_is_compressed_once(client):
+    first = client.get('/_dash-component-suites/dash/dash.js', headers={'Accept-Encoding': 'gzip'})
+    second = client.get('/_dash-component-suites/dash/dash.js', headers={'Accept-Encoding': 'gzip'})
+    assert first.data == second.data
+    assert gzip.decompress(first.data) == BUNDLE
+    assert list(client.application.compressor._bundles) == ['/_dash-component-suites/dash/dash.js']
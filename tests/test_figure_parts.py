@@ -0,0 +1,31 @@
+# tests of the building blocks the figures are assembled from
+import numpy as np
+import pytest
+from _plotly_utils.utils import to_typed_array_spec
+
+from dashboard.figures import typed_array
+
+
+@pytest.mark.parametrize('values', [
+    np.array([], dtype=np.int64),
+    np.array([], dtype=float),
+    np.array([3_000_000_000, 1]),
+    np.array([-3_000_000_000, 1]),
+    np.array([5, 70_000], dtype=np.uint64),
+    np.array([2 ** 64 - 1], dtype=np.uint64),
+    np.array([True, False]),
+    np.array([1, 2, 300]),
+    np.array([[1.5], [2.0]]),
+])
+def test_typed_array_matches_plotly(values):
+    # plotly leaves the arrays it has no typed array for as they are, which are then sent as lists
+    expected = to_typed_array_spec(values)
+    if isinstance(expected, np.ndarray):
+        expected = expected.tolist()
+    assert typed_array(values) == expected
+
+
+def test_typed_array_downcasts_integers():
+    assert typed_array(np.array([1, 2, 3]))['dtype'] == 'i1'
+    assert typed_array(np.array([1, 2 ** 20]))['dtype'] == 'i4'
+    assert typed_array(np.array([1, 2 ** 20], dtype=np.uint64))['dtype'] == 'u4'
@@ -0,0 +1,40 @@
+# tests of bringing the chunks of a World Bank export to the schema of the app
+import numpy as np
+import pandas as pd
+
+from dashboard.ingest import GDP_CORRECTIONS, MISSING_CODE, normalize_chunk
+
+
+def test_columns_are_renamed_and_added():
+    chunk = pd.DataFrame({' Country Name ': ['Kenya', 'Atlantis'], 'Time': [2000, 2000],
+                          'GDP (USD)': [100.0, 50.0], 'Population': [4, 5]})
+    chunk = normalize_chunk(chunk)
+    assert list(chunk.columns) == ['Country', 'Year', 'GDP (USD)', 'Population', 'Code', 'GDP per Capita']
+    assert chunk['Code'].tolist() == ['KEN', MISSING_CODE]
+    assert chunk['GDP per Capita'].tolist() == [25.0, 10.0]
+
+
+def test_codes_and_gdp_per_capita_of_the_export_are_kept():
+    chunk = pd.DataFrame({'Country': ['Kenya'], 'Code': ['XYZ'], 'Year': [2000], 'GDP (USD)': [100.0],
+                          'Population': [4], 'GDP per Capita': [1.0]})
+    chunk = normalize_chunk(chunk)
+    assert chunk['Code'].tolist() == ['XYZ']
+    assert chunk['GDP per Capita'].tolist() == [1.0]
+
+
+def test_missing_gdp_is_corrected():
+    country = 'Sao Tome and Principe'
+    chunk = pd.DataFrame({'Country': [country, country, country, 'Kenya'], 'Year': [2000, 2001, 2022, 2001],
+                          'GDP (USD)': [10.0, np.nan, np.nan, np.nan], 'Population': [1, 1, 1, 1]})
+    chunk = normalize_chunk(chunk)
+    corrections = GDP_CORRECTIONS[country]
+    # 2000 has no correction and another country's missing value is left missing
+    assert chunk['GDP (USD)'].tolist()[:3] == [10.0, corrections[2001], corrections[2022]]
+    assert np.isnan(chunk['GDP (USD)'].iloc[3])
+    assert chunk['GDP per Capita'].iloc[1] == corrections[2001]
+
+
+def test_chunk_without_gdp():
+    chunk = normalize_chunk(pd.DataFrame({'Country Name': ['Ghana'], 'Time': [2000], 'Population': [7]}))
+    assert 'GDP per Capita' not in chunk.columns
+    assert chunk['Code'].tolist() == ['GHA']
@@ -0,0 +1,49 @@
+# tests of the charts of Page 1 and Page 3 for indicators picked in the metric selector
+import contextlib
+
+import numpy as np
+import plotly.io as pio
+import pytest
+
+import app  # registers the pages
+from dashboard import data
+from dashboard.indicators import KEY_COLUMNS, frame_panel
+from pages import page1, page3
+
+# a whole number indicator larger than 2^31, stored as int64 like the ingest stores whole number columns
+BIG_METRIC = 'Population (x20)'
+
+
+@contextlib.contextmanager
+def serving(dataset):
+    '''
+    Context manager to serve a dataset to the pages, the way reload_data shows a new version to its hooks
+    '''
+    token = data._warming.set(dataset)
+    try:
+        yield dataset
+    finally:
+        data._warming.reset(token)
+
+
+@pytest.fixture(scope='module')
+def big_metric_dataset():
+    df = data.current_data().df
+    panel = frame_panel(df.assign(**{BIG_METRIC: df['Population'].to_numpy() * 20}), KEY_COLUMNS, {'sha256': 'f' * 64})
+    return data.Dataset(panel, panel.meta['sha256'])
+
+
+def test_big_metric_is_int64_above_int32(big_metric_dataset):
+    values = big_metric_dataset.panel.column(BIG_METRIC)
+    assert values.dtype == np.int64
+    assert values.max() > 2 ** 31
+
+
+@pytest.mark.parametrize('page', [page1, page3])
+def test_charts_of_int64_metric_above_int32(big_metric_dataset, page):
+    with serving(big_metric_dataset):
+        for year in big_metric_dataset.year_index:
+            figures = page.update_charts(year, BIG_METRIC)
+            # the figures must also be serializable the way dash sends them
+            for figure in figures:
+                pio.to_json(figure, validate=False)
@@ -0,0 +1,72 @@
+# tests of the store of the responses of the year slider callbacks
+import gzip
+
+import pytest
+
+from dashboard.data import current_data
+from dashboard.payloads import PayloadStore
+
+OUTPUTS = ['world-map.figure', 'gdp-bar-chart.figure']
+
+
+@pytest.fixture
+def store(tmp_path):
+    payload_store = PayloadStore(str(tmp_path), code='code')
+    payload_store.register('page1', OUTPUTS, 'year-slider', ['page1-metric'])
+    return payload_store
+
+
+def request_body(year=2000, metric='GDP (USD)', changed=('year-slider.value',), outputs=OUTPUTS):
+    return {
+        'outputs': [{'id': output.split('.')[0], 'property': output.split('.')[1]} for output in outputs],
+        'inputs': [{'id': 'year-slider', 'property': 'value', 'value': year},
+                   {'id': 'page1-metric', 'property': 'value', 'value': metric}],
+        'changedPropIds': list(changed),
+    }
+
+
+def test_key_of_a_slider_move(store):
+    assert store.key_for(request_body()) == (current_data().version, 'code', 'page1', tuple(OUTPUTS), 2000,
+                                             ('GDP (USD)',), True)
+
+
+def test_first_render_and_metric_change_are_not_patches(store):
+    assert store.key_for(request_body(changed=()))[-1] is False
+    assert store.key_for(request_body(changed=('page1-metric.value',)))[-1] is False
+    assert store.key_for(request_body(changed=('year-slider.value', 'page1-metric.value')))[-1] is False
+
+
+def test_inputs_are_part_of_the_key(store):
+    keys = {store.key_for(request_body()), store.key_for(request_body(year=2001)),
+            store.key_for(request_body(metric='Population'))}
+    assert len(keys) == 3
+
+
+@pytest.mark.parametrize('body', [
+    None,
+    [],
+    {'outputs': 'world-map.figure'},
+    request_body(outputs=['world-map.figure']),
+    request_body(year='2000'),
+    request_body(year=None),
+    request_body(metric=['GDP (USD)']),
+])
+def test_requests_that_are_not_stored(store, body):
+    assert store.key_for(body) is None
+
+
+def test_payload_is_read_back_from_disk(store, tmp_path):
+    key = store.key_for(request_body())
+    body = b'{"response": "figures"}' * 100
+    payload = store.put(key, body)
+    assert gzip.decompress(payload['gzip']) == body
+
+    # a new process has nothing in memory and reads the file written by the first
+    restarted = PayloadStore(str(tmp_path), code='code')
+    payload = restarted.get(key)
+    assert payload['identity'] == body
+    assert gzip.decompress(payload['gzip']) == body
+    # the stored responses of another deploy are not served
+    other_deploy = PayloadStore(str(tmp_path), code='other code')
+    other_deploy.register('page1', OUTPUTS, 'year-slider', ['page1-metric'])
+    assert other_deploy.get(other_deploy.key_for(request_body())) is None
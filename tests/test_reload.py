@@ -0,0 +1,96 @@
+# tests of swapping in a new version of the dataset when its source changes
+import types
+
+import pytest
+
+from dashboard import data
+from dashboard.reload import DataReloader
+
+
+class Source:
+    '''
+    A source of the dataset standing in for the csv file or the panel directory, loaded into the reloader's view of
+    the data module
+    '''
+
+    def __init__(self, monkeypatch):
+        self.fingerprint = 'v1'
+        self.fails = False
+        self.loads = 0
+        self.dataset = types.SimpleNamespace(version='v1', fingerprint='v1')
+        monkeypatch.setattr(data, 'source_fingerprint', self.source_fingerprint)
+        monkeypatch.setattr(data, 'reload_data', self.reload_data)
+        monkeypatch.setattr(data, 'current_data', lambda: self.dataset)
+
+    def source_fingerprint(self):
+        if self.fingerprint is None:
+            raise FileNotFoundError('the source is being replaced')
+        return self.fingerprint
+
+    def reload_data(self):
+        self.loads += 1
+        if self.fails:
+            raise ValueError('the new version is broken')
+        self.dataset = types.SimpleNamespace(version=self.fingerprint, fingerprint=self.fingerprint)
+        return True
+
+
+@pytest.fixture
+def source(monkeypatch):
+    return Source(monkeypatch)
+
+
+def test_unchanged_source_is_not_loaded(source):
+    reloader = DataReloader()
+    assert reloader.check() is False
+    assert source.loads == 0
+
+
+def test_changed_source_is_swapped_in(source):
+    reloader = DataReloader()
+    source.fingerprint = 'v2'
+    assert reloader.check() is True
+    assert (source.dataset.version, reloader.reloads) == ('v2', 1)
+    assert reloader.check() is False
+
+
+def test_failed_version_is_not_tried_again(source):
+    reloader = DataReloader()
+    source.fingerprint = 'v2'
+    source.fails = True
+    assert reloader.check() is False
+    assert reloader.check() is False
+    assert (source.loads, reloader.failures, source.dataset.version) == (1, 1, 'v1')
+
+    # until the source changes again
+    source.fingerprint = 'v3'
+    source.fails = False
+    assert reloader.check() is True
+    assert source.dataset.version == 'v3'
+
+
+def test_forced_check_raises_the_error(source):
+    reloader = DataReloader()
+    source.fails = True
+    with pytest.raises(ValueError):
+        reloader.check(force=True)
+    assert reloader.failures == 1
+
+
+def test_source_being_replaced(source):
+    source.fingerprint = None
+    assert DataReloader().check() is False
+    assert source.loads == 0
+
+
+def test_reload_route(source):
+    from flask import Flask
+    server = Flask(__name__)
+    DataReloader(interval=0).init_app(server, token='secret')
+    client = server.test_client()
+
+    assert client.post('/admin/reload-data').status_code == 403
+    assert client.post('/admin/reload-data', headers={'X-Reload-Token': 'wrong'}).status_code == 403
+    source.fingerprint = 'v2'
+    response = client.post('/admin/reload-data', headers={'X-Reload-Token': 'secret'})
+    assert response.get_json() == {'version': 'v2', 'reloaded': True}
@@ -0,0 +1,47 @@
+# tests of the column store written by the ingest and mapped by every worker
+import numpy as np
+import pandas as pd
+
+from dashboard.store import ALIGNMENT, MAGIC, open_store, smallest_code_type, write_store
+
+
+def test_round_trip(tmp_path):
+    df = pd.DataFrame({
+        'Year': np.array([2000, 2000, 2001], dtype=np.int64),
+        'Country': ['Kenya', 'Ghana', 'Kenya'],
+        'GDP (USD)': [1.5, np.nan, 2.5],
+        'Population': np.array([3 * 2 ** 31, 1, 2], dtype=np.int64),
+    })
+    path = str(tmp_path / 'panel' / 'data.col')
+    write_store(df, path, {'sha256': 'abc'}, ['Country'])
+
+    read_df, meta = open_store(path)
+    assert meta == {'sha256': 'abc'}
+    assert list(read_df.columns) == list(df.columns)
+    assert isinstance(read_df['Country'].dtype, pd.CategoricalDtype)
+    assert read_df['Country'].astype(str).tolist() == df['Country'].tolist()
+    for column in ['Year', 'GDP (USD)', 'Population']:
+        assert read_df[column].dtype == df[column].dtype
+        np.testing.assert_array_equal(read_df[column].to_numpy(), df[column].to_numpy())
+
+
+def test_columns_are_aligned(tmp_path):
+    path = str(tmp_path / 'data.col')
+    write_store(pd.DataFrame({'a': np.arange(3, dtype=np.int8), 'b': np.arange(3, dtype=float)}), path, {}, [])
+    read_df, _ = open_store(path)
+    for column in read_df.columns:
+        values = read_df[column].to_numpy()
+        assert values.__array_interface__['data'][0] % ALIGNMENT == 0
+
+
+def test_smallest_code_type():
+    assert smallest_code_type(2) == np.int8
+    assert smallest_code_type(200) == np.int16
+    assert smallest_code_type(70000) == np.int32
+
+
+def test_unreadable_files(tmp_path):
+    assert open_store(str(tmp_path / 'missing.col')) == (None, None)
+    other = tmp_path / 'other.col'
+    other.write_bytes(b'X' * len(MAGIC) + bytes(64))
+    assert open_store(str(other)) == (None, None)
@@ -0,0 +1,33 @@
+# production entry point for a pre-fork WSGI server, run from the root of the repository with:
+#   gunicorn -c gunicorn.conf.py wsgi:server
+# gunicorn.conf.py loads this module once in the master process before forking the workers, so everything built
+# here (the dataset, the year index, the layouts, the inset images and the figures of every year) is shared by the
+# workers copy-on-write instead of being built again in each of them
+import gc
+
+import dash
+
+from app import app
+from dashboard.cache import prewarm
+from dashboard.data import current_data, on_reload
+from pages import page1
+
+# building the layouts that are otherwise built on the first visit of a page (with DASHBOARD_LAZY_PAGES)
+for page in dash.page_registry.values():
+    if callable(page['layout']):
+        page['layout']()
+
+# building the Page 1 figures for every year, so no worker has to build them on its first requests, and again in
+# each worker for every new version of the dataset before it is swapped in (see dashboard/reload.py)
+def prewarm_page1():
+    prewarm(page1.update_charts, current_data().year_index)
+
+prewarm_page1()
+on_reload(prewarm_page1)
+
+# the flask server gunicorn calls
+server = app.server
+
+# moving everything built so far out of reach of the garbage collector, so collections in the workers do not
+# write to (and so copy) the memory pages they share with the master
+gc.freeze()